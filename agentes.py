@@ -0,0 +1,112 @@
+import json
+import random
+import re
+
+# ==========================
+# Agentes LLM (autogen o stub local)
+# ==========================
+
+POTENCIALES_STUB = [
+    {"tipo": "libre"},
+    {"tipo": "pozo", "x_min": -1.0, "x_max": 1.0, "V_out": 10.0},
+    {"tipo": "barrera", "x_min": -0.5, "x_max": 0.5, "V0": 5.0},
+    {"tipo": "armonic", "k": 1.0, "x0": 0.0},
+    {"tipo": "doble_pozo", "a": 1.0, "b": 5.0},
+]
+
+ESTADOS_STUB = [
+    {"tipo": "gauss", "x0": 0.0, "sigma": 1.0},
+    {"tipo": "gauss_momentum", "x0": -4.0, "sigma": 0.7, "k0": 2.0},
+    {"tipo": "superposicion", "x1": -2.0, "x2": 2.0, "sigma": 0.7},
+]
+
+
+class AgenteStub:
+    """
+    Sustituto local y determinista de autogen.AssistantAgent, para probar
+    el laboratorio sin red ni API key.
+
+    Responde con el mismo formato que se pide a los agentes reales:
+      - Científico: un objeto JSON de configuración, o un array de
+        NUM_EXPERIMENTOS configuraciones si el mensaje lo indica.
+      - Archivista: una evaluación por cada ciclo indicado en el mensaje
+        ("Ciclo: n" o "CICLOS: n1, n2, ...").
+    """
+
+    def __init__(self, name, system_message="", semilla=0):
+        self.name = name
+        self.system_message = system_message
+        self._rng = random.Random(semilla)
+
+    def generate_reply(self, messages=None, **kwargs):
+        contenido = ""
+        if messages:
+            contenido = str(messages[-1].get("content", ""))
+        if self.name == "Archivista":
+            return self._evaluar(contenido)
+        return self._proponer(contenido)
+
+    def _config_aleatoria(self):
+        rng = self._rng
+        potencial = dict(rng.choice(POTENCIALES_STUB))
+        if "V0" in potencial:
+            potencial["V0"] = round(rng.uniform(0.5, 10.0), 3)
+        estado = dict(rng.choice(ESTADOS_STUB))
+        if "k0" in estado:
+            estado["k0"] = round(rng.uniform(0.0, 5.0), 3)
+        x_min = round(rng.uniform(-5.0, 4.0), 2)
+        return {
+            "modelo": "schrodinger_1d",
+            "L": float(rng.choice([10.0, 20.0, 30.0, 40.0])),
+            "N": rng.choice([128, 256, 512, 1024]),
+            "T": round(rng.uniform(0.5, 10.0), 2),
+            "dt": rng.choice([0.005, 0.01, 0.02]),
+            "potencial": potencial,
+            "estado_inicial": estado,
+            "metrica": {"tipo": "prob_region", "x_min": x_min, "x_max": x_min + 5.0},
+        }
+
+    def _proponer(self, contenido):
+        m = re.search(r"NUM_EXPERIMENTOS:\s*(\d+)", contenido)
+        if m is None:
+            return json.dumps(self._config_aleatoria())
+        return json.dumps([self._config_aleatoria() for _ in range(int(m.group(1)))])
+
+    def _evaluacion(self, ciclo):
+        relevancia = round(self._rng.random(), 3)
+        return {
+            "ciclo": ciclo,
+            "descripcion_experimento": "Evaluación generada por el backend stub",
+            "resultado_principal": "",
+            "metrica_relevancia": relevancia,
+            "es_interesante": relevancia > 0.5,
+            "es_descubrimiento": relevancia > 0.9,
+            "motivo_descubrimiento": "",
+        }
+
+    def _evaluar(self, contenido):
+        m = re.search(r"CICLOS:\s*([\d,\s]+)", contenido)
+        if m is not None:
+            ciclos = [int(c) for c in m.group(1).replace(",", " ").split()]
+            return json.dumps([self._evaluacion(c) for c in ciclos])
+        m = re.search(r"Ciclo:\s*(\d+)", contenido)
+        return json.dumps(self._evaluacion(int(m.group(1)) if m else 0))
+
+
+def crear_agente(nombre, system_message, llm_config, backend="openai"):
+    """
+    Crea un agente con el backend indicado: "openai" (autogen) o "stub".
+    autogen sólo se importa si se usa.
+    """
+    if backend == "stub":
+        return AgenteStub(nombre, system_message)
+    if backend != "openai":
+        raise ValueError(f"Backend LLM no soportado: {backend}")
+
+    import autogen
+
+    return autogen.AssistantAgent(
+        name=nombre,
+        system_message=system_message,
+        llm_config=llm_config,
+    )
@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import sqlite3
+
+import registro_jsonl
+
+# ==========================
+# Almacén indexado de experimentos (SQLite embebido)
+# ==========================
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ciclo INTEGER,
+    potencial TEXT,
+    estado_inicial TEXT,
+    prob_region REAL,
+    metrica_relevancia REAL,
+    descubrimiento INTEGER NOT NULL DEFAULT 0,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_registros_ciclo ON registros (ciclo);
+CREATE INDEX IF NOT EXISTS idx_registros_potencial ON registros (potencial, id);
+CREATE INDEX IF NOT EXISTS idx_registros_estado_inicial ON registros (estado_inicial, id);
+CREATE INDEX IF NOT EXISTS idx_registros_descubrimiento ON registros (descubrimiento, id);
+"""
+
+
+def _tipo(cfg):
+    if not isinstance(cfg, dict):
+        return None
+    return str(cfg.get("tipo", "")).lower() or None
+
+
+def _como_float(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class AlmacenExperimentos:
+    """
+    Histórico de experimentos en SQLite.
+
+    Cada registro completo (config + resultados + evaluación) se guarda como
+    JSON junto a unas pocas columnas indexadas, de modo que "los últimos N",
+    la búsqueda por ciclo y los filtros (descubrimientos, tipo de potencial)
+    no necesitan recorrer todo el histórico.
+    """
+
+    def __init__(self, ruta_db, importar_jsonl=None):
+        self.ruta_db = ruta_db
+        # Varios procesos (modo distribuido) pueden escribir a la vez: se
+        # espera al bloqueo en lugar de fallar enseguida
+        self.conn = sqlite3.connect(ruta_db, timeout=30.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_ESQUEMA)
+        self.conn.commit()
+
+        if importar_jsonl and self.contar() == 0 and (
+            os.path.exists(importar_jsonl) or registro_jsonl.segmentos(importar_jsonl)
+        ):
+            self.importar_jsonl(importar_jsonl)
+
+    def cerrar(self):
+        self.conn.close()
+
+    def _fila(self, registro):
+        config = registro.get("config") or {}
+        resultados = registro.get("resultados") or {}
+        evaluacion = registro.get("evaluacion") or {}
+        return (
+            registro.get("ciclo"),
+            _tipo(config.get("potencial")),
+            _tipo(config.get("estado_inicial")),
+            _como_float(resultados.get("prob_region")),
+            _como_float(evaluacion.get("metrica_relevancia")),
+            1 if evaluacion.get("es_descubrimiento") else 0,
+            json.dumps(registro, ensure_ascii=False),
+        )
+
+    def insertar(self, registro):
+        """
+        Inserta un registro sin confirmar la transacción en curso (para
+        componerlo con otras escrituras, ver cola_trabajo).
+        """
+        self.conn.execute(
+            "INSERT INTO registros (ciclo, potencial, estado_inicial, prob_region, "
+            "metrica_relevancia, descubrimiento, datos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._fila(registro),
+        )
+
+    def guardar(self, registro):
+        with self.conn:
+            self.insertar(registro)
+
+    def importar_jsonl(self, ruta):
+        """
+        Carga un fichero JSONL existente línea a línea (migración inicial),
+        incluidos sus segmentos rotados y comprimidos (ver registro_jsonl).
+        """
+        n = 0
+        with self.conn:
+            for registro in registro_jsonl.leer_registros(ruta):
+                if not isinstance(registro, dict):
+                    continue
+                self.insertar(registro)
+                n += 1
+        logging.info(f"Importados {n} registros previos desde {ruta}.")
+        return n
+
+    def contar(self):
+        return self.conn.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
+
+    def ultimo_ciclo(self):
+        fila = self.conn.execute("SELECT MAX(ciclo) FROM registros").fetchone()
+        return int(fila[0]) if fila[0] is not None else 0
+
+    def ultimos(self, n=5):
+        """
+        Los n registros más recientes, en orden cronológico.
+        """
+        filas = self.conn.execute(
+            "SELECT datos FROM registros ORDER BY id DESC LIMIT ?", (int(n),)
+        ).fetchall()
+        return [json.loads(f["datos"]) for f in reversed(filas)]
+
+    def nuevos(self, desde_id=0):
+        """
+        Registros añadidos después de 'desde_id' como [(id, registro)], en
+        orden de inserción (para seguir el almacén desde otro proceso).
+        """
+        filas = self.conn.execute(
+            "SELECT id, datos FROM registros WHERE id > ? ORDER BY id", (int(desde_id),)
+        ).fetchall()
+        return [(f["id"], json.loads(f["datos"])) for f in filas]
+
+    def por_ciclo(self, ciclo):
+        filas = self.conn.execute(
+            "SELECT datos FROM registros WHERE ciclo = ? ORDER BY id", (int(ciclo),)
+        ).fetchall()
+        return [json.loads(f["datos"]) for f in filas]
+
+    def consultar(self, solo_descubrimientos=False, potencial=None,
+                  estado_inicial=None, limite=None):
+        """
+        Registros filtrados, del más reciente al más antiguo.
+        """
+        condiciones = []
+        parametros = []
+        if solo_descubrimientos:
+            condiciones.append("descubrimiento = 1")
+        if potencial is not None:
+            condiciones.append("potencial = ?")
+            parametros.append(str(potencial).lower())
+        if estado_inicial is not None:
+            condiciones.append("estado_inicial = ?")
+            parametros.append(str(estado_inicial).lower())
+
+        sql = "SELECT datos FROM registros"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY id DESC"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
+
+        return [json.loads(f["datos"]) for f in self.conn.execute(sql, parametros)]
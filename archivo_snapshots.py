@@ -0,0 +1,283 @@
+import os
+
+import numpy as np
+
+import quantum_core
+
+# ==========================
+# Archivo de snapshots de psi (append-only, memory-mapped)
+# ==========================
+#
+# Dos ficheros en el directorio del archivo:
+#   - snapshots.bin: los arrays psi uno detrás de otro (alineados a 64 bytes).
+#   - snapshots.idx: índice binario de registros de tamaño fijo
+#     (INDICE_DTYPE), en orden de escritura. Los ciclos pueden llegar
+#     desordenados (en modo distribuido los evaluadores terminan en cualquier
+#     orden): la búsqueda por ciclo es una búsqueda binaria sobre el orden
+#     estable del índice por ciclo, que sólo se recalcula cuando crece.
+#
+# Cada entrada guarda la forma de psi ("forma", con 0 en los ejes que no
+# existen): un psi 2D de forma (N, Ny) se lee con esa misma forma.
+#
+# Los lectores obtienen vistas de solo lectura sobre el fichero mapeado:
+# ningún snapshot se copia a memoria hasta que se usa.
+#
+# Retención: con max_bytes, cuando snapshots.bin lo supera se compacta el
+# archivo conservando los ciclos más altos que caben en FRACCION_COMPACTADA
+# de max_bytes (el margen evita compactar en cada escritura). Los ficheros
+# compactados se escriben aparte y se instalan con os.replace; un marcador
+# permite terminar la instalación si el proceso muere a mitad. Las vistas
+# ya entregadas siguen apuntando al fichero anterior, que el sistema
+# conserva mientras esté mapeado.
+
+INDICE_DTYPE = np.dtype([
+    ("ciclo", "<i8"),
+    ("t", "<f8"),
+    ("offset", "<i8"),
+    ("N", "<i8"),
+    ("L", "<f8"),
+    ("complejo128", "u1"),
+    ("forma", "<i8", (2,)),
+])
+
+ALINEACION = 64
+FRACCION_COMPACTADA = 0.75
+
+PRECISIONES = {
+    "complex64": np.complex64,
+    "complex128": np.complex128,
+}
+
+
+class ArchivoSnapshots:
+    def __init__(self, directorio, precision="complex64", max_bytes=None):
+        if precision not in PRECISIONES:
+            raise ValueError(f"Precisión no soportada: {precision}")
+        self.directorio = directorio
+        self.precision = precision
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta_datos = os.path.join(directorio, "snapshots.bin")
+        self.ruta_indice = os.path.join(directorio, "snapshots.idx")
+        self.ruta_marcador = os.path.join(directorio, "compactando")
+        self._terminar_compactacion()
+        for ruta in (self.ruta_datos, self.ruta_indice):
+            if not os.path.exists(ruta):
+                open(ruta, "wb").close()
+
+        self._mapa_datos = None
+        self._mapa_indice = None
+        self._ordenado = None
+
+    # ---------- escritura ----------
+
+    def anadir(self, ciclo, psi, t=0.0, L=0.0):
+        """
+        Añade un snapshot de psi para el ciclo dado (en el instante t).
+        """
+        self.anadir_serie(ciclo, [psi], [t], L)
+
+    def anadir_serie(self, ciclo, psis, tiempos, L=0.0):
+        """
+        Añade varios snapshots del mismo ciclo (p. ej. psi a tiempos
+        intermedios). Los datos se escriben antes que el índice, de modo
+        que un lector nunca ve una entrada sin sus datos.
+        """
+        dtype = PRECISIONES[self.precision]
+        entradas = np.zeros(len(tiempos), dtype=INDICE_DTYPE)
+
+        with open(self.ruta_datos, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            for j, (psi, t) in enumerate(zip(psis, tiempos)):
+                relleno = (-offset) % ALINEACION
+                if relleno:
+                    f.write(b"\0" * relleno)
+                    offset += relleno
+                datos = np.ascontiguousarray(psi, dtype=dtype)
+                if datos.ndim not in (1, 2):
+                    raise ValueError("Sólo se archivan psi 1D o 2D")
+                f.write(datos.tobytes())
+                forma = datos.shape + (0,) * (2 - datos.ndim)
+                entradas[j] = (int(ciclo), float(t), offset, datos.size, float(L),
+                               dtype == np.complex128, forma)
+                offset += datos.nbytes
+            f.flush()
+
+        with open(self.ruta_indice, "ab") as f:
+            f.write(entradas.tobytes())
+            f.flush()
+
+        if self.max_bytes and offset > self.max_bytes:
+            self.compactar(int(self.max_bytes * FRACCION_COMPACTADA))
+
+    # ---------- retención ----------
+
+    def compactar(self, max_bytes):
+        """
+        Reescribe el archivo con sólo los ciclos más altos cuyos snapshots
+        caben en max_bytes (al menos el último ciclo). Devuelve el número
+        de ciclos descartados.
+        """
+        indice = np.array(self._indice())
+        if not len(indice):
+            return 0
+        tam = indice["N"] * np.where(indice["complejo128"], 16, 8)
+        ciclos, inverso = np.unique(indice["ciclo"], return_inverse=True)
+        # Bytes por ciclo (con el relleno de alineación) y los que caben,
+        # del ciclo más alto hacia atrás
+        por_ciclo = np.bincount(inverso, weights=tam + ALINEACION, minlength=len(ciclos))
+        acumulado = np.cumsum(por_ciclo[::-1])[::-1]
+        conservar = ciclos[(acumulado <= max_bytes) | (ciclos == ciclos[-1])]
+        mantener = np.isin(indice["ciclo"], conservar)
+        if mantener.all():
+            return 0
+
+        datos = self._datos()
+        nuevas = indice[mantener].copy()
+        tmp_datos = self.ruta_datos + ".compactado"
+        tmp_indice = self.ruta_indice + ".compactado"
+        with open(tmp_datos, "wb") as f:
+            offset = 0
+            for entrada, n in zip(nuevas, tam[mantener]):
+                relleno = (-offset) % ALINEACION
+                if relleno:
+                    f.write(b"\0" * relleno)
+                    offset += relleno
+                inicio = int(entrada["offset"])
+                f.write(datos[inicio:inicio + int(n)].tobytes())
+                entrada["offset"] = offset
+                offset += int(n)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(tmp_indice, "wb") as f:
+            f.write(nuevas.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Desde aquí la compactación se puede terminar aunque el proceso muera
+        open(self.ruta_marcador, "wb").close()
+        self._terminar_compactacion()
+        self._mapa_datos = self._mapa_indice = self._ordenado = None
+        return len(ciclos) - len(conservar)
+
+    def _terminar_compactacion(self):
+        """
+        Instala los ficheros compactados si hay una compactación a medias
+        (con el marcador ya creado, ambos temporales están completos); sin
+        marcador, los temporales que queden son de una compactación
+        abandonada y se borran.
+        """
+        pares = (
+            (self.ruta_datos + ".compactado", self.ruta_datos),
+            (self.ruta_indice + ".compactado", self.ruta_indice),
+        )
+        marcado = os.path.exists(self.ruta_marcador)
+        for tmp, destino in pares:
+            if os.path.exists(tmp):
+                if marcado:
+                    os.replace(tmp, destino)
+                else:
+                    os.remove(tmp)
+        if marcado:
+            os.remove(self.ruta_marcador)
+
+    # ---------- lectura ----------
+
+    def _indice(self):
+        # El inodo detecta que otro proceso ha compactado el archivo
+        st = os.stat(self.ruta_indice)
+        n = st.st_size // INDICE_DTYPE.itemsize
+        if n == 0:
+            return np.zeros(0, dtype=INDICE_DTYPE)
+        if self._mapa_indice is None or self._mapa_indice[0] != (n, st.st_ino):
+            self._mapa_indice = ((n, st.st_ino), np.memmap(
+                self.ruta_indice, dtype=INDICE_DTYPE, mode="r", shape=(n,)
+            ))
+        return self._mapa_indice[1]
+
+    def _datos(self):
+        st = os.stat(self.ruta_datos)
+        if self._mapa_datos is None or self._mapa_datos[0] != (st.st_size, st.st_ino):
+            self._mapa_datos = ((st.st_size, st.st_ino), np.memmap(
+                self.ruta_datos, dtype=np.uint8, mode="r", shape=(st.st_size,)
+            ))
+        return self._mapa_datos[1]
+
+    def __len__(self):
+        return len(self._indice())
+
+    def _orden(self):
+        """
+        (posiciones del índice ordenadas por ciclo, ciclos en ese orden).
+        El orden es estable: dentro de un ciclo, el de escritura.
+        """
+        indice = self._indice()
+        if self._ordenado is None or self._ordenado[0] is not indice:
+            ciclos = np.asarray(indice["ciclo"])
+            if np.all(ciclos[1:] >= ciclos[:-1]):
+                orden = np.arange(len(ciclos))
+            else:
+                orden = np.argsort(ciclos, kind="stable")
+            self._ordenado = (indice, orden, ciclos[orden])
+        return self._ordenado[1:]
+
+    def ultimo_ciclo(self):
+        _, ciclos = self._orden()
+        return int(ciclos[-1]) if len(ciclos) else None
+
+    def ciclos(self):
+        return np.unique(self._indice()["ciclo"])
+
+    def _vista(self, entrada):
+        dtype = np.complex128 if entrada["complejo128"] else np.complex64
+        inicio = int(entrada["offset"])
+        fin = inicio + int(entrada["N"]) * np.dtype(dtype).itemsize
+        forma = tuple(int(n) for n in entrada["forma"] if n) or (int(entrada["N"]),)
+        return self._datos()[inicio:fin].view(dtype).reshape(forma)
+
+    def snapshots(self, ciclo):
+        """
+        Devuelve [(t, L, psi)] del ciclo, con psi como vista de solo lectura
+        sobre el archivo mapeado (sin copia).
+        """
+        indice = self._indice()
+        orden, ciclos = self._orden()
+        i0 = np.searchsorted(ciclos, ciclo, side="left")
+        i1 = np.searchsorted(ciclos, ciclo, side="right")
+        return [
+            (float(indice[i]["t"]), float(indice[i]["L"]), self._vista(indice[i]))
+            for i in orden[i0:i1]
+        ]
+
+    def leer(self, ciclo, posicion=-1):
+        """
+        psi del ciclo (por defecto, el último snapshot guardado de ese ciclo).
+        """
+        snaps = self.snapshots(ciclo)
+        if not snaps:
+            raise KeyError(f"No hay snapshots del ciclo {ciclo}")
+        return snaps[posicion][2]
+
+
+def psis_intermedios(config, n):
+    """
+    Recalcula la evolución de 'config' y devuelve (tiempos, psis) en n
+    instantes equiespaciados de (0, T], para archivar psi a tiempos
+    intermedios. Con el motor espectral se usa una sola proyección.
+    """
+    n = max(1, int(n))
+    if str(config.get("motor", "split_step")).lower() == "espectral":
+        _, _, T, _ = quantum_core._parametros_espectrales(config)
+        tiempos = np.linspace(0.0, T, n + 1)[1:].tolist()
+        _, _, psis = quantum_core.run_schrodinger_1d_spectral_sweep(config, tiempos)
+        return tiempos, list(psis)
+
+    _, _, _, _, steps = quantum_core._parametros_simulacion(config)
+    every = max(1, -(-steps // n))
+    tiempos, psis = [], []
+    for obs in quantum_core.iter_schrodinger_1d(config, every=every, incluir_psi=True):
+        if obs["step"] == 0:
+            continue
+        tiempos.append(obs["t"])
+        psis.append(obs["psi"])
+    return tiempos, psis
@@ -0,0 +1,299 @@
+import argparse
+import copy
+import glob
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import quantum_core
+
+# ==========================
+# Barridos de parámetros sobre el núcleo cuántico
+# ==========================
+#
+# Especificación (JSON):
+# {
+#   "base": { ...config de run_schrodinger_1d... },
+#   "modo": "rejilla" | "aleatorio",
+#   "parametros": {
+#       "potencial.V0": [1.0, 2.0, 4.0],                 # lista explícita
+#       "estado_inicial.k0": {"min": 0, "max": 5, "num": 11},
+#       "T": {"min": 0.5, "max": 10, "num": 5, "log": true}
+#   },
+#   "n_muestras": 200,      # sólo modo aleatorio
+#   "semilla": 0            # sólo modo aleatorio
+# }
+#
+# En modo rejilla se hace el producto cartesiano de los valores; en modo
+# aleatorio cada parámetro se muestrea uniformemente en [min, max] (o se
+# elige de la lista).
+
+
+def asignar_clave(config, clave, valor):
+    """
+    Asigna un valor en una config anidada usando una clave con puntos,
+    por ejemplo "potencial.V0".
+    """
+    partes = clave.split(".")
+    destino = config
+    for parte in partes[:-1]:
+        if not isinstance(destino.get(parte), dict):
+            destino[parte] = {}
+        destino = destino[parte]
+    destino[partes[-1]] = valor
+
+
+def _valores_rejilla(spec):
+    if isinstance(spec, list):
+        return spec
+    if isinstance(spec, dict):
+        vmin = float(spec["min"])
+        vmax = float(spec["max"])
+        num = int(spec.get("num", 10))
+        if spec.get("log"):
+            return np.geomspace(vmin, vmax, num).tolist()
+        return np.linspace(vmin, vmax, num).tolist()
+    return [spec]
+
+
+def _muestra_aleatoria(spec, rng):
+    if isinstance(spec, list):
+        return spec[int(rng.integers(len(spec)))]
+    if isinstance(spec, dict):
+        vmin = float(spec["min"])
+        vmax = float(spec["max"])
+        if spec.get("log"):
+            return float(np.exp(rng.uniform(np.log(vmin), np.log(vmax))))
+        return float(rng.uniform(vmin, vmax))
+    return spec
+
+
+def expandir_barrido(spec):
+    """
+    Genera (punto, valores, config) para cada punto del barrido.
+    El índice 'punto' es determinista para una misma especificación, lo que
+    permite reanudar un barrido interrumpido.
+    """
+    base = spec.get("base", {})
+    parametros = spec.get("parametros", {})
+    claves = list(parametros)
+    modo = str(spec.get("modo", "rejilla")).lower()
+
+    if modo == "rejilla":
+        combinaciones = itertools.product(*(_valores_rejilla(parametros[c]) for c in claves))
+    elif modo == "aleatorio":
+        rng = np.random.default_rng(spec.get("semilla", 0))
+        n = int(spec.get("n_muestras", 100))
+        combinaciones = (
+            tuple(_muestra_aleatoria(parametros[c], rng) for c in claves) for _ in range(n)
+        )
+    else:
+        raise ValueError(f"Modo de barrido no soportado: {modo}")
+
+    for punto, combinacion in enumerate(combinaciones):
+        config = copy.deepcopy(base)
+        valores = dict(zip(claves, combinacion))
+        for clave, valor in valores.items():
+            asignar_clave(config, clave, valor)
+        yield punto, valores, config
+
+
+def _aplanar(fila, prefijo, datos):
+    """
+    Copia en 'fila' los valores escalares de 'datos'; los diccionarios
+    anidados (timing, resolucion...) pasan a columnas
+    "timing.build_s", etc.
+    """
+    for clave, valor in datos.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            _aplanar(fila, nombre + ".", valor)
+        elif isinstance(valor, (int, float, str, bool)) or valor is None:
+            fila[nombre] = valor
+
+
+def _fila(punto, valores, resultados=None, error=None):
+    """
+    Fila de salida de un punto. Los parámetros barridos van en columnas
+    "param.<clave>" para que no los pisen los resultados homónimos
+    (T, N, ...).
+    """
+    fila = {"punto": punto}
+    fila.update((f"param.{clave}", valor) for clave, valor in valores.items())
+    _aplanar(fila, "", resultados or {})
+    fila["error"] = error
+    return fila
+
+
+def _ejecutar_trozo(trozo):
+    """
+    Ejecuta un trozo de puntos del barrido (en un proceso del pool).
+    Usa la API por lotes del núcleo y, si algún punto falla, repite el
+    trozo punto a punto para aislar el error.
+    """
+    try:
+        salidas = quantum_core.run_schrodinger_1d_batch([cfg for _, _, cfg in trozo])
+        return [
+            _fila(punto, valores, resultados)
+            for (punto, valores, _), (resultados, _, _) in zip(trozo, salidas)
+        ]
+    except Exception:
+        pass
+
+    filas = []
+    for punto, valores, config in trozo:
+        try:
+            resultados, _, _ = quantum_core.run_experiment(config)
+            filas.append(_fila(punto, valores, resultados))
+        except Exception as e:
+            filas.append(_fila(punto, valores, error=str(e)))
+    return filas
+
+
+class SalidaColumnar:
+    """
+    Destino de resultados del barrido.
+      - ".csv": un único CSV al que se añaden filas.
+      - ".parquet": un directorio con un fichero parte-NNNNN.parquet por
+        escritura (requiere pyarrow o fastparquet).
+
+    pandas se importa al leer o escribir, no al cargar el módulo, para que
+    los procesos del pool (que sólo ejecutan _ejecutar_trozo) no lo carguen.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.endswith(".parquet")
+        if self.parquet:
+            os.makedirs(ruta, exist_ok=True)
+
+    def _partes(self):
+        return sorted(glob.glob(os.path.join(self.ruta, "parte-*.parquet")))
+
+    def puntos_hechos(self):
+        import pandas as pd
+
+        if self.parquet:
+            partes = self._partes()
+            if not partes:
+                return set()
+            return set(pd.concat(pd.read_parquet(p, columns=["punto"]) for p in partes)["punto"])
+        if not os.path.exists(self.ruta) or os.path.getsize(self.ruta) == 0:
+            return set()
+        return set(pd.read_csv(self.ruta, usecols=["punto"])["punto"])
+
+    def escribir(self, filas):
+        if not filas:
+            return
+        import pandas as pd
+
+        df = pd.DataFrame(filas)
+        if self.parquet:
+            n = len(self._partes())
+            df.to_parquet(os.path.join(self.ruta, f"parte-{n:05d}.parquet"), index=False)
+        else:
+            nuevo = not os.path.exists(self.ruta) or os.path.getsize(self.ruta) == 0
+            if not nuevo:
+                columnas = list(pd.read_csv(self.ruta, nrows=0).columns)
+                extra = [c for c in df.columns if c not in columnas]
+                if extra:
+                    # Columnas nuevas: se reescribe el CSV con la cabecera
+                    # ampliada (las filas previas quedan vacías en ellas)
+                    previas = pd.read_csv(self.ruta)
+                    tmp = self.ruta + ".tmp"
+                    pd.concat([previas, df], ignore_index=True).reindex(
+                        columns=columnas + extra
+                    ).to_csv(tmp, index=False)
+                    os.replace(tmp, self.ruta)
+                    return
+                # Mismo esquema que el fichero existente y en su orden
+                df = df.reindex(columns=columnas)
+            df.to_csv(self.ruta, mode="a", header=nuevo, index=False)
+
+    def leer(self):
+        import pandas as pd
+
+        if self.parquet:
+            return pd.concat(pd.read_parquet(p) for p in self._partes())
+        return pd.read_csv(self.ruta)
+
+
+def ejecutar_barrido(spec, salida, procesos=None, trozo=16, filas_por_escritura=256):
+    """
+    Ejecuta un barrido en un pool de procesos, escribiendo los resultados
+    en 'salida' a medida que llegan. Los puntos ya presentes en la salida
+    se saltan, así que relanzar el mismo barrido lo reanuda.
+
+    Devuelve el número de puntos ejecutados en esta llamada.
+    """
+    destino = SalidaColumnar(salida)
+    hechos = destino.puntos_hechos()
+    if hechos:
+        logging.info(f"Reanudando barrido: {len(hechos)} puntos ya calculados.")
+
+    pendientes = (p for p in expandir_barrido(spec) if p[0] not in hechos)
+
+    def trozos():
+        while True:
+            bloque = list(itertools.islice(pendientes, trozo))
+            if not bloque:
+                return
+            yield bloque
+
+    procesos = procesos or os.cpu_count() or 1
+    ejecutados = 0
+    buffer = []
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            generador = trozos()
+            en_vuelo = set()
+            agotado = False
+            while en_vuelo or not agotado:
+                # Mantener acotado el trabajo encolado (el barrido puede ser enorme)
+                while not agotado and len(en_vuelo) < 2 * procesos:
+                    bloque = next(generador, None)
+                    if bloque is None:
+                        agotado = True
+                        break
+                    en_vuelo.add(pool.submit(_ejecutar_trozo, bloque))
+                if not en_vuelo:
+                    break
+
+                hechos_ahora, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in hechos_ahora:
+                    filas = futuro.result()
+                    buffer.extend(filas)
+                    ejecutados += len(filas)
+                if len(buffer) >= filas_por_escritura:
+                    destino.escribir(buffer)
+                    buffer = []
+                    logging.info(f"Barrido: {ejecutados} puntos calculados.")
+    finally:
+        # También al interrumpir: lo ya calculado queda escrito y se reanuda
+        destino.escribir(buffer)
+    logging.info(f"Barrido terminado: {ejecutados} puntos nuevos en {salida}.")
+    return ejecutados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Barrido de parámetros sobre quantum_core.run_schrodinger_1d"
+    )
+    parser.add_argument("spec", help="Fichero JSON con la especificación del barrido")
+    parser.add_argument("--salida", required=True, help="Destino .csv o .parquet")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--trozo", type=int, default=16, help="Puntos por tarea del pool")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    with open(args.spec, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    ejecutar_barrido(spec, args.salida, procesos=args.procesos, trozo=args.trozo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+import quantum_core
+
+# ==========================
+# Benchmarks del núcleo split-step
+# ==========================
+#
+# Uso:
+#   python bench_quantum_core.py --salida bench.json
+#   python bench_quantum_core.py --salida nuevo.json --comparar bench.json
+#   python bench_quantum_core.py --convergencia --solo-evolucion
+#   python bench_quantum_core.py --arranque --solo-evolucion
+#
+# Sin red ni dependencias extra: sólo NumPy y la biblioteca estándar.
+
+TAMANOS_N = [64, 128, 256, 512, 1024, 2048]
+PASOS = [100, 1000, 5000]  # 5000 = MAX_STEPS del núcleo
+
+POTENCIALES = {
+    "libre": {"tipo": "libre"},
+    "pozo": {"tipo": "pozo", "x_min": -1.0, "x_max": 1.0, "V_out": 10.0},
+    "barrera": {"tipo": "barrera", "x_min": -0.5, "x_max": 0.5, "V0": 5.0},
+    "armonic": {"tipo": "armonic", "k": 1.0, "x0": 0.0},
+    "doble_pozo": {"tipo": "doble_pozo", "a": 1.0, "b": 5.0},
+}
+
+ESTADOS = {
+    "gauss": {"tipo": "gauss", "x0": 0.0, "sigma": 1.0},
+    "gauss_momentum": {"tipo": "gauss_momentum", "x0": -4.0, "sigma": 0.7, "k0": 2.0},
+    "superposicion": {"tipo": "superposicion", "x1": -2.0, "x2": 2.0, "sigma": 0.7},
+}
+
+
+def config_caso(N, pasos, potencial="barrera", estado="gauss_momentum"):
+    """
+    Config que produce exactamente 'pasos' pasos dentro de los límites del
+    núcleo (T <= 20, dt en [1e-4, 0.05]).
+    """
+    T = min(20.0, pasos * 0.01)
+    return {
+        "modelo": "schrodinger_1d",
+        "L": 20.0,
+        "N": N,
+        "T": T,
+        "dt": T / pasos,
+        "potencial": POTENCIALES[potencial],
+        "estado_inicial": ESTADOS[estado],
+        "metrica": {"tipo": "prob_region", "x_min": 0.0, "x_max": 5.0},
+    }
+
+
+INTEGRADORES = ("strang", "yoshida4", "yoshida6")
+PASOS_CONVERGENCIA = (25, 50, 100, 200, 400)
+ERRORES_OBJETIVO = (1e-3, 1e-5)
+
+
+def _medir(funcion, repeticiones):
+    """
+    Devuelve (mejor tiempo en s, memoria), con memoria un diccionario:
+      - memoria_pico_bytes: pico de memoria trazada durante la ejecución.
+      - asignaciones_netas, bytes_netos: diferencia entre dos instantáneas
+        de tracemalloc (antes y después), sumada por línea de código: los
+        bloques y bytes que la ejecución deja vivos (p. ej. en la caché de
+        propagadores o en el resultado devuelto).
+    La memoria se mide en una ejecución aparte, porque tracemalloc ralentiza.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        quantum_core.clear_propagator_cache()
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    quantum_core.clear_propagator_cache()
+    filtros = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot().filter_traces(filtros)
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    despues = tracemalloc.take_snapshot().filter_traces(filtros)
+    tracemalloc.stop()
+    del resultado
+
+    diferencias = despues.compare_to(antes, "lineno")
+    memoria = {
+        "memoria_pico_bytes": pico - base,
+        "asignaciones_netas": sum(d.count_diff for d in diferencias),
+        "bytes_netos": sum(d.size_diff for d in diferencias),
+    }
+    return min(tiempos), memoria
+
+
+def casos_constructores():
+    for N in TAMANOS_N:
+        x, dx = quantum_core.build_spatial_grid(20.0, N)
+        yield f"rejilla/N={N}", N, lambda N=N: quantum_core.build_spatial_grid(20.0, N)
+        yield f"rejilla_k/N={N}", N, lambda N=N, dx=dx: quantum_core.build_k_grid(N, dx)
+        for nombre, cfg in POTENCIALES.items():
+            yield (f"potencial/{nombre}/N={N}", N,
+                   lambda x=x, cfg=cfg: quantum_core.build_potential_1d(x, cfg))
+        for nombre, cfg in ESTADOS.items():
+            yield (f"estado/{nombre}/N={N}", N,
+                   lambda x=x, cfg=cfg: quantum_core.build_initial_state_1d(x, cfg))
+
+
+def casos_evolucion(completo=False):
+    """
+    Por defecto: todos los N y pasos con barrera + gauss_momentum, y todas
+    las combinaciones potencial x estado con N=512 y 1000 pasos.
+    Con completo=True se recorre el producto cartesiano entero.
+    """
+    if completo:
+        combinaciones = itertools.product(TAMANOS_N, PASOS, POTENCIALES, ESTADOS)
+    else:
+        combinaciones = itertools.chain(
+            ((N, p, "barrera", "gauss_momentum") for N in TAMANOS_N for p in PASOS),
+            ((512, 1000, pot, est) for pot in POTENCIALES for est in ESTADOS
+             if (pot, est) != ("barrera", "gauss_momentum")),
+        )
+    for N, pasos, pot, est in combinaciones:
+        yield N, pasos, pot, est, config_caso(N, pasos, pot, est)
+
+
+def ejecutar_benchmarks(repeticiones=3, completo=False, solo_evolucion=False):
+    casos = []
+
+    if not solo_evolucion:
+        for nombre, N, funcion in casos_constructores():
+            segundos, memoria = _medir(funcion, max(repeticiones, 5))
+            casos.append({
+                "nombre": nombre,
+                "tipo": "constructor",
+                "N": N,
+                "segundos": segundos,
+                **memoria,
+            })
+
+    for N, pasos, pot, est, config in casos_evolucion(completo):
+        resultados, _, _ = quantum_core.run_schrodinger_1d(config)
+        assert resultados["steps"] == pasos, (resultados["steps"], pasos)
+        segundos, memoria = _medir(lambda: quantum_core.run_schrodinger_1d(config), repeticiones)
+        casos.append({
+            "nombre": f"evolucion/{pot}/{est}/N={N}/pasos={pasos}",
+            "tipo": "evolucion",
+            "N": N,
+            "pasos": pasos,
+            "potencial": pot,
+            "estado_inicial": est,
+            "segundos": segundos,
+            "pasos_por_segundo": pasos / segundos if segundos > 0 else float("inf"),
+            **memoria,
+        })
+        print(f"{casos[-1]['nombre']}: {casos[-1]['pasos_por_segundo']:.0f} pasos/s, "
+              f"pico {memoria['memoria_pico_bytes'] / 1024:.0f} KiB, "
+              f"{memoria['asignaciones_netas']} bloques / "
+              f"{memoria['bytes_netos'] / 1024:.0f} KiB netos", file=sys.stderr)
+
+    return {
+        "meta": {
+            "fecha": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "repeticiones": repeticiones,
+        },
+        "casos": casos,
+    }
+
+
+def convergencia_integradores(N=256, T=5.0, potencial="armonic", estado="gauss_momentum"):
+    """
+    Convergencia en dt de cada integrador. La referencia es el motor
+    espectral, exacto en el tiempo para la misma rejilla, así que el error
+    medido es sólo el de la composición temporal. Para cada caso se da el
+    error de psi (norma L2), el de prob_region, los pares de FFTs y el
+    orden observado entre refinamientos sucesivos.
+    """
+    base = dict(config_caso(N, int(round(T / 0.01)), potencial, estado), T=T)
+    ref, x, psi_ref = quantum_core.run_schrodinger_1d(dict(base, motor="espectral"))
+    dx = x[1] - x[0]
+
+    casos = []
+    for integrador in INTEGRADORES:
+        anterior = None
+        for pasos in PASOS_CONVERGENCIA:
+            config = dict(base, dt=T / pasos, integrador=integrador)
+            resultados, _, psi = quantum_core.run_schrodinger_1d(config)
+            if resultados["steps"] != pasos:
+                continue  # dt fuera de los límites del integrador
+            segundos, _ = _medir(lambda: quantum_core.run_schrodinger_1d(config), 3)
+            error = float(np.sqrt(np.sum(np.abs(psi - psi_ref) ** 2) * dx))
+            orden = None
+            if anterior is not None and error > 0 and anterior[1] > 0:
+                orden = float(np.log(anterior[1] / error) / np.log(pasos / anterior[0]))
+            casos.append({
+                "integrador": integrador,
+                "pasos": pasos,
+                "dt": T / pasos,
+                "pares_fft": resultados["pares_fft"],
+                "error_psi": error,
+                "error_prob_region": abs(resultados["prob_region"] - ref["prob_region"]),
+                "orden_observado": orden,
+                "segundos": segundos,
+            })
+            anterior = (pasos, error)
+            print(f"convergencia/{integrador}/pasos={pasos}: error {error:.2e}, "
+                  f"{resultados['pares_fft']} pares FFT", file=sys.stderr)
+    return {
+        "N": N,
+        "T": T,
+        "potencial": potencial,
+        "estado_inicial": estado,
+        "casos": casos,
+    }
+
+
+def fft_a_igual_error(N=256, T=5.0, potencial="armonic", estado="gauss_momentum"):
+    """
+    Coste de cada integrador a igual error: para cada error objetivo (en
+    norma L2 de psi, contra el motor espectral) se busca el menor número
+    de pasos, partiendo del dt máximo que admite el núcleo y duplicando,
+    que lo alcanza, y se dan los pares de FFTs, el tiempo y el ahorro de
+    pares respecto a Strang.
+    """
+    base = dict(config_caso(N, int(round(T / 0.01)), potencial, estado), T=T)
+    _, x, psi_ref = quantum_core.run_schrodinger_1d(dict(base, motor="espectral"))
+    dx = x[1] - x[0]
+
+    casos = []
+    for objetivo in ERRORES_OBJETIVO:
+        pares_strang = None
+        for integrador in INTEGRADORES:
+            config = dict(base, integrador=integrador)
+            pasos = int(np.ceil(T / quantum_core._dt_max(config) - 1e-9))
+            while pasos <= quantum_core.MAX_STEPS:
+                config["dt"] = T / pasos
+                resultados, _, psi = quantum_core.run_schrodinger_1d(config)
+                error = float(np.sqrt(np.sum(np.abs(psi - psi_ref) ** 2) * dx))
+                if error <= objetivo:
+                    break
+                pasos *= 2
+            else:
+                print(f"igual_error/{objetivo:.0e}/{integrador}: no se alcanza "
+                      f"con MAX_STEPS", file=sys.stderr)
+                continue
+            segundos, _ = _medir(lambda: quantum_core.run_schrodinger_1d(config), 3)
+            pares = resultados["pares_fft"]
+            if integrador == "strang":
+                pares_strang = pares
+            casos.append({
+                "error_objetivo": objetivo,
+                "integrador": integrador,
+                "pasos": pasos,
+                "dt": T / pasos,
+                "error_psi": error,
+                "pares_fft": pares,
+                "ahorro_pares_vs_strang": (
+                    1.0 - pares / pares_strang if pares_strang else None
+                ),
+                "segundos": segundos,
+            })
+            print(f"igual_error/{objetivo:.0e}/{integrador}: {pares} pares FFT "
+                  f"(dt={T / pasos:.4f}, error {error:.2e}, {segundos:.4f}s)",
+                  file=sys.stderr)
+    return {
+        "N": N,
+        "T": T,
+        "potencial": potencial,
+        "estado_inicial": estado,
+        "casos": casos,
+    }
+
+
+# Presupuesto de arranque en frío del trabajador (import + primera config)
+ARRANQUE_MAX_SEGUNDOS = 1.0
+# Módulos que el trabajador de física no debe cargar
+MODULOS_PESADOS = ("autogen", "openai", "pandas", "scipy")
+
+
+def arranque_en_frio(repeticiones=5):
+    """
+    Mide el arranque en frío de trabajador_fisica en procesos nuevos:
+    el tiempo de importación y el de importar + simular una config pequeña
+    de principio a fin (lo que tarda un proceso de un pool en dar su
+    primer resultado). Comprueba además qué módulos pesados se cargan.
+    """
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    codigo_import = (
+        "import json, sys, time; t0 = time.perf_counter(); import trabajador_fisica; "
+        "print(json.dumps([time.perf_counter() - t0, "
+        f"[m for m in {MODULOS_PESADOS!r} if m in sys.modules]]))"
+    )
+    config = json.dumps(config_caso(128, 100)) + "\n"
+
+    importaciones, totales, cargados = [], [], set()
+    for _ in range(max(1, repeticiones)):
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo_import],
+            cwd=directorio, capture_output=True, text=True, check=True,
+        )
+        segundos, modulos = json.loads(salida.stdout)
+        importaciones.append(segundos)
+        cargados.update(modulos)
+
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "trabajador_fisica"],
+            cwd=directorio, input=config, capture_output=True, text=True, check=True,
+        )
+        totales.append(time.perf_counter() - t0)
+
+    arranque = {
+        "import_s": min(importaciones),
+        "primera_config_s": min(totales),
+        "presupuesto_s": ARRANQUE_MAX_SEGUNDOS,
+        "dentro_de_presupuesto": min(totales) <= ARRANQUE_MAX_SEGUNDOS,
+        "modulos_pesados": sorted(cargados),
+    }
+    print(f"arranque: import {arranque['import_s']:.3f}s, primera config "
+          f"{arranque['primera_config_s']:.3f}s, pesados {arranque['modulos_pesados']}",
+          file=sys.stderr)
+    return arranque
+
+
+def comparar_con_referencia(actual, referencia, tolerancia=0.2):
+    """
+    Compara dos informes caso a caso. Un caso es regresión si su tiempo
+    empeora más de 'tolerancia' (fracción) respecto a la referencia.
+    Devuelve la lista de regresiones (nombre, t_ref, t_actual, ratio).
+    """
+    ref = {c["nombre"]: c for c in referencia.get("casos", [])}
+    regresiones = []
+    for caso in actual.get("casos", []):
+        base = ref.get(caso["nombre"])
+        if base is None or base["segundos"] <= 0:
+            continue
+        ratio = caso["segundos"] / base["segundos"]
+        if ratio > 1.0 + tolerancia:
+            regresiones.append((caso["nombre"], base["segundos"], caso["segundos"], ratio))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de quantum_core")
+    parser.add_argument("--salida", help="Fichero JSON donde guardar el informe")
+    parser.add_argument("--comparar", help="Informe JSON de referencia")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Empeoramiento relativo permitido (0.2 = 20%%)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--completo", action="store_true",
+                        help="Producto cartesiano N x pasos x potencial x estado")
+    parser.add_argument("--solo-evolucion", action="store_true")
+    parser.add_argument("--convergencia", action="store_true",
+                        help="Añade la convergencia en dt de los integradores "
+                             "y su coste en FFTs a igual error")
+    parser.add_argument("--arranque", action="store_true",
+                        help="Mide el arranque en frío del trabajador de física")
+    args = parser.parse_args(argv)
+
+    informe = ejecutar_benchmarks(args.repeticiones, args.completo, args.solo_evolucion)
+    if args.convergencia:
+        informe["convergencia"] = convergencia_integradores()
+        informe["igual_error"] = fft_a_igual_error()
+    if args.arranque:
+        informe["arranque"] = arranque_en_frio(args.repeticiones)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+        regresiones = comparar_con_referencia(informe, referencia, args.tolerancia)
+        for nombre, t_ref, t_act, ratio in regresiones:
+            print(f"REGRESIÓN {nombre}: {t_ref:.4f}s -> {t_act:.4f}s (x{ratio:.2f})")
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto a la referencia.")
+
+    if args.arranque:
+        arranque = informe["arranque"]
+        if not arranque["dentro_de_presupuesto"] or arranque["modulos_pesados"]:
+            print(f"ARRANQUE fuera de presupuesto: {arranque['primera_config_s']:.3f}s "
+                  f"(máx. {ARRANQUE_MAX_SEGUNDOS}s), pesados {arranque['modulos_pesados']}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import escritura_atomica
+import quantum_core
+
+# ==========================
+# Caché persistente de resultados (direccionada por contenido)
+# ==========================
+
+CACHE_DIR = os.path.join("laboratorio_codigo", "cache_resultados")
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_RESULTADOS_MAX_MB", "256")) * 1024 * 1024
+# Cada cuánto se vuelve a leer el directorio para contar lo que han
+# guardado otros procesos que comparten la caché
+CACHE_REVISION_SEGUNDOS = 60.0
+
+
+def clave_config(config):
+    """
+    Clave de caché: SHA-256 de la forma canónica de la configuración
+    (ver quantum_core.canonical_config) junto con la versión del núcleo.
+    """
+    canon = quantum_core.canonical_config(config)
+    texto = json.dumps(
+        {"version": quantum_core.VERSION_NUCLEO, "config": canon},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheResultados:
+    """
+    Memoización en disco de quantum_core.run_experiment.
+
+    Cada entrada es <clave>.json con los resultados y, opcionalmente,
+    <clave>.npz con psi comprimido. Cuando el directorio supera max_bytes
+    se eliminan las entradas usadas hace más tiempo.
+
+    El orden de uso y el tamaño total se llevan en memoria, así que guardar
+    no lista el directorio. Como varios procesos pueden compartirlo (modo
+    distribuido), esa cuenta es sólo una estimación: el directorio se
+    vuelve a recorrer (ordenando por mtime, que cada acierto actualiza en
+    cualquier proceso) al superar max_bytes antes de desalojar, y cada
+    revision_segundos para contar lo que han añadido los demás. Así el
+    límite es global y se desalojan las entradas menos usadas por todos.
+    Una entrada desalojada por otro proceso entre dos lecturas se trata
+    como un fallo (o, si sólo falta psi, como un acierto sin psi). Es
+    seguro usarla desde varios hilos.
+    """
+
+    def __init__(self, directorio=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, guardar_psi=True,
+                 revision_segundos=CACHE_REVISION_SEGUNDOS):
+        self.directorio = directorio
+        self.max_bytes = int(max_bytes)
+        self.guardar_psi = guardar_psi
+        self.revision_segundos = float(revision_segundos)
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directorio, exist_ok=True)
+        self._releer_directorio()
+
+    def _ruta(self, clave, extension):
+        return os.path.join(self.directorio, clave + extension)
+
+    def _releer_directorio(self):
+        """
+        Rehace el orden de uso y el tamaño total a partir del disco.
+        """
+        # clave -> bytes en disco, de la menos a la más recientemente usada
+        self._lru = OrderedDict(
+            (clave, tam) for clave, tam, _ in sorted(self._entradas(), key=lambda e: e[2])
+        )
+        self._bytes_totales = sum(self._lru.values())
+        self._revisado = time.monotonic()
+
+    def _entradas(self):
+        """
+        Devuelve [(clave, bytes, mtime)] de todas las entradas en disco.
+        """
+        entradas = {}
+        for item in os.scandir(self.directorio):
+            if not item.is_file():
+                continue
+            clave, extension = os.path.splitext(item.name)
+            if extension not in (".json", ".npz"):
+                continue
+            try:
+                st = item.stat()
+            except FileNotFoundError:
+                continue  # desalojada por otro proceso mientras se listaba
+            tam, mtime = entradas.get(clave, (0, 0.0))
+            entradas[clave] = (tam + st.st_size, max(mtime, st.st_mtime))
+        return [(c, tam, mtime) for c, (tam, mtime) in entradas.items()]
+
+    def obtener(self, config):
+        """
+        Devuelve (resultados, psi) si la configuración está en caché, o None.
+        psi es None si la entrada se guardó sin función de onda.
+        """
+        clave = clave_config(config)
+        ruta_json = self._ruta(clave, ".json")
+        with self._lock:
+            try:
+                with open(ruta_json, "r", encoding="utf-8") as f:
+                    resultados = json.load(f)
+            except (OSError, ValueError):
+                self.fallos += 1
+                return None
+
+            psi = None
+            ruta_psi = self._ruta(clave, ".npz")
+            if os.path.exists(ruta_psi):
+                try:
+                    with np.load(ruta_psi) as datos:
+                        psi = datos["psi"]
+                    os.utime(ruta_psi)
+                except Exception:
+                    psi = None
+            try:
+                os.utime(ruta_json)
+            except FileNotFoundError:
+                pass  # desalojada por otro proceso tras leerla
+
+            if clave in self._lru:
+                self._lru.move_to_end(clave)
+            self.aciertos += 1
+        return resultados, psi
+
+    def guardar(self, config, resultados, psi=None):
+        clave = clave_config(config)
+        texto = json.dumps(resultados, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            nuevos_bytes = escritura_atomica.escribir_atomico(
+                self._ruta(clave, ".json"), lambda f: f.write(texto)
+            )
+            if self.guardar_psi and psi is not None:
+                nuevos_bytes += escritura_atomica.escribir_atomico(
+                    self._ruta(clave, ".npz"), lambda f: np.savez_compressed(f, psi=psi)
+                )
+
+            # Si la clave ya estaba, sus ficheros se han sobrescrito
+            self._bytes_totales += nuevos_bytes - self._lru.pop(clave, 0)
+            self._lru[clave] = nuevos_bytes
+            if time.monotonic() - self._revisado > self.revision_segundos:
+                self._releer_directorio()
+            if self._bytes_totales > self.max_bytes:
+                self._desalojar()
+
+    def _desalojar(self):
+        """
+        Elimina las entradas menos recientes hasta volver bajo max_bytes,
+        contando también las que han guardado o usado otros procesos.
+        """
+        self._releer_directorio()
+        while self._bytes_totales > self.max_bytes and len(self._lru) > 1:
+            clave, tam = self._lru.popitem(last=False)
+            for extension in (".json", ".npz"):
+                try:
+                    os.remove(self._ruta(clave, extension))
+                except FileNotFoundError:
+                    pass
+            self._bytes_totales -= tam
+
+    def resumen(self):
+        return f"aciertos={self.aciertos}, fallos={self.fallos}"
+
+
+def ejecutar_con_cache(config, cache, ejecutar=None):
+    """
+    Igual que quantum_core.run_experiment, pero consultando antes la
+    caché. En un acierto no se ejecuta la física; si la entrada no tiene
+    psi guardado, se devuelve psi = None.
+
+    'ejecutar' permite sustituir la llamada al núcleo (por ejemplo, para
+    enviarla a un pool de procesos); por defecto es run_experiment.
+    """
+    if ejecutar is None:
+        ejecutar = quantum_core.run_experiment
+    if cache is None:
+        return ejecutar(config)
+
+    try:
+        entrada = cache.obtener(config)
+    except Exception as e:
+        logging.warning(f"No se pudo consultar la caché de resultados: {e}")
+        entrada = None
+
+    if entrada is not None:
+        resultados, psi = entrada
+        x = quantum_core.rejilla_de_resultados(resultados)
+        resultados = dict(resultados, desde_cache=True)
+        return resultados, x, psi
+
+    resultados, x, psi = ejecutar(config)
+    try:
+        cache.guardar(config, resultados, psi)
+    except Exception as e:
+        logging.warning(f"No se pudo guardar en la caché de resultados: {e}")
+    return resultados, x, psi
+
+
+def ejecutar_lote_con_cache(configs, cache, al_avanzar=None):
+    """
+    Versión por lotes de ejecutar_con_cache: los aciertos se sirven de la
+    caché y los fallos 1D se simulan juntos con run_schrodinger_1d_batch
+    (los de otros modelos, uno a uno con run_experiment). 'al_avanzar'
+    (opcional, sin argumentos) se llama tras cada simulación, p. ej. para
+    renovar los leases de la cola de trabajo.
+
+    Devuelve una lista alineada con configs; cada elemento es
+    (resultados, x, psi) o la excepción que produjo esa configuración.
+    """
+    salidas = [None] * len(configs)
+    pendientes = []
+    for i, config in enumerate(configs):
+        try:
+            quantum_core.canonical_config(config)
+        except Exception as e:
+            salidas[i] = e
+            continue
+        entrada = cache.obtener(config) if cache is not None else None
+        if entrada is None:
+            pendientes.append(i)
+            continue
+        resultados, psi = entrada
+        x = quantum_core.rejilla_de_resultados(resultados)
+        salidas[i] = (dict(resultados, desde_cache=True), x, psi)
+
+    en_lote = [i for i in pendientes if quantum_core._modelo(configs[i]) == "schrodinger_1d"]
+    sueltas = [i for i in pendientes if i not in en_lote]
+
+    lote = []
+    if en_lote:
+        try:
+            lote = quantum_core.run_schrodinger_1d_batch([configs[i] for i in en_lote])
+        except Exception:
+            # Algún fallo no detectado al validar: se ejecutan una a una
+            sueltas = pendientes
+            lote = []
+            en_lote = []
+        if al_avanzar is not None:
+            al_avanzar()
+
+    for i in sueltas:
+        try:
+            lote.append(quantum_core.run_experiment(configs[i]))
+        except Exception as e:
+            lote.append(e)
+        if al_avanzar is not None:
+            al_avanzar()
+
+    for i, salida in zip(en_lote + sueltas, lote):
+        salidas[i] = salida
+        if cache is not None and not isinstance(salida, Exception):
+            resultados, _, psi = salida
+            try:
+                cache.guardar(configs[i], resultados, psi)
+            except Exception as e:
+                logging.warning(f"No se pudo guardar en la caché de resultados: {e}")
+
+    return salidas
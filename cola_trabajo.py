@@ -0,0 +1,269 @@
+import json
+import os
+import socket
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# ==========================
+# Cola de trabajo duradera (SQLite) para el laboratorio distribuido
+# ==========================
+#
+# Cada experimento es una fila de 'trabajos' que avanza por etapas:
+#
+#   fisica -> evaluacion -> (registrado: la fila pasa a 'registros')
+#       \-----------\-----> fallido
+#
+# - El número de ciclo es la clave AUTOINCREMENT de la fila: lo asigna
+#   SQLite al encolar, así que es único entre todos los procesos y nunca
+#   se reutiliza (la secuencia arranca tras el último ciclo del almacén).
+# - Un proceso reclama trabajos de una etapa con un lease (propietario +
+#   lease_hasta) dentro de una transacción BEGIN IMMEDIATE. Si muere, el
+#   lease caduca y otro proceso lo retoma; tras max_intentos el trabajo se
+#   marca como fallido.
+# - Completar una etapa sólo tiene efecto si el lease sigue siendo del
+#   proceso. El registro final inserta en 'registros' y borra el trabajo en
+#   la misma transacción: cada ciclo se escribe en el almacén exactamente
+#   una vez aunque dos procesos lleguen a evaluarlo.
+#
+# La tabla vive en la misma base de datos que el almacén de experimentos.
+
+ETAPAS = ("fisica", "evaluacion")
+LEASE_SEGUNDOS = 300.0
+MAX_INTENTOS = 3
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    ciclo INTEGER PRIMARY KEY AUTOINCREMENT,
+    etapa TEXT NOT NULL,
+    config TEXT NOT NULL,
+    resultados TEXT,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    propietario TEXT,
+    lease_hasta REAL,
+    error TEXT,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trabajos_etapa ON trabajos (etapa, ciclo);
+CREATE TABLE IF NOT EXISTS cursores (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+Trabajo = namedtuple("Trabajo", "ciclo config resultados intentos")
+
+
+def identificador(rol):
+    """
+    Identificador de propietario de leases: rol, máquina y proceso.
+    """
+    return f"{rol}@{socket.gethostname()}:{os.getpid()}"
+
+
+class ColaTrabajo:
+    def __init__(self, almacen, lease_segundos=LEASE_SEGUNDOS, max_intentos=MAX_INTENTOS):
+        self.almacen = almacen
+        self.conn = almacen.conn
+        self.lease_segundos = float(lease_segundos)
+        self.max_intentos = int(max_intentos)
+        self.conn.executescript(_ESQUEMA)
+        self.conn.commit()
+        with self._transaccion():
+            self._sembrar_secuencia()
+
+    @contextmanager
+    def _transaccion(self):
+        """
+        Transacción de escritura tomada desde el principio (BEGIN IMMEDIATE),
+        para que leer y reclamar sea atómico entre procesos.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def _sembrar_secuencia(self):
+        """
+        Garantiza que los ciclos nuevos sigan al último ya registrado
+        (p. ej. al pasar a modo distribuido con un histórico previo).
+        """
+        ultimo = self.almacen.ultimo_ciclo()
+        fila = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'trabajos'"
+        ).fetchone()
+        if fila is None:
+            self.conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('trabajos', ?)", (ultimo,)
+            )
+        elif fila[0] < ultimo:
+            self.conn.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'trabajos'", (ultimo,)
+            )
+
+    # ---------- proponentes ----------
+
+    def encolar(self, configs):
+        """
+        Encola configs para la etapa de física. Devuelve sus ciclos.
+        """
+        ahora = time.time()
+        ciclos = []
+        with self._transaccion():
+            for config in configs:
+                cursor = self.conn.execute(
+                    "INSERT INTO trabajos (etapa, config, creado, actualizado) "
+                    "VALUES ('fisica', ?, ?, ?)",
+                    (json.dumps(config, ensure_ascii=False), ahora, ahora),
+                )
+                ciclos.append(cursor.lastrowid)
+        return ciclos
+
+    def pendientes(self, etapa=None):
+        """
+        Trabajos sin terminar (de una etapa o de todas).
+        """
+        if etapa is None:
+            sql, parametros = "SELECT COUNT(*) FROM trabajos WHERE etapa != 'fallido'", ()
+        else:
+            sql, parametros = "SELECT COUNT(*) FROM trabajos WHERE etapa = ?", (etapa,)
+        return self.conn.execute(sql, parametros).fetchone()[0]
+
+    def ultimo_asignado(self):
+        """
+        Último número de ciclo asignado por la cola (o heredado del almacén).
+        """
+        fila = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'trabajos'"
+        ).fetchone()
+        return int(fila[0]) if fila else 0
+
+    def resumen(self):
+        filas = self.conn.execute("SELECT etapa, COUNT(*) FROM trabajos GROUP BY etapa")
+        return {etapa: n for etapa, n in filas}
+
+    # ---------- trabajadores ----------
+
+    def reclamar(self, etapa, propietario, n=1):
+        """
+        Reclama hasta n trabajos de 'etapa' (los de ciclo más bajo cuyo lease
+        no esté activo) y devuelve [Trabajo]. Los que ya han agotado sus
+        intentos con el lease caducado se marcan como fallidos.
+        """
+        if etapa not in ETAPAS:
+            raise ValueError(f"Etapa no soportada: {etapa}")
+        ahora = time.time()
+        with self._transaccion():
+            self.conn.execute(
+                "UPDATE trabajos SET etapa = 'fallido', propietario = NULL, "
+                "error = COALESCE(error, 'lease caducado'), actualizado = ? "
+                "WHERE etapa = ? AND lease_hasta < ? AND intentos >= ?",
+                (ahora, etapa, ahora, self.max_intentos),
+            )
+            filas = self.conn.execute(
+                "SELECT ciclo, config, resultados, intentos FROM trabajos "
+                "WHERE etapa = ? AND (lease_hasta IS NULL OR lease_hasta < ?) "
+                "ORDER BY ciclo LIMIT ?",
+                (etapa, ahora, int(n)),
+            ).fetchall()
+            for fila in filas:
+                self.conn.execute(
+                    "UPDATE trabajos SET propietario = ?, lease_hasta = ?, "
+                    "intentos = intentos + 1, actualizado = ? WHERE ciclo = ?",
+                    (propietario, ahora + self.lease_segundos, ahora, fila["ciclo"]),
+                )
+        return [
+            Trabajo(
+                fila["ciclo"],
+                json.loads(fila["config"]),
+                json.loads(fila["resultados"]) if fila["resultados"] else None,
+                fila["intentos"] + 1,
+            )
+            for fila in filas
+        ]
+
+    def _actualizar_propio(self, ciclo, propietario, etapa, asignaciones, parametros):
+        cursor = self.conn.execute(
+            f"UPDATE trabajos SET {asignaciones}, actualizado = ? "
+            "WHERE ciclo = ? AND etapa = ? AND propietario = ?",
+            (*parametros, time.time(), ciclo, etapa, propietario),
+        )
+        return cursor.rowcount == 1
+
+    def renovar(self, ciclo, propietario, etapa):
+        """
+        Prolonga el lease de un trabajo largo. Devuelve False si ya no es suyo.
+        """
+        with self._transaccion():
+            return self._actualizar_propio(
+                ciclo, propietario, etapa, "lease_hasta = ?",
+                (time.time() + self.lease_segundos,),
+            )
+
+    def completar_fisica(self, ciclo, propietario, resultados):
+        """
+        Guarda los resultados y pasa el trabajo a evaluación. Devuelve False
+        (y no cambia nada) si el lease ya no es del propietario.
+        """
+        with self._transaccion():
+            return self._actualizar_propio(
+                ciclo, propietario, "fisica",
+                "etapa = 'evaluacion', resultados = ?, intentos = 0, "
+                "propietario = NULL, lease_hasta = NULL",
+                (json.dumps(resultados, ensure_ascii=False),),
+            )
+
+    def fallar(self, ciclo, propietario, etapa, error, definitivo=False):
+        """
+        Libera un trabajo que ha fallado para reintentarlo, o lo marca como
+        fallido si es definitivo o ha agotado los intentos.
+        """
+        with self._transaccion():
+            fila = self.conn.execute(
+                "SELECT intentos FROM trabajos WHERE ciclo = ? AND etapa = ? AND propietario = ?",
+                (ciclo, etapa, propietario),
+            ).fetchone()
+            if fila is None:
+                return False
+            nueva_etapa = "fallido" if definitivo or fila[0] >= self.max_intentos else etapa
+            return self._actualizar_propio(
+                ciclo, propietario, etapa,
+                "etapa = ?, error = ?, propietario = NULL, lease_hasta = NULL",
+                (nueva_etapa, str(error)[:1000]),
+            )
+
+    def registrar(self, ciclo, propietario, registro, antes_de_confirmar=None):
+        """
+        Registra el ciclo evaluado: inserta el registro en el almacén y borra
+        el trabajo en una sola transacción, sólo si el lease sigue siendo del
+        propietario. 'antes_de_confirmar' (opcional) se ejecuta dentro de la
+        transacción, serializado con los demás procesos (p. ej. para añadir
+        al archivo de snapshots). Devuelve True si el registro se ha escrito.
+        """
+        with self._transaccion():
+            cursor = self.conn.execute(
+                "DELETE FROM trabajos WHERE ciclo = ? AND etapa = 'evaluacion' AND propietario = ?",
+                (ciclo, propietario),
+            )
+            if cursor.rowcount != 1:
+                return False
+            if antes_de_confirmar is not None:
+                antes_de_confirmar()
+            self.almacen.insertar(registro)
+        return True
+
+    # ---------- cursores ----------
+
+    def cursor(self, nombre):
+        fila = self.conn.execute("SELECT valor FROM cursores WHERE nombre = ?", (nombre,)).fetchone()
+        return fila[0] if fila else 0
+
+    def guardar_cursor(self, nombre, valor):
+        with self._transaccion():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cursores (nombre, valor) VALUES (?, ?)", (nombre, int(valor))
+            )
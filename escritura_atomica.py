@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+# ==========================
+# Escritura atómica de ficheros (temporal + rename)
+# ==========================
+#
+# La comparten la caché de resultados, la exportación de métricas y la caché
+# de autoestados del núcleo: en todos los casos varios procesos pueden estar
+# escribiendo el mismo fichero a la vez y nadie debe leer uno a medias.
+
+
+def escribir_atomico(ruta, escribir):
+    """
+    Escribe 'ruta' llamando a escribir(f) con un temporal binario de nombre
+    único en el mismo directorio y lo renombra al final; si algo falla, el
+    temporal se borra y 'ruta' queda como estaba. El temporal lleva sufijo
+    .tmp, así que no lo cuentan quienes recorren el directorio por extensión.
+
+    Devuelve el tamaño escrito en bytes.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escribir(f)
+        # mkstemp crea el fichero con permisos 0600; otros procesos
+        # (p. ej. el scraper de métricas) deben poder leerlo
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, ruta)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return os.path.getsize(ruta)
@@ -0,0 +1,246 @@
+import ast
+from collections import OrderedDict
+
+import numpy as np
+
+# ==========================
+# Expresiones seguras para potenciales y estados iniciales
+# ==========================
+#
+# Una expresión como "V0*exp(-(x-x0)**2/w**2) + a*x**4" se analiza una vez
+# con ast, se valida contra una lista blanca (aritmética, constantes
+# numéricas, funciones de FUNCIONES, variables de rejilla y parámetros) y
+# se compila a un evaluador vectorizado sobre arrays de NumPy. Nunca se
+# evalúa código arbitrario: no hay atributos, subíndices, lambdas,
+# comprensiones ni builtins.
+
+MAX_LONGITUD = 500
+MAX_NODOS = 200
+CACHE_SIZE = 128
+
+
+def _escalon(x):
+    return np.heaviside(x, 0.5)
+
+
+def _caja(x, a, b):
+    return ((x >= a) & (x <= b)).astype(float)
+
+
+FUNCIONES = {
+    "exp": np.exp,
+    "log": np.log,
+    "sqrt": np.sqrt,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "arctan": np.arctan,
+    "abs": np.abs,
+    "sign": np.sign,
+    "escalon": _escalon,  # Heaviside, 1/2 en 0
+    "caja": _caja,        # caja(x, a, b) = 1 en [a, b], 0 fuera
+}
+
+CONSTANTES = {
+    "pi": np.pi,
+    "e": np.e,
+}
+
+_OPERADORES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+class _Validador(ast.NodeTransformer):
+    """
+    Recorre el árbol rechazando todo lo que no esté en la lista blanca y
+    pasa las constantes enteras a float (así 9**9**9 desborda en lugar de
+    calcular un entero gigante).
+    """
+
+    def __init__(self, variables):
+        self.variables = set(variables)
+        self.parametros = set()
+        self.nodos = 0
+
+    def generic_visit(self, node):
+        self.nodos += 1
+        if self.nodos > MAX_NODOS:
+            raise ValueError("Expresión demasiado larga")
+        return super().generic_visit(node)
+
+    def visit_Expression(self, node):
+        return self.generic_visit(node)
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _OPERADORES):
+            raise ValueError(f"Operador no permitido: {type(node.op).__name__}")
+        return self.generic_visit(node)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _OPERADORES):
+            raise ValueError(f"Operador no permitido: {type(node.op).__name__}")
+        return self.generic_visit(node)
+
+    def visit_Constant(self, node):
+        self.nodos += 1
+        valor = node.value
+        if isinstance(valor, bool) or not isinstance(valor, (int, float, complex)):
+            raise ValueError(f"Constante no permitida: {valor!r}")
+        if isinstance(valor, int):
+            return ast.copy_location(ast.Constant(float(valor)), node)
+        return node
+
+    def visit_Name(self, node):
+        self.nodos += 1
+        if node.id in FUNCIONES:
+            raise ValueError(f"La función {node.id} debe llamarse con argumentos")
+        if node.id.startswith("_"):
+            raise ValueError(f"Nombre no permitido: {node.id}")
+        if node.id not in self.variables and node.id not in CONSTANTES:
+            self.parametros.add(node.id)
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCIONES:
+            raise ValueError("Sólo se permiten las funciones " + ", ".join(sorted(FUNCIONES)))
+        if node.keywords or not node.args:
+            raise ValueError(f"Llamada no permitida a {node.func.id}")
+        self.nodos += 1
+        node.args = [self.visit(a) for a in node.args]
+        return node
+
+    def visit_Load(self, node):
+        return node
+
+    def visit(self, node):
+        if isinstance(node, _OPERADORES):
+            return node
+        metodo = "visit_" + type(node).__name__
+        if not hasattr(self, metodo):
+            raise ValueError(f"Construcción no permitida: {type(node).__name__}")
+        return getattr(self, metodo)(node)
+
+
+class Expresion:
+    """
+    Expresión validada y compilada. 'parametros' son los nombres libres
+    que no son variables de rejilla ni constantes.
+    """
+
+    def __init__(self, texto, variables=("x",)):
+        if not isinstance(texto, str) or not texto.strip():
+            raise ValueError("La expresión debe ser una cadena no vacía")
+        if len(texto) > MAX_LONGITUD:
+            raise ValueError("Expresión demasiado larga")
+        try:
+            arbol = ast.parse(texto.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Expresión no válida: {e.msg}") from None
+
+        validador = _Validador(variables)
+        arbol = ast.fix_missing_locations(validador.visit(arbol))
+        self.texto = ast.unparse(arbol)
+        self.variables = tuple(variables)
+        self.parametros = frozenset(validador.parametros)
+        self._codigo = compile(arbol, "<expresion>", "eval")
+
+    def evaluar(self, parametros, **variables):
+        """
+        Evalúa la expresión sobre los arrays de 'variables' y devuelve un
+        array con la forma de la rejilla.
+        """
+        faltan = self.parametros - set(parametros)
+        if faltan:
+            raise ValueError(f"Faltan parámetros en la expresión: {', '.join(sorted(faltan))}")
+        entorno = {"__builtins__": {}}
+        entorno.update(FUNCIONES)
+        entorno.update(CONSTANTES)
+        entorno.update({p: parametros[p] for p in self.parametros})
+        entorno.update(variables)
+
+        try:
+            with np.errstate(all="ignore"):
+                valor = eval(self._codigo, entorno)
+        except (ArithmeticError, TypeError) as e:
+            raise ValueError(f"No se puede evaluar la expresión {self.texto}: {e}") from None
+        forma = np.broadcast_shapes(*(np.shape(v) for v in variables.values()))
+        valor = np.broadcast_to(np.asarray(valor), forma).copy()
+        if not np.all(np.isfinite(valor)):
+            raise ValueError(f"La expresión produce valores no finitos: {self.texto}")
+        return valor
+
+
+_COMPILADAS = OrderedDict()
+_EVALUADORES = OrderedDict()
+
+
+def _lru(cache, clave, crear):
+    valor = cache.get(clave)
+    if valor is not None:
+        cache.move_to_end(clave)
+        return valor
+    valor = crear()
+    cache[clave] = valor
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return valor
+
+
+def compilar(texto, variables=("x",)):
+    """
+    Expresion compilada para 'texto' (caché LRU por texto y variables).
+    Lanza ValueError si la expresión no es válida.
+    """
+    return _lru(_COMPILADAS, (texto, tuple(variables)), lambda: Expresion(texto, variables))
+
+
+def evaluador(texto, parametros, variables=("x",)):
+    """
+    Devuelve una función f(**variables) -> array con los parámetros ya
+    fijados, cacheada por (texto, parámetros, variables). Valida la
+    expresión y que no falte ningún parámetro antes de devolverla.
+    """
+    expresion = compilar(texto, variables)
+    valores = {p: parametros[p] for p in expresion.parametros if p in parametros}
+    faltan = expresion.parametros - set(valores)
+    if faltan:
+        raise ValueError(f"Faltan parámetros en la expresión: {', '.join(sorted(faltan))}")
+    clave = (expresion.texto, tuple(variables), tuple(sorted(valores.items())))
+    return _lru(
+        _EVALUADORES, clave,
+        lambda: (lambda **rejilla: expresion.evaluar(valores, **rejilla)),
+    )
+
+
+def parametros_de_config(cfg):
+    """
+    Parámetros de una expresión en un bloque de config
+    ({"tipo": "expresion", "expresion": "...", "V0": 3.0, ...} o con un
+    diccionario "parametros").
+    """
+    parametros = {
+        c: v for c, v in cfg.items()
+        if c not in ("tipo", "expresion", "parametros")
+        and isinstance(v, (int, float)) and not isinstance(v, bool)
+    }
+    extra = cfg.get("parametros") or {}
+    if not isinstance(extra, dict):
+        raise ValueError("\"parametros\" debe ser un diccionario nombre -> número")
+    parametros.update(extra)
+    try:
+        return {c: float(v) for c, v in parametros.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"Los parámetros de la expresión deben ser números: {extra}") from None
+
+
+def validar_bloque(cfg, variables=("x",)):
+    """
+    Valida un bloque {"tipo": "expresion", ...} sin evaluarlo (sintaxis,
+    lista blanca y parámetros) y devuelve el texto normalizado de la
+    expresión (espacios y enteros uniformes), útil como forma canónica.
+    """
+    texto = cfg.get("expresion")
+    evaluador(texto, parametros_de_config(cfg), variables)
+    return compilar(texto, variables).texto
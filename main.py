@@ -1,10 +1,22 @@
+import asyncio
+import atexit
 import time
 import logging
 import os
 import json
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-import autogen
+import agentes
+import almacen_experimentos
+import archivo_snapshots
+import cache_resultados
+import cola_trabajo
+import metricas
+import novedad
 import quantum_core
+import registro_jsonl
 
 # ==========================
 # Configuración básica
@@ -12,11 +24,10 @@ import quantum_core
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
 
-api_key = os.environ.get("OPENAI_API_KEY")
-if not api_key:
-    logging.error("FALTA API KEY. Configúrala en las Variables de Railway.")
-    raise SystemExit(1)
+# "openai" (autogen) o "stub" (LLM local determinista, sin red)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "openai").lower()
 
+api_key = os.environ.get("OPENAI_API_KEY")
 config_list = [{"model": "gpt-3.5-turbo", "api_key": api_key}]
 llm_config = {
     "config_list": config_list,
@@ -25,43 +36,245 @@ llm_config = {
 
 CICLO_DELAY_SECONDS = int(os.environ.get("CIVILIZACION_DELAY", "60"))
 
+# Modo "serie" (por defecto), "pipeline" (varios ciclos en vuelo con asyncio)
+# o "distribuido" (procesos independientes sobre una cola SQLite, ver más abajo)
+MODO = os.environ.get("CIVILIZACION_MODO", "serie").lower()
+# Modo distribuido: rol del proceso ("proponente", "fisica" o "evaluador")
+ROL = os.environ.get("CIVILIZACION_ROL", "proponente").lower()
+COLA_LEASE_SEGUNDOS = float(os.environ.get("CIVILIZACION_LEASE", "300"))
+# El proponente deja de encolar mientras haya tantos trabajos esperando física
+COLA_MAX_PENDIENTES = int(os.environ.get("CIVILIZACION_COLA_MAX", "8"))
+COLA_ESPERA_SEGUNDOS = 2.0
+# Errores del entorno que merece la pena reintentar; cualquier otro error del
+# núcleo con una config (ValueError, TypeError de una expresión...) se
+# repetiría igual, así que marca el trabajo como fallido sin reintentos
+ERRORES_TRANSITORIOS = (OSError, MemoryError)
+LOTE_FISICA = int(os.environ.get("CIVILIZACION_LOTE_FISICA", "4"))
+CICLOS_EN_VUELO = int(os.environ.get("CIVILIZACION_EN_VUELO", "3"))
+PROCESOS_FISICA = int(os.environ.get("CIVILIZACION_PROCESOS", str(os.cpu_count() or 1)))
+LLM_LLAMADAS_POR_MINUTO = float(os.environ.get("CIVILIZACION_LLM_RPM", "20"))
+# Experimentos propuestos y evaluados por cada llamada al LLM (modo serie)
+TAMANO_LOTE = int(os.environ.get("CIVILIZACION_LOTE", "1"))
+
 WORK_DIR = "laboratorio_codigo"
 REGISTROS_FILE = os.path.join(WORK_DIR, "registros_experimentos.jsonl")
 DESCUBRIMIENTOS_FILE = os.path.join(WORK_DIR, "descubrimientos_destacados.jsonl")
+ALMACEN_FILE = os.path.join(WORK_DIR, "experimentos.sqlite")
+METRICAS_PROM_FILE = os.path.join(WORK_DIR, "metricas.prom")
+METRICAS_JSON_FILE = os.path.join(WORK_DIR, "metricas.json")
+SNAPSHOTS_DIR = os.path.join(WORK_DIR, "snapshots")
+# Registros JSONL: el fichero activo rota al llegar a este tamaño y los
+# segmentos rotados se comprimen; se conservan los REGISTROS_SEGMENTOS más
+# recientes y los más antiguos se borran (queda constancia en el log).
+# CIVILIZACION_REGISTROS_SEGMENTOS=0 los conserva todos, sin límite de disco.
+REGISTROS_MAX_MB = float(os.environ.get("CIVILIZACION_REGISTROS_MAX_MB", "64"))
+REGISTROS_SEGMENTOS = int(os.environ.get("CIVILIZACION_REGISTROS_SEGMENTOS", "32"))
+REGISTROS_COMPRESION = os.environ.get("CIVILIZACION_REGISTROS_COMPRESION", "gzip")
+# "nunca", "rotacion" o "vaciado" (ver registro_jsonl)
+REGISTROS_FSYNC = os.environ.get("CIVILIZACION_REGISTROS_FSYNC", "rotacion")
+# complex64 ocupa la mitad en disco; complex128 conserva la precisión completa
+SNAPSHOTS_PRECISION = os.environ.get("CIVILIZACION_SNAPSHOTS_PRECISION", "complex64")
+# Número de instantes intermedios de psi a archivar por ciclo (0 = sólo el final).
+# Obtenerlos exige repetir la evolución, así que está desactivado por defecto.
+SNAPSHOTS_INTERMEDIOS = int(os.environ.get("CIVILIZACION_SNAPSHOTS_INTERMEDIOS", "0"))
+# Tamaño máximo del archivo de snapshots: al superarlo se descartan los
+# ciclos más antiguos (0 = sin límite)
+SNAPSHOTS_MAX_MB = float(os.environ.get("CIVILIZACION_SNAPSHOTS_MAX_MB", "1024"))
+# Un psi 2D de 512x512 en complex64 ocupa 2 MB: sólo se archiva si se pide
+SNAPSHOTS_2D = os.environ.get("CIVILIZACION_SNAPSHOTS_2D", "0") == "1"
+# Veces que se vuelve a pedir al Científico una propuesta casi idéntica a un
+# experimento previo (umbral en CIVILIZACION_NOVEDAD_UMBRAL, ver novedad.py)
+NOVEDAD_REINTENTOS = int(os.environ.get("CIVILIZACION_NOVEDAD_REINTENTOS", "2"))
+NOVEDAD_VECINOS = 3
+
+_almacen = None
+_archivo_snapshots = None
+_escritores = {}
+_indice_novedad = None
+_indice_novedad_id = 0
+_cola = None
+_agentes = {}
+_agentes_lock = threading.Lock()
 
 
 # ==========================
 # Helpers de entorno y ficheros
 # ==========================
 
+def comprobar_api_key():
+    """
+    Sale si el backend es "openai" y falta la API key. Se comprueba al
+    arrancar el laboratorio y no al importar, para que los procesos que sólo
+    usan el núcleo de física (pool, trabajador_fisica) no dependan de ella.
+    """
+    if LLM_BACKEND == "openai" and not api_key:
+        logging.error("FALTA API KEY. Configúrala en las Variables de Railway.")
+        raise SystemExit(1)
+
+
 def asegurar_directorios():
     if not os.path.exists(WORK_DIR):
         os.makedirs(WORK_DIR)
 
 
+def obtener_almacen():
+    """
+    Devuelve el almacén de experimentos (SQLite), creándolo la primera vez.
+    Si la base está vacía se importa el JSONL de registros existente.
+    """
+    global _almacen
+    if _almacen is None:
+        asegurar_directorios()
+        _almacen = almacen_experimentos.AlmacenExperimentos(
+            ALMACEN_FILE, importar_jsonl=REGISTROS_FILE
+        )
+    return _almacen
+
+
+def obtener_indice_novedad():
+    """
+    Devuelve el índice de novedad, construido la primera vez con todo el
+    histórico del almacén. Debe llamarse primero desde el hilo del almacén;
+    después el índice es seguro desde cualquier hilo.
+    """
+    global _indice_novedad
+    if _indice_novedad is None:
+        t0 = time.perf_counter()
+        _indice_novedad = novedad.IndiceNovedad()
+        refrescar_indice_novedad()
+        logging.info(
+            f"Índice de novedad: {len(_indice_novedad)} experimentos en "
+            f"{time.perf_counter() - t0:.2f}s."
+        )
+    return _indice_novedad
+
+
+def refrescar_indice_novedad():
+    """
+    Añade al índice los registros del almacén posteriores al último visto
+    (los de este proceso y, en modo distribuido, los de los demás).
+    """
+    global _indice_novedad_id
+    indice = obtener_indice_novedad()
+    for id_registro, registro in obtener_almacen().nuevos(_indice_novedad_id):
+        if isinstance(registro.get("config"), dict):
+            indice.anadir(registro)
+        _indice_novedad_id = id_registro
+
+
+def obtener_cola():
+    """
+    Cola de trabajo del modo distribuido, en la base de datos del almacén.
+    """
+    global _cola
+    if _cola is None:
+        _cola = cola_trabajo.ColaTrabajo(obtener_almacen(), lease_segundos=COLA_LEASE_SEGUNDOS)
+    return _cola
+
+
+def obtener_archivo_snapshots():
+    global _archivo_snapshots
+    if _archivo_snapshots is None:
+        _archivo_snapshots = archivo_snapshots.ArchivoSnapshots(
+            SNAPSHOTS_DIR, precision=SNAPSHOTS_PRECISION,
+            max_bytes=int(SNAPSHOTS_MAX_MB * 1024 * 1024),
+        )
+    return _archivo_snapshots
+
+
+def obtener_escritor(ruta):
+    """
+    Escritor JSONL (con búfer y rotación) de 'ruta', abierto una sola vez
+    por proceso y cerrado al salir.
+    """
+    if ruta not in _escritores:
+        asegurar_directorios()
+        if not _escritores:
+            atexit.register(cerrar_escritores)
+        _escritores[ruta] = registro_jsonl.EscritorJSONL(
+            ruta,
+            max_bytes=int(REGISTROS_MAX_MB * 1024 * 1024),
+            fsync=REGISTROS_FSYNC,
+            compresion=REGISTROS_COMPRESION,
+            max_segmentos=REGISTROS_SEGMENTOS,
+        )
+    return _escritores[ruta]
+
+
+def cerrar_escritores():
+    for escritor in _escritores.values():
+        escritor.cerrar()
+    _escritores.clear()
+
+
+def _terminar_por_senal(signum, frame):
+    # SIGTERM (con el que Railway para el worker en cada despliegue) no
+    # ejecuta atexit: se convierte en SystemExit para que cerrar_escritores
+    # vacíe los búferes de los registros JSONL antes de salir
+    raise SystemExit(128 + signum)
+
+
+def instalar_manejador_senales():
+    signal.signal(signal.SIGTERM, _terminar_por_senal)
+
+
+def archivar_psi(ciclo, config, resultados, psi):
+    """
+    Guarda psi del ciclo en el archivo de snapshots (y, si se ha pedido,
+    también psi a tiempos intermedios). Los psi 2D sólo con
+    CIVILIZACION_SNAPSHOTS_2D=1.
+    """
+    if psi is None:
+        return
+    if resultados.get("modelo", "schrodinger_1d") != "schrodinger_1d" and not SNAPSHOTS_2D:
+        return
+    try:
+        archivo = obtener_archivo_snapshots()
+        if (SNAPSHOTS_INTERMEDIOS > 0
+                and resultados.get("modelo", "schrodinger_1d") == "schrodinger_1d"
+                and resultados.get("motor") != "imaginario"):
+            tiempos, psis = archivo_snapshots.psis_intermedios(config, SNAPSHOTS_INTERMEDIOS)
+            # El último instante es T: se sustituye por el psi renormalizado del núcleo
+            if psis:
+                psis[-1] = psi
+            archivo.anadir_serie(ciclo, psis, tiempos, L=resultados["L"])
+        else:
+            archivo.anadir(ciclo, psi, t=resultados["T"], L=resultados["L"])
+    except Exception as e:
+        # No interrumpe el ciclo, pero la pérdida queda contada en las métricas
+        metricas.REGISTRO.incrementar("snapshots_fallidos")
+        logging.error(f"No se pudo archivar psi del ciclo {ciclo}: {e}")
+
+
 def leer_ultimos_registros(max_lineas=5):
     """
-    Devuelve las últimas 'max_lineas' entradas del archivo de registros
-    como una cadena de texto para dar contexto al Científico.
+    Devuelve las últimas 'max_lineas' entradas del almacén, una por línea
+    en forma compacta (config y cifras clave, ver novedad.resumen_compacto),
+    para dar contexto al Científico.
     """
-    if not os.path.exists(REGISTROS_FILE):
+    try:
+        registros = obtener_almacen().ultimos(max_lineas)
+    except Exception:
         return ""
+    return "\n".join(novedad.linea_compacta(r) for r in registros)
+
 
+def resumen_cobertura():
+    """
+    Una línea con cuántos experimentos hay por tipo de potencial y de
+    estado inicial, para orientar al Científico hacia zonas poco exploradas.
+    """
     try:
-        with open(REGISTROS_FILE, "r", encoding="utf-8") as f:
-            lineas = f.readlines()
+        indice = obtener_indice_novedad()
     except Exception:
         return ""
-
-    if not lineas:
+    if not len(indice):
         return ""
-
-    ultimas = lineas[-max_lineas:]
-    # Evitamos que sea gigante
-    texto = "".join(ultimas)
-    if len(texto) > 4000:
-        texto = texto[-4000:]
-    return texto
+    partes = []
+    for clave in ("potencial", "estado_inicial"):
+        tipos = ", ".join(f"{tipo} x{n}" for tipo, n in indice.cobertura(clave))
+        partes.append(f"{clave}: {tipos}")
+    return f"{len(indice)} experimentos; " + "; ".join(partes)
 
 
 def extraer_json_de_texto(texto):
@@ -73,6 +286,7 @@ def extraer_json_de_texto(texto):
     except Exception:
         pass
 
+    metricas.REGISTRO.incrementar("extraer_json_reintentos")
     inicio = texto.find("{")
     fin = texto.rfind("}")
     if inicio != -1 and fin != -1 and fin > inicio:
@@ -84,13 +298,42 @@ def extraer_json_de_texto(texto):
     return None
 
 
+def extraer_lista_json_de_texto(texto):
+    """
+    Intenta extraer una lista de objetos JSON de una respuesta de texto.
+    Un único objeto se devuelve como lista de un elemento.
+    """
+    datos = None
+    try:
+        datos = json.loads(texto)
+    except Exception:
+        inicio = texto.find("[")
+        fin = texto.rfind("]")
+        if inicio != -1 and fin != -1 and fin > inicio:
+            try:
+                datos = json.loads(texto[inicio:fin + 1])
+            except Exception:
+                datos = None
+        if datos is None:
+            datos = extraer_json_de_texto(texto)
+
+    if isinstance(datos, dict):
+        return [datos]
+    if isinstance(datos, list):
+        return [d for d in datos if isinstance(d, dict)]
+    return []
+
+
 def guardar_registro_completo(registro):
     """
-    Guarda un registro completo (config + resultados + evaluación) en JSONL.
+    Guarda un registro completo (config + resultados + evaluación) en JSONL
+    y en el almacén indexado. El JSONL se vacía a disco por lotes; el
+    almacén es la fuente inmediata para las consultas.
     """
     try:
-        with open(REGISTROS_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        with metricas.REGISTRO.medir("escritura_registros"):
+            obtener_escritor(REGISTROS_FILE).escribir(registro)
+            obtener_almacen().guardar(registro)
         logging.info("Registro de experimento guardado.")
     except Exception as e:
         logging.error(f"No se pudo guardar el registro del experimento: {e}")
@@ -99,171 +342,358 @@ def guardar_registro_completo(registro):
 def guardar_descubrimiento(registro):
     """
     Guarda un registro marcado como descubrimiento en un archivo aparte.
+    En el almacén ya queda marcado por guardar_registro_completo
+    (evaluacion.es_descubrimiento), consultable con
+    obtener_almacen().consultar(solo_descubrimientos=True).
     """
     try:
-        with open(DESCUBRIMIENTOS_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        with metricas.REGISTRO.medir("escritura_descubrimientos"):
+            obtener_escritor(DESCUBRIMIENTOS_FILE).escribir(registro)
         logging.info("🚨 DESCUBRIMIENTO CUÁNTICO REGISTRADO 🚨")
     except Exception as e:
         logging.error(f"No se pudo guardar el descubrimiento: {e}")
 
 
+def exportar_metricas():
+    """
+    Vuelca las métricas por etapa a METRICAS_PROM_FILE (formato texto de
+    Prometheus) y METRICAS_JSON_FILE.
+    """
+    try:
+        metricas.REGISTRO.exportar(METRICAS_PROM_FILE, METRICAS_JSON_FILE)
+    except Exception as e:
+        logging.error(f"No se pudieron exportar las métricas: {e}")
+
+
 # ==========================
-# Bucle principal de la civilización
+# Agentes
 # ==========================
 
-def simular_ciclo_de_investigacion():
-    ciclo = 0
-    asegurar_directorios()
+SYSTEM_MESSAGE_CIENTIFICO = (
+    "Eres el científico principal de un LABORATORIO CUÁNTICO 1D serio. "
+    "Tu trabajo NO es escribir código, sino diseñar EXPERIMENTOS BIEN DEFINIDOS "
+    "en mecánica cuántica 1D que luego serán simulados por un núcleo numérico fiable.\n\n"
+    "SIEMPRE debes responder con UN ÚNICO OBJETO JSON VÁLIDO, sin texto extra, "
+    "con el siguiente esquema (ejemplo):\n\n"
+    "{\n"
+    '  "modelo": "schrodinger_1d",\n'
+    '  "L": 20.0,\n'
+    '  "N": 512,\n'
+    '  "T": 5.0,\n'
+    '  "dt": 0.01,\n'
+    '  "potencial": {\n'
+    '    "tipo": "doble_pozo",\n'
+    '    "a": 1.0,\n'
+    '    "b": 5.0\n'
+    "  },\n"
+    '  "estado_inicial": {\n'
+    '    "tipo": "gauss_momentum",\n'
+    '    "x0": -4.0,\n'
+    '    "sigma": 0.7,\n'
+    '    "k0": 2.0\n'
+    "  },\n"
+    '  "metrica": {\n'
+    '    "tipo": "prob_region",\n'
+    '    "x_min": 0.0,\n'
+    '    "x_max": 5.0\n'
+    "  }\n"
+    "}\n\n"
+    "CONDICIONES:\n"
+    "- Usa normalmente \"modelo\": \"schrodinger_1d\". También existe \"schrodinger_2d\" (rejilla N x N,\n"
+    "  potenciales libre/pozo/barrera/doble_rendija/armonic, estados gauss/gauss_momentum con x0, y0, kx, ky\n"
+    "  y prob_region con x_min, x_max, y_min, y_max); en 2D usa N <= 512.\n"
+    "- Elige L en el rango [10, 40].\n"
+    "- Elige N en el rango [128, 1024].\n"
+    "- Elige T en el rango [0.5, 10.0].\n"
+    "- Elige dt en el rango [0.001, 0.05].\n"
+    "- Opcional: \"motor\": \"espectral\" evoluciona exactamente en la base de autoestados;\n"
+    "  entonces T puede llegar hasta 10000 y dt no se usa.\n"
+    "- Opcional: \"absorcion\": {\"anchura\": 2.0, \"intensidad\": 5.0} añade capas absorbentes en\n"
+    "  los bordes (sólo split_step): lo que sale del dominio no vuelve a entrar y se informa\n"
+    "  como prob_absorbida; así basta un L pequeño para dispersión y efecto túnel. La región\n"
+    "  de la métrica debe quedar fuera de las capas.\n"
+    "- Opcional: \"resolucion\": \"auto\" (o {\"tolerancia\": 1e-3}) deja que el núcleo elija el N y el dt\n"
+    "  más baratos que alcanzan esa precisión en prob_region; N y dt se ignoran.\n"
+    "- Opcional: \"integrador\": \"yoshida4\" o \"yoshida6\" (orden 4 o 6) cuesta 3 o 7 veces más\n"
+    "  FFTs por paso, pero en potenciales suaves (armónico, doble pozo) admite dt mayores (hasta\n"
+    "  0.2 y 0.4) y, a igual error, necesita bastantes menos FFTs que el integrador por defecto;\n"
+    "  con saltos (barrera, pozo) dt sigue limitado a 0.05 y no mejora.\n"
+    "- Opcional: \"motor\": \"imaginario\" con \"n_estados\": 1-8 no evoluciona en el tiempo: calcula las\n"
+    "  energías y autoestados más bajos del potencial (prob_region es la del estado fundamental).\n\n"
+    "POTENCIALES SOPORTADOS (potencial.tipo):\n"
+    "- \"libre\": V(x) = 0.\n"
+    "- \"pozo\": V = 0 en [x_min, x_max], V = V_out fuera. Claves: x_min, x_max, V_out.\n"
+    "- \"barrera\": V = V0 en [x_min, x_max], 0 fuera. Claves: x_min, x_max, V0.\n"
+    "- \"armonic\": V = 0.5 * k * (x - x0)^2. Claves: k, x0.\n"
+    "- \"doble_pozo\": V = a * x^4 - b * x^2. Claves: a, b.\n"
+    "- \"expresion\": V(x) libre, p. ej. {\"tipo\": \"expresion\", \"expresion\": \"V0*exp(-(x-x0)**2/w**2) + a*x**4\",\n"
+    "  \"V0\": 3.0, \"x0\": 0.0, \"w\": 1.0, \"a\": 0.01}. Sólo + - * / **, números, parámetros, pi, e y las\n"
+    "  funciones exp, log, sqrt, sin, cos, tan, sinh, cosh, tanh, arctan, abs, sign, escalon(x),\n"
+    "  caja(x, a, b). Debe ser real.\n\n"
+    "ESTADOS INICIALES SOPORTADOS (estado_inicial.tipo):\n"
+    "- \"gauss\": gaussiana sin momento. Claves: x0, sigma.\n"
+    "- \"gauss_momentum\": gaussiana con momento inicial. Claves: x0, sigma, k0.\n"
+    "- \"superposicion\": suma de dos gaussianas. Claves: x1, x2, sigma.\n"
+    "- \"expresion\": psi(x) libre con la misma sintaxis (puede usar 1j), p. ej.\n"
+    "  \"exp(-(x-x0)**2/(2*s**2))*exp(1j*k0*x)\"; el núcleo la normaliza.\n"
+    "- \"ground_state\": estado fundamental del potencial (o del indicado en su propia clave\n"
+    "  \"potencial\", p. ej. para soltar el fundamental de una trampa armónica en otro potencial).\n"
+    "- \"autoestado\": n-ésimo autoestado (clave n, 0 = fundamental; hasta 7), mismas reglas.\n\n"
+    "MÉTRICA (metrica.tipo):\n"
+    "- Usa siempre \"prob_region\" con x_min y x_max. La métrica de control será literalmente\n"
+    "  la probabilidad total en esa región (entre 0 y 1). No inventes otros tipos ahora.\n\n"
+    "Tu objetivo como científico no es trivializar la métrica (no la coloques siempre donde\n"
+    "ya sabes que la partícula estará), sino proponer configuraciones interesantes que exploren\n"
+    "túnel, localización, interferencias, captura en pozos, etc., IDEALMENTE mejorando o\n"
+    "contrastando experimentos anteriores.\n"
+)
 
-    while True:
-        ciclo += 1
-        logging.info(
-            f"\n=== INICIO DEL CICLO {ciclo} (Laboratorio Cuántico 1D serio) ==="
-        )
+SYSTEM_MESSAGE_ARCHIVISTA = (
+    "Eres el Archivista científico de un LABORATORIO CUÁNTICO 1D serio.\n"
+    "Recibes la configuración exacta de un experimento (JSON) y los "
+    "resultados numéricos (JSON) y debes:\n"
+    "- Resumir qué se ha hecho y qué se ha observado.\n"
+    "- Valorar la relevancia científica del experimento.\n"
+    "- Decidir si constituye un 'descubrimiento' dentro de este laboratorio.\n\n"
+    "Debes devolver SIEMPRE un ÚNICO OBJETO JSON con esta estructura:\n"
+    "{\n"
+    '  "ciclo": <int>,\n'
+    '  "descripcion_experimento": "...",\n'
+    '  "resultado_principal": "...",\n'
+    '  "metrica_relevancia": 0.0,\n'
+    '  "es_interesante": false,\n'
+    '  "es_descubrimiento": false,\n'
+    '  "motivo_descubrimiento": ""\n'
+    "}\n\n"
+    "Criterios de relevancia:\n"
+    "- metrica_relevancia en [0, 1].\n"
+    "- Considera más relevante si:\n"
+    "  * La probabilidad en la región objetivo es alta pero no trivial (no siempre 1.0 sin motivo).\n"
+    "  * El experimento explora un régimen diferente a los anteriores (por potencial, estado inicial, etc.).\n"
+    "  * Aparecen patrones o comportamientos no obvios (túnel parcial, oscilaciones, etc.).\n"
+    "- Marca es_descubrimiento = true solo si:\n"
+    "  * La configuración y la métrica sugieren un comportamiento especialmente interesante\n"
+    "    o mejoran claramente experimentos previos.\n"
+)
 
-        try:
-            # ---------- 1. CIENTÍFICO: PROPONE CONFIGURACIÓN ----------
-            cientifico = autogen.AssistantAgent(
-                name="Cientifico_Cuantico",
-                system_message=(
-                    "Eres el científico principal de un LABORATORIO CUÁNTICO 1D serio. "
-                    "Tu trabajo NO es escribir código, sino diseñar EXPERIMENTOS BIEN DEFINIDOS "
-                    "en mecánica cuántica 1D que luego serán simulados por un núcleo numérico fiable.\n\n"
-                    "SIEMPRE debes responder con UN ÚNICO OBJETO JSON VÁLIDO, sin texto extra, "
-                    "con el siguiente esquema (ejemplo):\n\n"
-                    "{\n"
-                    '  "modelo": "schrodinger_1d",\n'
-                    '  "L": 20.0,\n'
-                    '  "N": 512,\n'
-                    '  "T": 5.0,\n'
-                    '  "dt": 0.01,\n'
-                    '  "potencial": {\n'
-                    '    "tipo": "doble_pozo",\n'
-                    '    "a": 1.0,\n'
-                    '    "b": 5.0\n'
-                    "  },\n"
-                    '  "estado_inicial": {\n'
-                    '    "tipo": "gauss_momentum",\n'
-                    '    "x0": -4.0,\n'
-                    '    "sigma": 0.7,\n'
-                    '    "k0": 2.0\n'
-                    "  },\n"
-                    '  "metrica": {\n'
-                    '    "tipo": "prob_region",\n'
-                    '    "x_min": 0.0,\n'
-                    '    "x_max": 5.0\n'
-                    "  }\n"
-                    "}\n\n"
-                    "CONDICIONES:\n"
-                    "- Usa SIEMPRE \"modelo\": \"schrodinger_1d\" (de momento solo está implementado ese).\n"
-                    "- Elige L en el rango [10, 40].\n"
-                    "- Elige N en el rango [128, 1024].\n"
-                    "- Elige T en el rango [0.5, 10.0].\n"
-                    "- Elige dt en el rango [0.001, 0.05].\n\n"
-                    "POTENCIALES SOPORTADOS (potencial.tipo):\n"
-                    "- \"libre\": V(x) = 0.\n"
-                    "- \"pozo\": V = 0 en [x_min, x_max], V = V_out fuera. Claves: x_min, x_max, V_out.\n"
-                    "- \"barrera\": V = V0 en [x_min, x_max], 0 fuera. Claves: x_min, x_max, V0.\n"
-                    "- \"armonic\": V = 0.5 * k * (x - x0)^2. Claves: k, x0.\n"
-                    "- \"doble_pozo\": V = a * x^4 - b * x^2. Claves: a, b.\n\n"
-                    "ESTADOS INICIALES SOPORTADOS (estado_inicial.tipo):\n"
-                    "- \"gauss\": gaussiana sin momento. Claves: x0, sigma.\n"
-                    "- \"gauss_momentum\": gaussiana con momento inicial. Claves: x0, sigma, k0.\n"
-                    "- \"superposicion\": suma de dos gaussianas. Claves: x1, x2, sigma.\n\n"
-                    "MÉTRICA (metrica.tipo):\n"
-                    "- Usa siempre \"prob_region\" con x_min y x_max. La métrica de control será literalmente\n"
-                    "  la probabilidad total en esa región (entre 0 y 1). No inventes otros tipos ahora.\n\n"
-                    "Tu objetivo como científico no es trivializar la métrica (no la coloques siempre donde\n"
-                    "ya sabes que la partícula estará), sino proponer configuraciones interesantes que exploren\n"
-                    "túnel, localización, interferencias, captura en pozos, etc., IDEALMENTE mejorando o\n"
-                    "contrastando experimentos anteriores.\n"
-                ),
-                llm_config=llm_config,
-            )
 
-            ultimos = leer_ultimos_registros(max_lineas=5)
-            contexto_previos = (
-                ultimos if ultimos.strip() else "No hay experimentos previos registrados."
-            )
+SYSTEM_MESSAGE_LOTE_CIENTIFICO = (
+    "\nMODO LOTE: cuando el mensaje indique NUM_EXPERIMENTOS: K, responde con UN ÚNICO\n"
+    "ARRAY JSON de exactamente K objetos de configuración (cada uno con el esquema anterior),\n"
+    "sin texto extra. Procura que los K experimentos sean distintos entre sí.\n"
+)
+
+SYSTEM_MESSAGE_LOTE_ARCHIVISTA = (
+    "\nMODO LOTE: cuando el mensaje incluya varios experimentos (línea CICLOS: ...),\n"
+    "responde con UN ÚNICO ARRAY JSON con un objeto de evaluación por experimento,\n"
+    "cada uno con su \"ciclo\" correspondiente.\n"
+)
+
+
+def crear_cientifico():
+    return agentes.crear_agente(
+        "Cientifico_Cuantico",
+        SYSTEM_MESSAGE_CIENTIFICO + SYSTEM_MESSAGE_LOTE_CIENTIFICO,
+        llm_config,
+        backend=LLM_BACKEND,
+    )
+
 
-            mensaje_cientifico = f"""
-Vas a diseñar el experimento del ciclo {ciclo}.
+def crear_archivista():
+    return agentes.crear_agente(
+        "Archivista",
+        SYSTEM_MESSAGE_ARCHIVISTA + SYSTEM_MESSAGE_LOTE_ARCHIVISTA,
+        llm_config,
+        backend=LLM_BACKEND,
+    )
 
-Resúmenes recientes de experimentos (config + resultados + evaluación archivista),
-en formato JSONL (cada línea un JSON):
+
+def obtener_agente(rol):
+    """
+    Devuelve el agente del rol ("cientifico" o "archivista"), creándolo
+    sólo la primera vez: los agentes se reutilizan entre ciclos.
+    """
+    with _agentes_lock:
+        if rol not in _agentes:
+            _agentes[rol] = crear_cientifico() if rol == "cientifico" else crear_archivista()
+        return _agentes[rol]
+
+
+def contenido_de_respuesta(respuesta):
+    if isinstance(respuesta, dict):
+        contenido = respuesta.get("content", "")
+        if not isinstance(contenido, str):
+            contenido = str(contenido)
+        return contenido
+    return str(respuesta)
+
+
+# ==========================
+# Etapas de un ciclo
+# ==========================
+
+def mensaje_para_cientifico(ciclo, k=1):
+    ultimos = leer_ultimos_registros(max_lineas=5)
+    contexto_previos = (
+        ultimos if ultimos.strip() else "No hay experimentos previos registrados."
+    )
+    cobertura = resumen_cobertura()
+    cobertura = f"\nCobertura del histórico: {cobertura}\n" if cobertura else ""
+
+    if k <= 1:
+        encargo = f"Vas a diseñar el experimento del ciclo {ciclo}."
+        formato = (
+            "Debes devolver SOLO un JSON (sin texto adicional) con la configuración del nuevo experimento\n"
+            "siguiendo el esquema indicado en tu mensaje del sistema."
+        )
+    else:
+        encargo = (
+            f"Vas a diseñar los experimentos de los ciclos {ciclo} a {ciclo + k - 1}.\n"
+            f"NUM_EXPERIMENTOS: {k}"
+        )
+        formato = (
+            f"Debes devolver SOLO un ARRAY JSON (sin texto adicional) con {k} configuraciones\n"
+            "siguiendo el esquema indicado en tu mensaje del sistema."
+        )
+
+    return f"""
+{encargo}
+{cobertura}
+Resúmenes recientes de experimentos (config + prob_region + valoración del archivista),
+uno por línea en JSON compacto:
 {contexto_previos}
 
-Debes devolver SOLO un JSON (sin texto adicional) con la configuración del nuevo experimento
-siguiendo el esquema indicado en tu mensaje del sistema.
+{formato}
 """.strip()
 
-            respuesta_cientifico = cientifico.generate_reply(
-                messages=[{"role": "user", "content": mensaje_cientifico}]
-            )
 
-            if isinstance(respuesta_cientifico, dict):
-                contenido_cientifico = respuesta_cientifico.get("content", "")
-                if not isinstance(contenido_cientifico, str):
-                    contenido_cientifico = str(contenido_cientifico)
-            else:
-                contenido_cientifico = str(respuesta_cientifico)
+def pedir_config(ciclo, mensaje_cientifico):
+    """
+    1. CIENTÍFICO: propone la configuración del experimento.
+    """
+    cientifico = obtener_agente("cientifico")
+    with metricas.REGISTRO.medir("cientifico_llm"):
+        respuesta_cientifico = cientifico.generate_reply(
+            messages=[{"role": "user", "content": mensaje_cientifico}]
+        )
+    contenido_cientifico = contenido_de_respuesta(respuesta_cientifico)
 
-            config = extraer_json_de_texto(contenido_cientifico)
-            if not isinstance(config, dict):
-                logging.error("No se pudo extraer un JSON de configuración válido del Científico.")
-                logging.error(f"Respuesta bruta: {contenido_cientifico}")
-                raise ValueError("Configuración inválida")
+    with metricas.REGISTRO.medir("extraer_json"):
+        config = extraer_json_de_texto(contenido_cientifico)
+    if not isinstance(config, dict):
+        logging.error("No se pudo extraer un JSON de configuración válido del Científico.")
+        logging.error(f"Respuesta bruta: {contenido_cientifico}")
+        raise ValueError("Configuración inválida")
 
-            logging.info(f"Config experimento ciclo {ciclo}: {config}")
+    logging.info(f"Config experimento ciclo {ciclo}: {config}")
+    return config
 
-            # ---------- 2. NÚCLEO FÍSICO: EJECUTA EL EXPERIMENTO ----------
-            try:
-                resultados, x, psi = quantum_core.run_schrodinger_1d(config)
-            except Exception as e:
-                logging.error(f"Error al ejecutar el núcleo cuántico: {e}")
-                raise
 
-            logging.info(
-                f"Resultados experimento ciclo {ciclo}: "
-                f"prob_region={resultados.get('prob_region'):.6f}, "
-                f"prob_total={resultados.get('prob_total'):.6f}"
-            )
+def aviso_repeticion(config, vecinos, umbral):
+    """
+    Texto que se añade al mensaje del Científico cuando su propuesta es casi
+    idéntica a experimentos previos: la propuesta y sus vecinos más cercanos.
+    """
+    lineas = "\n".join(
+        json.dumps(dict(resumen, distancia=round(d, 3)), ensure_ascii=False, separators=(",", ":"))
+        for d, resumen in vecinos
+    )
+    return (
+        f"Tu propuesta {json.dumps(config, ensure_ascii=False, separators=(',', ':'))}\n"
+        f"es casi idéntica a experimentos ya realizados (distancia < {umbral}). Los más parecidos:\n"
+        f"{lineas}\n"
+        "Propón una configuración claramente distinta (otro potencial o estado inicial, "
+        "otro régimen de parámetros u otra métrica)."
+    )
 
-            # ---------- 3. ARCHIVISTA: EVALÚA Y MARCA DESCUBRIMIENTOS ----------
-            archivista = autogen.AssistantAgent(
-                name="Archivista",
-                system_message=(
-                    "Eres el Archivista científico de un LABORATORIO CUÁNTICO 1D serio.\n"
-                    "Recibes la configuración exacta de un experimento (JSON) y los "
-                    "resultados numéricos (JSON) y debes:\n"
-                    "- Resumir qué se ha hecho y qué se ha observado.\n"
-                    "- Valorar la relevancia científica del experimento.\n"
-                    "- Decidir si constituye un 'descubrimiento' dentro de este laboratorio.\n\n"
-                    "Debes devolver SIEMPRE un ÚNICO OBJETO JSON con esta estructura:\n"
-                    "{\n"
-                    '  "ciclo": <int>,\n'
-                    '  "descripcion_experimento": "...",\n'
-                    '  "resultado_principal": "...",\n'
-                    '  "metrica_relevancia": 0.0,\n'
-                    '  "es_interesante": false,\n'
-                    '  "es_descubrimiento": false,\n'
-                    '  "motivo_descubrimiento": ""\n'
-                    "}\n\n"
-                    "Criterios de relevancia:\n"
-                    "- metrica_relevancia en [0, 1].\n"
-                    "- Considera más relevante si:\n"
-                    "  * La probabilidad en la región objetivo es alta pero no trivial (no siempre 1.0 sin motivo).\n"
-                    "  * El experimento explora un régimen diferente a los anteriores (por potencial, estado inicial, etc.).\n"
-                    "  * Aparecen patrones o comportamientos no obvios (túnel parcial, oscilaciones, etc.).\n"
-                    "- Marca es_descubrimiento = true solo si:\n"
-                    "  * La configuración y la métrica sugieren un comportamiento especialmente interesante\n"
-                    "    o mejoran claramente experimentos previos.\n"
-                ),
-                llm_config=llm_config,
-            )
 
-            resumen_prompt = f"""
+def pedir_config_novedosa(ciclo, mensaje_cientifico, antes_de_llamar=None):
+    """
+    1. CIENTÍFICO con filtro de novedad: si la propuesta es casi idéntica a
+    un experimento ya hecho se le vuelve a pedir, mostrándole los más
+    parecidos, hasta NOVEDAD_REINTENTOS veces. Si sigue repitiéndose, el
+    ciclo se descarta sin simular ni evaluar.
+
+    'antes_de_llamar' (opcional) se ejecuta antes de cada llamada al LLM,
+    reintentos incluidos (p. ej. para esperar turno en el limitador).
+    """
+    indice = obtener_indice_novedad()
+    mensaje = mensaje_cientifico
+    for _ in range(NOVEDAD_REINTENTOS + 1):
+        if antes_de_llamar is not None:
+            antes_de_llamar()
+        config = pedir_config(ciclo, mensaje)
+        with metricas.REGISTRO.medir("novedad"):
+            vecinos = indice.vecinos(config, NOVEDAD_VECINOS)
+        if not vecinos or vecinos[0][0] >= indice.umbral:
+            return config
+        metricas.REGISTRO.incrementar("propuestas_repetidas")
+        logging.info(
+            f"Propuesta del ciclo {ciclo} casi idéntica a la del ciclo "
+            f"{vecinos[0][1].get('ciclo')} (distancia {vecinos[0][0]:.3f}); se pide otra."
+        )
+        mensaje = mensaje_cientifico + "\n\n" + aviso_repeticion(config, vecinos, indice.umbral)
+    raise ValueError(f"Propuesta repetida tras {NOVEDAD_REINTENTOS} reintentos")
+
+
+def filtrar_repetidas(configs):
+    """
+    Modo lote: descarta las configs casi idénticas a experimentos previos
+    y las repetidas dentro del propio lote (misma forma canónica). No se
+    vuelve a preguntar para no gastar otra llamada por ronda.
+    """
+    indice = obtener_indice_novedad()
+    nuevas, claves = [], set()
+    for config in configs:
+        try:
+            clave = cache_resultados.clave_config(config)
+        except Exception:
+            clave = None  # inválida: el núcleo dará el error
+        with metricas.REGISTRO.medir("novedad"):
+            repetida = (clave is not None and clave in claves) or indice.es_repetida(config)
+        if repetida:
+            metricas.REGISTRO.incrementar("propuestas_repetidas")
+            logging.info(f"Config descartada por repetida: {config}")
+            continue
+        claves.add(clave)
+        nuevas.append(config)
+    return nuevas
+
+
+def log_resultados(ciclo, resultados, cache):
+    # Tiempos por fase del núcleo (sólo si se ha simulado de verdad)
+    if resultados.get("desde_cache"):
+        metricas.REGISTRO.incrementar("cache_aciertos")
+    else:
+        metricas.REGISTRO.incrementar("cache_fallos")
+        for fase in ("build", "evolve", "measure"):
+            segundos = (resultados.get("timing") or {}).get(f"{fase}_s")
+            if segundos is not None:
+                metricas.REGISTRO.observar(f"fisica_{fase}", segundos)
+
+    logging.info(
+        f"Resultados experimento ciclo {ciclo}: "
+        f"prob_region={resultados.get('prob_region'):.6f}, "
+        f"prob_total={resultados.get('prob_total'):.6f}"
+    )
+    logging.info(f"Caché de resultados: {cache.resumen()}")
+    resolucion = resultados.get("resolucion") or {}
+    if resolucion.get("cumple") is False:
+        metricas.REGISTRO.incrementar("resolucion_sin_converger")
+        logging.warning(
+            f"Ciclo {ciclo}: la resolución automática no alcanzó la tolerancia "
+            f"{resolucion.get('tolerancia')} ({resolucion.get('motivo')}); "
+            f"se usa N={resolucion.get('N')}, dt={resolucion.get('dt')}."
+        )
+
+
+def evaluar_experimento(ciclo, config, resultados):
+    """
+    3. ARCHIVISTA: evalúa el experimento y marca descubrimientos.
+    """
+    archivista = obtener_agente("archivista")
+
+    resumen_prompt = f"""
 Config del experimento (JSON):
 {json.dumps(config, ensure_ascii=False, indent=2)}
 
@@ -275,58 +705,590 @@ Ciclo: {ciclo}
 Genera el JSON de evaluación siguiendo la estructura indicada en tu mensaje del sistema.
 """.strip()
 
-            respuesta_archivista = archivista.generate_reply(
-                messages=[{"role": "user", "content": resumen_prompt}]
-            )
+    with metricas.REGISTRO.medir("archivista_llm"):
+        respuesta_archivista = archivista.generate_reply(
+            messages=[{"role": "user", "content": resumen_prompt}]
+        )
+    contenido_archivista = contenido_de_respuesta(respuesta_archivista)
 
-            if isinstance(respuesta_archivista, dict):
-                contenido_archivista = respuesta_archivista.get("content", "")
-                if not isinstance(contenido_archivista, str):
-                    contenido_archivista = str(contenido_archivista)
-            else:
-                contenido_archivista = str(respuesta_archivista)
+    with metricas.REGISTRO.medir("extraer_json"):
+        evaluacion = extraer_json_de_texto(contenido_archivista)
+    if not isinstance(evaluacion, dict):
+        logging.warning(
+            "El Archivista no devolvió un JSON de evaluación válido. "
+            "Contenido bruto:"
+        )
+        logging.warning(contenido_archivista)
+        evaluacion = evaluacion_no_disponible(ciclo)
+    else:
+        evaluacion["ciclo"] = ciclo
+    return evaluacion
 
-            evaluacion = extraer_json_de_texto(contenido_archivista)
-            if not isinstance(evaluacion, dict):
-                logging.warning(
-                    "El Archivista no devolvió un JSON de evaluación válido. "
-                    "Contenido bruto:"
-                )
-                logging.warning(contenido_archivista)
-                evaluacion = {
-                    "ciclo": ciclo,
-                    "descripcion_experimento": "Evaluación no disponible",
-                    "resultado_principal": "",
-                    "metrica_relevancia": 0.0,
-                    "es_interesante": False,
-                    "es_descubrimiento": False,
-                    "motivo_descubrimiento": "",
-                }
-            else:
-                evaluacion["ciclo"] = ciclo
 
-            registro_completo = {
-                "ciclo": ciclo,
-                "config": config,
-                "resultados": resultados,
-                "evaluacion": evaluacion,
-            }
+def evaluacion_no_disponible(ciclo):
+    return {
+        "ciclo": ciclo,
+        "descripcion_experimento": "Evaluación no disponible",
+        "resultado_principal": "",
+        "metrica_relevancia": 0.0,
+        "es_interesante": False,
+        "es_descubrimiento": False,
+        "motivo_descubrimiento": "",
+    }
 
-            guardar_registro_completo(registro_completo)
 
-            if evaluacion.get("es_descubrimiento"):
-                guardar_descubrimiento(registro_completo)
-                logging.info(
-                    f"Descubrimiento ciclo {ciclo}: {evaluacion.get('descripcion_experimento')}"
-                )
+def pedir_configs_lote(ciclo_inicial, k):
+    """
+    1. CIENTÍFICO (modo lote): una sola llamada devuelve hasta k configuraciones.
+    """
+    mensaje = mensaje_para_cientifico(ciclo_inicial, k)
+    with metricas.REGISTRO.medir("cientifico_llm"):
+        respuesta = obtener_agente("cientifico").generate_reply(
+            messages=[{"role": "user", "content": mensaje}]
+        )
+    contenido = contenido_de_respuesta(respuesta)
+
+    with metricas.REGISTRO.medir("extraer_json"):
+        configs = extraer_lista_json_de_texto(contenido)[:k]
+    if not configs:
+        logging.error("No se pudo extraer ninguna configuración válida del Científico.")
+        logging.error(f"Respuesta bruta: {contenido}")
+        raise ValueError("Configuración inválida")
+    return configs
+
+
+def evaluar_lote(ciclos, configs, resultados_lote):
+    """
+    3. ARCHIVISTA (modo lote): evalúa todos los experimentos en una llamada.
+    Devuelve una evaluación por ciclo, en el mismo orden.
+    """
+    experimentos = [
+        {"ciclo": c, "config": cfg, "resultados": res}
+        for c, cfg, res in zip(ciclos, configs, resultados_lote)
+    ]
+    mensaje = f"""
+Experimentos a evaluar (JSON, uno por ciclo):
+{json.dumps(experimentos, ensure_ascii=False, indent=2)}
+
+CICLOS: {", ".join(str(c) for c in ciclos)}
+
+Genera un ARRAY JSON con una evaluación por experimento siguiendo la estructura
+indicada en tu mensaje del sistema.
+""".strip()
+
+    with metricas.REGISTRO.medir("archivista_llm"):
+        respuesta = obtener_agente("archivista").generate_reply(
+            messages=[{"role": "user", "content": mensaje}]
+        )
+    contenido = contenido_de_respuesta(respuesta)
+
+    with metricas.REGISTRO.medir("extraer_json"):
+        evaluaciones_llm = extraer_lista_json_de_texto(contenido)
+
+    por_ciclo = {}
+    for evaluacion in evaluaciones_llm:
+        try:
+            por_ciclo[int(evaluacion.get("ciclo"))] = evaluacion
+        except (TypeError, ValueError):
+            continue
+
+    evaluaciones = []
+    for c in ciclos:
+        evaluacion = por_ciclo.get(c)
+        if evaluacion is None:
+            logging.warning(f"El Archivista no devolvió evaluación para el ciclo {c}.")
+            evaluacion = evaluacion_no_disponible(c)
+        evaluaciones.append(evaluacion)
+    return evaluaciones
+
+
+def registrar_ciclo(ciclo, config, resultados, evaluacion, psi=None):
+    archivar_psi(ciclo, config, resultados, psi)
+
+    registro_completo = {
+        "ciclo": ciclo,
+        "config": config,
+        "resultados": resultados,
+        "evaluacion": evaluacion,
+    }
+
+    guardar_registro_completo(registro_completo)
+    try:
+        refrescar_indice_novedad()
+    except Exception as e:
+        logging.error(f"No se pudo añadir el ciclo {ciclo} al índice de novedad: {e}")
+
+    if evaluacion.get("es_descubrimiento"):
+        guardar_descubrimiento(registro_completo)
+        logging.info(
+            f"Descubrimiento ciclo {ciclo}: {evaluacion.get('descripcion_experimento')}"
+        )
+
+
+# ==========================
+# Bucle principal de la civilización
+# ==========================
+
+def simular_ciclo_de_investigacion():
+    asegurar_directorios()
+    # Continuar la numeración de ciclos entre reinicios
+    ciclo = obtener_almacen().ultimo_ciclo()
+    obtener_indice_novedad()
+    cache = cache_resultados.CacheResultados()
+    obtener_agente("cientifico")
+    obtener_agente("archivista")
+
+    while True:
+        if TAMANO_LOTE > 1:
+            with metricas.REGISTRO.medir("ronda_total"):
+                ciclo = ronda_en_lote(ciclo, TAMANO_LOTE, cache)
+            exportar_metricas()
+            logging.info(f"Descansando {CICLO_DELAY_SECONDS} segundos antes de la siguiente ronda...")
+            time.sleep(CICLO_DELAY_SECONDS)
+            continue
+
+        ciclo += 1
+        logging.info(
+            f"\n=== INICIO DEL CICLO {ciclo} (Laboratorio Cuántico 1D serio) ==="
+        )
+
+        inicio_ciclo = time.perf_counter()
+        try:
+            # ---------- 1. CIENTÍFICO: PROPONE CONFIGURACIÓN ----------
+            config = pedir_config_novedosa(ciclo, mensaje_para_cientifico(ciclo))
+
+            # ---------- 2. NÚCLEO FÍSICO: EJECUTA EL EXPERIMENTO ----------
+            try:
+                with metricas.REGISTRO.medir("fisica_total"):
+                    resultados, x, psi = cache_resultados.ejecutar_con_cache(config, cache)
+            except Exception as e:
+                logging.error(f"Error al ejecutar el núcleo cuántico: {e}")
+                raise
+
+            log_resultados(ciclo, resultados, cache)
+
+            # ---------- 3. ARCHIVISTA: EVALÚA Y MARCA DESCUBRIMIENTOS ----------
+            evaluacion = evaluar_experimento(ciclo, config, resultados)
+
+            registrar_ciclo(ciclo, config, resultados, evaluacion, psi)
 
         except Exception as ciclo_error:
+            metricas.REGISTRO.incrementar("ciclos_fallidos")
             logging.error(f"Error crítico en el ciclo {ciclo}: {ciclo_error}")
 
+        metricas.REGISTRO.observar("ciclo_total", time.perf_counter() - inicio_ciclo)
+        exportar_metricas()
+
         logging.info(f"Descansando {CICLO_DELAY_SECONDS} segundos antes del siguiente ciclo...")
         time.sleep(CICLO_DELAY_SECONDS)
 
 
+def ronda_en_lote(ciclo, k, cache):
+    """
+    Una ronda en modo lote: el Científico propone k experimentos en una sola
+    llamada, se simulan juntos y el Archivista los evalúa en otra.
+    Devuelve el último número de ciclo asignado.
+    """
+    logging.info(
+        f"\n=== INICIO DE LA RONDA DE {k} CICLOS desde {ciclo + 1} "
+        "(Laboratorio Cuántico 1D serio) ==="
+    )
+    try:
+        configs = filtrar_repetidas(pedir_configs_lote(ciclo + 1, k))
+    except Exception as ronda_error:
+        logging.error(f"Error crítico en la ronda desde el ciclo {ciclo + 1}: {ronda_error}")
+        return ciclo
+    if not configs:
+        logging.info("Todas las configs de la ronda estaban repetidas.")
+        return ciclo
+
+    ciclos = list(range(ciclo + 1, ciclo + 1 + len(configs)))
+    for c, config in zip(ciclos, configs):
+        logging.info(f"Config experimento ciclo {c}: {config}")
+
+    # Las configs que fallen en el núcleo se descartan de la ronda
+    with metricas.REGISTRO.medir("fisica_total"):
+        salidas = cache_resultados.ejecutar_lote_con_cache(configs, cache)
+
+    validos = []
+    for c, config, salida in zip(ciclos, configs, salidas):
+        if isinstance(salida, Exception):
+            logging.error(f"Error crítico en el ciclo {c}: {salida}")
+            continue
+        resultados, _, psi = salida
+        log_resultados(c, resultados, cache)
+        validos.append((c, config, resultados, psi))
+
+    if validos:
+        try:
+            evaluaciones = evaluar_lote(*list(zip(*validos))[:3])
+        except Exception as e:
+            logging.error(f"Error al evaluar la ronda: {e}")
+            evaluaciones = [evaluacion_no_disponible(v[0]) for v in validos]
+
+        for (c, config, resultados, psi), evaluacion in zip(validos, evaluaciones):
+            evaluacion["ciclo"] = c
+            registrar_ciclo(c, config, resultados, evaluacion, psi)
+
+    return ciclos[-1]
+
+
+# ==========================
+# Modo pipeline (asyncio)
+# ==========================
+
+class LimitadorLLM:
+    """
+    Limita el ritmo de llamadas al LLM: como mucho 'llamadas_por_minuto',
+    espaciadas uniformemente, en lugar de dormir un retardo fijo por ciclo.
+    """
+
+    def __init__(self, llamadas_por_minuto):
+        self.intervalo = 60.0 / llamadas_por_minuto if llamadas_por_minuto > 0 else 0.0
+        self._siguiente = 0.0
+        self._lock = asyncio.Lock()
+
+    async def esperar_turno(self):
+        async with self._lock:
+            ahora = time.monotonic()
+            espera = self._siguiente - ahora
+            self._siguiente = max(ahora, self._siguiente) + self.intervalo
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+async def _ciclo_en_pipeline(ciclo, cache, pool, limitador, anterior_registrado, registrado):
+    """
+    Un ciclo completo en modo pipeline. Las llamadas al LLM corren en hilos
+    y la física en el pool de procesos; el registro espera a que el ciclo
+    anterior se haya registrado, para mantener el orden de los registros.
+    """
+    loop = asyncio.get_running_loop()
+
+    def ejecutar_en_pool(config):
+        return pool.submit(quantum_core.run_experiment, config).result()
+
+    inicio_ciclo = time.perf_counter()
+    try:
+        logging.info(
+            f"\n=== INICIO DEL CICLO {ciclo} (Laboratorio Cuántico 1D serio, pipeline) ==="
+        )
+        # Se construye aquí el contexto: el almacén sólo se usa desde el bucle
+        mensaje = mensaje_para_cientifico(ciclo)
+
+        def esperar_turno():
+            # Desde el hilo: un turno del limitador por cada llamada al LLM
+            asyncio.run_coroutine_threadsafe(limitador.esperar_turno(), loop).result()
+
+        config = await asyncio.to_thread(pedir_config_novedosa, ciclo, mensaje, esperar_turno)
+
+        def fisica():
+            with metricas.REGISTRO.medir("fisica_total"):
+                return cache_resultados.ejecutar_con_cache(
+                    config, cache, ejecutar=ejecutar_en_pool
+                )
+
+        try:
+            resultados, x, psi = await loop.run_in_executor(None, fisica)
+        except Exception as e:
+            logging.error(f"Error al ejecutar el núcleo cuántico: {e}")
+            raise
+
+        log_resultados(ciclo, resultados, cache)
+
+        await limitador.esperar_turno()
+        evaluacion = await asyncio.to_thread(
+            evaluar_experimento, ciclo, config, resultados
+        )
+
+        await anterior_registrado.wait()
+        registrar_ciclo(ciclo, config, resultados, evaluacion, psi)
+
+    except Exception as ciclo_error:
+        metricas.REGISTRO.incrementar("ciclos_fallidos")
+        logging.error(f"Error crítico en el ciclo {ciclo}: {ciclo_error}")
+    finally:
+        await anterior_registrado.wait()
+        registrado.set()
+        metricas.REGISTRO.observar("ciclo_total", time.perf_counter() - inicio_ciclo)
+        exportar_metricas()
+
+
+async def simular_ciclo_de_investigacion_async(en_vuelo=CICLOS_EN_VUELO,
+                                               procesos=PROCESOS_FISICA):
+    """
+    Versión pipeline del bucle principal: mantiene hasta 'en_vuelo' ciclos
+    simultáneos para solapar la latencia del LLM con la simulación.
+
+    Los números de ciclo se asignan en orden al lanzar cada ciclo y los
+    registros se escriben en ese mismo orden.
+    """
+    asegurar_directorios()
+    ciclo = obtener_almacen().ultimo_ciclo()
+    obtener_indice_novedad()
+    cache = cache_resultados.CacheResultados()
+    # Los agentes se crean aquí, antes de que los ciclos los pidan desde
+    # hilos del executor
+    obtener_agente("cientifico")
+    obtener_agente("archivista")
+    limitador = LimitadorLLM(LLM_LLAMADAS_POR_MINUTO)
+    huecos = asyncio.Semaphore(max(1, en_vuelo))
+
+    anterior_registrado = asyncio.Event()
+    anterior_registrado.set()
+
+    async def lanzar(ciclo, anterior, actual):
+        try:
+            await _ciclo_en_pipeline(ciclo, cache, pool, limitador, anterior, actual)
+        finally:
+            huecos.release()
+
+    with ProcessPoolExecutor(max_workers=max(1, procesos)) as pool:
+        tareas = set()
+        while True:
+            await huecos.acquire()
+            ciclo += 1
+            registrado = asyncio.Event()
+            tarea = asyncio.create_task(lanzar(ciclo, anterior_registrado, registrado))
+            tareas.add(tarea)
+            tarea.add_done_callback(tareas.discard)
+            anterior_registrado = registrado
+
+
+# ==========================
+# Modo distribuido (cola de trabajo en SQLite)
+# ==========================
+#
+# Cada proceso ejecuta un rol (CIVILIZACION_ROL) sobre la cola de
+# cola_trabajo, que vive en ALMACEN_FILE y asigna los números de ciclo:
+#   - "proponente": pide configs al Científico y las encola. Además exporta
+#     a los JSONL los registros nuevos del almacén (debe haber uno solo).
+#   - "fisica": reclama lotes de configs y los simula; no usa el LLM. Se
+#     pueden lanzar tantos como núcleos o nodos con acceso al directorio.
+#   - "evaluador": reclama resultados, los evalúa con el Archivista y
+#     registra cada ciclo en el almacén exactamente una vez.
+# psi pasa de los procesos de física a los evaluadores por la caché de
+# resultados, que comparten.
+
+def exportar_registros_jsonl():
+    """
+    Copia a los JSONL los registros escritos en el almacén desde la última
+    exportación. El cursor se guarda después de vaciar los escritores: tras
+    una caída el último lote puede repetirse en el JSONL, pero no perderse
+    (el almacén es la copia de referencia).
+    """
+    cola = obtener_cola()
+    nuevos = obtener_almacen().nuevos(cola.cursor("jsonl"))
+    if not nuevos:
+        return
+    registros = obtener_escritor(REGISTROS_FILE)
+    descubrimientos = obtener_escritor(DESCUBRIMIENTOS_FILE)
+    with metricas.REGISTRO.medir("escritura_registros"):
+        for _, registro in nuevos:
+            registros.escribir(registro)
+            if (registro.get("evaluacion") or {}).get("es_descubrimiento"):
+                descubrimientos.escribir(registro)
+        registros.vaciar()
+        descubrimientos.vaciar()
+    cola.guardar_cursor("jsonl", nuevos[-1][0])
+
+
+def proponente_distribuido():
+    cola = obtener_cola()
+    obtener_indice_novedad()
+    while True:
+        exportar_registros_jsonl()
+        refrescar_indice_novedad()
+        exportar_metricas()
+        if cola.pendientes("fisica") >= COLA_MAX_PENDIENTES:
+            time.sleep(COLA_ESPERA_SEGUNDOS)
+            continue
+
+        # Orientativo (para el prompt y los logs): el ciclo real lo asigna la cola
+        siguiente = cola.ultimo_asignado() + 1
+        try:
+            if TAMANO_LOTE > 1:
+                configs = filtrar_repetidas(pedir_configs_lote(siguiente, TAMANO_LOTE))
+            else:
+                configs = [pedir_config_novedosa(
+                    siguiente, mensaje_para_cientifico(siguiente)
+                )]
+        except Exception as e:
+            metricas.REGISTRO.incrementar("propuestas_fallidas")
+            logging.error(f"No se pudo obtener una propuesta del Científico: {e}")
+            configs = []
+
+        if configs:
+            ciclos = cola.encolar(configs)
+            logging.info(f"Encolados los ciclos {ciclos}. Cola: {cola.resumen()}")
+        logging.info(f"Descansando {CICLO_DELAY_SECONDS} segundos antes de la siguiente propuesta...")
+        time.sleep(CICLO_DELAY_SECONDS)
+
+
+def renovar_leases(cola, propietario, etapa, trabajos):
+    """
+    Prolonga los leases de 'trabajos' y devuelve los que siguen siendo del
+    propietario; los perdidos (caducados y reclamados por otro) se avisan.
+    """
+    vigentes = []
+    for trabajo in trabajos:
+        if cola.renovar(trabajo.ciclo, propietario, etapa):
+            vigentes.append(trabajo)
+        else:
+            metricas.REGISTRO.incrementar("leases_perdidos")
+            logging.warning(f"Lease del ciclo {trabajo.ciclo} perdido: lo hará otro proceso.")
+    return vigentes
+
+
+def fisica_distribuida():
+    cola = obtener_cola()
+    cache = cache_resultados.CacheResultados()
+    propietario = cola_trabajo.identificador("fisica")
+    while True:
+        trabajos = cola.reclamar("fisica", propietario, LOTE_FISICA)
+        if not trabajos:
+            time.sleep(COLA_ESPERA_SEGUNDOS)
+            continue
+
+        def al_avanzar():
+            # Entre simulaciones del lote: que no caduquen los leases de las
+            # que aún esperan
+            for trabajo in trabajos:
+                cola.renovar(trabajo.ciclo, propietario, "fisica")
+
+        with metricas.REGISTRO.medir("fisica_total"):
+            salidas = cache_resultados.ejecutar_lote_con_cache(
+                [t.config for t in trabajos], cache, al_avanzar=al_avanzar
+            )
+        for trabajo, salida in zip(trabajos, salidas):
+            if isinstance(salida, Exception):
+                metricas.REGISTRO.incrementar("ciclos_fallidos")
+                logging.error(f"Error al ejecutar el núcleo cuántico en el ciclo {trabajo.ciclo}: {salida}")
+                cola.fallar(trabajo.ciclo, propietario, "fisica", salida,
+                            definitivo=not isinstance(salida, ERRORES_TRANSITORIOS))
+                continue
+            log_resultados(trabajo.ciclo, salida[0], cache)
+            if not cola.completar_fisica(trabajo.ciclo, propietario, salida[0]):
+                logging.warning(f"Lease del ciclo {trabajo.ciclo} perdido: se descarta su resultado.")
+        exportar_metricas()
+
+
+def registrar_ciclo_distribuido(cola, propietario, trabajo, evaluacion, cache):
+    registro_completo = {
+        "ciclo": trabajo.ciclo,
+        "config": trabajo.config,
+        "resultados": trabajo.resultados,
+        "evaluacion": evaluacion,
+    }
+    try:
+        entrada = cache.obtener(trabajo.config)
+    except Exception as e:
+        logging.warning(f"No se pudo leer psi del ciclo {trabajo.ciclo} de la caché: {e}")
+        entrada = None
+    psi = entrada[1] if entrada is not None else None
+    if psi is None and (
+        trabajo.resultados.get("modelo", "schrodinger_1d") == "schrodinger_1d" or SNAPSHOTS_2D
+    ):
+        # La caché es acotada: psi puede haberse desalojado entre la física y
+        # la evaluación. El registro se guarda igual, sin snapshot
+        metricas.REGISTRO.incrementar("snapshots_sin_psi")
+        logging.warning(
+            f"psi del ciclo {trabajo.ciclo} ya no está en la caché de resultados: "
+            "se registra sin snapshot."
+        )
+
+    # El snapshot se añade dentro de la transacción del registro: así los
+    # evaluadores escriben en el archivo de snapshots de uno en uno (los
+    # ciclos pueden llegar desordenados; el archivo lo admite)
+    with metricas.REGISTRO.medir("escritura_registros"):
+        escrito = cola.registrar(
+            trabajo.ciclo, propietario, registro_completo,
+            antes_de_confirmar=lambda: archivar_psi(
+                trabajo.ciclo, trabajo.config, trabajo.resultados, psi
+            ),
+        )
+    if not escrito:
+        logging.warning(
+            f"Lease del ciclo {trabajo.ciclo} perdido antes de registrarlo: "
+            "lo registrará otro evaluador."
+        )
+        return
+    logging.info(f"Registro del ciclo {trabajo.ciclo} guardado.")
+    if evaluacion.get("es_descubrimiento"):
+        logging.info(
+            f"Descubrimiento ciclo {trabajo.ciclo}: {evaluacion.get('descripcion_experimento')}"
+        )
+
+
+def evaluador_distribuido():
+    cola = obtener_cola()
+    cache = cache_resultados.CacheResultados()
+    propietario = cola_trabajo.identificador("evaluador")
+    while True:
+        trabajos = cola.reclamar("evaluacion", propietario, max(1, TAMANO_LOTE))
+        if not trabajos:
+            time.sleep(COLA_ESPERA_SEGUNDOS)
+            continue
+
+        ciclos = [t.ciclo for t in trabajos]
+        try:
+            if len(trabajos) > 1:
+                evaluaciones = evaluar_lote(
+                    ciclos, [t.config for t in trabajos], [t.resultados for t in trabajos]
+                )
+            else:
+                t = trabajos[0]
+                evaluaciones = [evaluar_experimento(t.ciclo, t.config, t.resultados)]
+        except Exception as e:
+            logging.error(f"Error al evaluar los ciclos {ciclos}: {e}")
+            for trabajo in trabajos:
+                cola.fallar(trabajo.ciclo, propietario, "evaluacion", e)
+            continue
+
+        evaluadas = dict(zip(ciclos, evaluaciones))
+        pendientes = list(trabajos)
+        while pendientes:
+            # La evaluación y cada registro (con su snapshot) pueden tardar:
+            # antes de cada registro se renuevan los leases de los que quedan
+            pendientes = renovar_leases(cola, propietario, "evaluacion", pendientes)
+            if not pendientes:
+                break
+            trabajo = pendientes.pop(0)
+            evaluacion = evaluadas[trabajo.ciclo]
+            evaluacion["ciclo"] = trabajo.ciclo
+            registrar_ciclo_distribuido(cola, propietario, trabajo, evaluacion, cache)
+        exportar_metricas()
+
+
+def ejecutar_rol_distribuido(rol=ROL):
+    global METRICAS_PROM_FILE, METRICAS_JSON_FILE
+    roles = {
+        "proponente": proponente_distribuido,
+        "fisica": fisica_distribuida,
+        "evaluador": evaluador_distribuido,
+    }
+    if rol not in roles:
+        logging.error(f"Rol no soportado: {rol} (usa {', '.join(roles)}).")
+        raise SystemExit(1)
+
+    asegurar_directorios()
+    # Un fichero de métricas por proceso: varios procesos no se pisan
+    sufijo = f"{rol}-{os.getpid()}"
+    METRICAS_PROM_FILE = os.path.join(WORK_DIR, f"metricas-{sufijo}.prom")
+    METRICAS_JSON_FILE = os.path.join(WORK_DIR, f"metricas-{sufijo}.json")
+    logging.info(f"Modo distribuido: {cola_trabajo.identificador(rol)}. Cola: {obtener_cola().resumen()}")
+    roles[rol]()
+
+
 if __name__ == "__main__":
+    instalar_manejador_senales()
+    # Los procesos de física del modo distribuido no llaman al LLM
+    if not (MODO == "distribuido" and ROL == "fisica"):
+        comprobar_api_key()
     logging.info("Arrancando Laboratorio Cuántico IA (núcleo 1D serio)...")
-    simular_ciclo_de_investigacion()
+    if MODO == "pipeline":
+        asyncio.run(simular_ciclo_de_investigacion_async())
+    elif MODO == "distribuido":
+        ejecutar_rol_distribuido()
+    else:
+        simular_ciclo_de_investigacion()
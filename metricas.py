@@ -0,0 +1,125 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import escritura_atomica
+
+# ==========================
+# Métricas por etapa del ciclo (histogramas + contadores)
+# ==========================
+
+# Límites superiores de los buckets, en segundos
+BUCKETS_SEGUNDOS = (
+    0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, math.inf,
+)
+
+
+class Histograma:
+    def __init__(self, buckets=BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self.cuentas = [0] * len(buckets)
+        self.suma = 0.0
+        self.n = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.cuentas[i] += 1
+                break
+        self.suma += valor
+        self.n += 1
+
+    def acumulados(self):
+        total = 0
+        for limite, cuenta in zip(self.buckets, self.cuentas):
+            total += cuenta
+            yield limite, total
+
+
+class RegistroMetricas:
+    """
+    Histogramas de duración por etapa y contadores, exportables como
+    fichero de texto de Prometheus (para node_exporter textfile o similar)
+    o como JSON. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, prefijo="civ_ai"):
+        self.prefijo = prefijo
+        self.histogramas = {}
+        self.contadores = {}
+        self._lock = threading.Lock()
+
+    def observar(self, etapa, segundos):
+        with self._lock:
+            if etapa not in self.histogramas:
+                self.histogramas[etapa] = Histograma()
+            self.histogramas[etapa].observar(float(segundos))
+
+    def incrementar(self, nombre, n=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    @contextmanager
+    def medir(self, etapa):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - t0)
+
+    def texto_prometheus(self):
+        nombre = f"{self.prefijo}_etapa_segundos"
+        lineas = [
+            f"# HELP {nombre} Duración de cada etapa del ciclo de investigación.",
+            f"# TYPE {nombre} histogram",
+        ]
+        with self._lock:
+            for etapa in sorted(self.histogramas):
+                h = self.histogramas[etapa]
+                for limite, acumulado in h.acumulados():
+                    le = "+Inf" if math.isinf(limite) else repr(limite)
+                    lineas.append(f'{nombre}_bucket{{etapa="{etapa}",le="{le}"}} {acumulado}')
+                lineas.append(f'{nombre}_sum{{etapa="{etapa}"}} {h.suma!r}')
+                lineas.append(f'{nombre}_count{{etapa="{etapa}"}} {h.n}')
+            for contador in sorted(self.contadores):
+                completo = f"{self.prefijo}_{contador}_total"
+                lineas.append(f"# TYPE {completo} counter")
+                lineas.append(f"{completo} {self.contadores[contador]}")
+        return "\n".join(lineas) + "\n"
+
+    def como_dict(self):
+        with self._lock:
+            return {
+                "etapas": {
+                    etapa: {
+                        "n": h.n,
+                        "suma_s": h.suma,
+                        "media_s": h.suma / h.n if h.n else None,
+                        "buckets": {
+                            ("+Inf" if math.isinf(limite) else repr(limite)): acumulado
+                            for limite, acumulado in h.acumulados()
+                        },
+                    }
+                    for etapa, h in sorted(self.histogramas.items())
+                },
+                "contadores": dict(sorted(self.contadores.items())),
+            }
+
+    def exportar(self, ruta_prometheus=None, ruta_json=None):
+        """
+        Escribe las métricas de forma atómica (fichero temporal + rename),
+        para que un scraper nunca lea un fichero a medias.
+        """
+        if ruta_prometheus:
+            texto = self.texto_prometheus().encode("utf-8")
+            escritura_atomica.escribir_atomico(ruta_prometheus, lambda f: f.write(texto))
+        if ruta_json:
+            texto = json.dumps(self.como_dict(), ensure_ascii=False, indent=2).encode("utf-8")
+            escritura_atomica.escribir_atomico(ruta_json, lambda f: f.write(texto))
+
+
+# Registro global del proceso
+REGISTRO = RegistroMetricas()
@@ -0,0 +1,302 @@
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+import quantum_core
+
+# ==========================
+# Índice de novedad de configuraciones
+# ==========================
+#
+# Cada config se aplana (tras canonical_config) en rasgos: las hojas
+# numéricas son columnas numéricas ("potencial.V0") y las de texto son
+# columnas indicadoras ("potencial.tipo=barrera" = 1). Las filas viven en una
+# matriz NumPy (n, d) ya dividida por la escala de cada columna, con NaN
+# donde la config no tiene ese rasgo. La distancia entre dos configs es la
+# euclídea en esas unidades; un rasgo presente sólo en una de ellas cuenta
+# como una diferencia de PENALIZACION_AUSENTE. Así, cambiar de tipo de
+# potencial o de estado inicial siempre queda lejos del umbral, y dentro del
+# mismo tipo mandan los parámetros.
+
+UMBRAL = float(os.environ.get("CIVILIZACION_NOVEDAD_UMBRAL", "0.25"))
+PENALIZACION_AUSENTE = 1.0
+# Escala mínima de una columna numérica, relativa a su valor medio: evita
+# que una columna hasta ahora constante haga "novedoso" cualquier cambio ínfimo
+ESCALA_RELATIVA_MIN = 0.1
+ESCALA_ABSOLUTA_MIN = 1e-3
+# Rasgos que no describen el experimento por sí solos: "steps" se sustituye
+# por la duración T = steps * dt (la forma canónica split-step no guarda T)
+_IGNORADOS = ("steps",)
+
+
+def rasgos(config):
+    """
+    Rasgos de una config: {nombre: valor}, con 1.0 para los indicadores.
+    """
+    try:
+        canon = quantum_core.canonical_config(config)
+    except Exception:
+        canon = config
+    canon = dict(canon or {})
+    if "T" not in canon and "steps" in canon and "dt" in canon:
+        try:
+            canon["T"] = float(canon["steps"]) * float(canon["dt"])
+        except (TypeError, ValueError):
+            pass
+    salida = {}
+
+    def recorrer(prefijo, valor):
+        if isinstance(valor, dict):
+            for clave, v in valor.items():
+                recorrer(f"{prefijo}.{clave}" if prefijo else str(clave), v)
+        elif isinstance(valor, (list, tuple)):
+            for i, v in enumerate(valor):
+                recorrer(f"{prefijo}[{i}]", v)
+        elif isinstance(valor, bool) or isinstance(valor, str):
+            salida[f"{prefijo}={str(valor).lower()}"] = 1.0
+        elif isinstance(valor, (int, float)):
+            salida[prefijo] = float(valor)
+
+    recorrer("", {c: v for c, v in canon.items() if c not in _IGNORADOS})
+    return salida
+
+
+def _numero(valor, decimales=4):
+    try:
+        return round(float(valor), decimales)
+    except (TypeError, ValueError):
+        return None
+
+
+def resumen_compacto(registro):
+    """
+    Resumen de un registro para el prompt del Científico: la config y las
+    pocas cifras que importan, sin timing ni metadatos del núcleo.
+    """
+    config = registro.get("config") or {}
+    resultados = registro.get("resultados") or {}
+    evaluacion = registro.get("evaluacion") or {}
+    resumen = {"ciclo": registro.get("ciclo"), "config": config}
+    prob = _numero(resultados.get("prob_region"))
+    if prob is not None:
+        resumen["prob_region"] = prob
+    if resultados.get("energias"):
+        resumen["energias"] = [_numero(e) for e in resultados["energias"]]
+    relevancia = _numero(evaluacion.get("metrica_relevancia"), 3)
+    if relevancia is not None:
+        resumen["relevancia"] = relevancia
+    if evaluacion.get("es_descubrimiento"):
+        resumen["descubrimiento"] = True
+    descripcion = evaluacion.get("descripcion_experimento")
+    if descripcion:
+        resumen["descripcion"] = str(descripcion)[:120]
+    return resumen
+
+
+def linea_compacta(registro):
+    return json.dumps(resumen_compacto(registro), ensure_ascii=False, separators=(",", ":"))
+
+
+class IndiceNovedad:
+    """
+    Vecinos más cercanos por fuerza bruta vectorizada sobre una matriz
+    normalizada. La distancia al cuadrado se desarrolla como
+        sum_comunes (m - z)^2 + PENALIZACION_AUSENTE^2 * n_rasgos_no_comunes
+    y se obtiene con un único producto matriz-vector sobre las filas ya
+    escritas (contiguas en memoria) de una matriz float32 que junta, por
+    bloques de columnas, los valores escalados al cuadrado, los valores y la
+    máscara de presencia, así que una consulta lee una sola vez n x 3d
+    números de 4 bytes. El error de redondeo de float32 se acota por fila;
+    las filas que, con esa cota, aún pueden estar entre las k más cercanas
+    se recalculan exactamente en float64 a partir de los valores crudos.
+    La escala de cada columna se recalcula cuando el índice dobla su tamaño
+    o aparecen rasgos nuevos. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, umbral=UMBRAL):
+        self.umbral = float(umbral)
+        self.columnas = {}
+        self._crudos = np.empty((0, 0))      # valores sin escalar (NaN = ausente)
+        # [valores^2 | valores | presentes] con valores = _crudos / _escala
+        # (0 si ausente); cada bloque ocupa las columnas de capacidad
+        self._combinada = np.empty((0, 0), dtype=np.float32)
+        self._cota = np.empty(0)             # suma de |_combinada| por fila
+        self._escala = np.ones(0)
+        self._n = 0
+        self._n_escala = 0
+        self._resumenes = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._n
+
+    @classmethod
+    def desde_registros(cls, registros, umbral=UMBRAL):
+        indice = cls(umbral)
+        for registro in registros:
+            if isinstance(registro, dict) and isinstance(registro.get("config"), dict):
+                indice.anadir(registro)
+        return indice
+
+    # ---------- construcción ----------
+
+    def _vector(self, config, crear_columnas=False):
+        valores = rasgos(config)
+        if crear_columnas:
+            for nombre in valores:
+                if nombre not in self.columnas:
+                    self.columnas[nombre] = len(self.columnas)
+        vector = np.full(len(self.columnas), np.nan)
+        for nombre, valor in valores.items():
+            j = self.columnas.get(nombre)
+            if j is not None:
+                vector[j] = valor
+        return vector, len(valores)
+
+    def _reservar(self, filas, columnas):
+        """
+        Amplía la capacidad (doblándola) si hace falta. Devuelve True si ha
+        reservado memoria nueva, y entonces hay que reescalar.
+        """
+        cap_filas, cap_columnas = self._crudos.shape
+        if filas <= cap_filas and columnas <= cap_columnas:
+            return False
+        nuevas = (
+            cap_filas if filas <= cap_filas else max(filas, 2 * cap_filas, 64),
+            cap_columnas if columnas <= cap_columnas else max(columnas, 2 * cap_columnas, 16),
+        )
+        crudos = np.full(nuevas, np.nan)
+        crudos[:self._n, :cap_columnas] = self._crudos[:self._n]
+        self._crudos = crudos
+        self._combinada = np.zeros((nuevas[0], 3 * nuevas[1]), dtype=np.float32)
+        self._cota = np.zeros(nuevas[0])
+        return True
+
+    def _escribir_filas(self, filas, crudos):
+        d = crudos.shape[1]
+        c = self._crudos.shape[1]
+        presentes = ~np.isnan(crudos)
+        valores = np.where(presentes, crudos / self._escala, 0.0)
+        bloques = (valores ** 2, valores, presentes)
+        for b, bloque in enumerate(bloques):
+            self._combinada[filas, b * c:b * c + d] = bloque
+        self._cota[filas] = sum(np.abs(bloque).sum(axis=1) for bloque in bloques)
+
+    def _reescalar(self):
+        d = len(self.columnas)
+        crudos = self._crudos[:self._n, :d]
+        escala = np.ones(d)
+        if self._n:
+            con_datos = np.any(~np.isnan(crudos), axis=0)
+            with np.errstate(invalid="ignore"):
+                std = np.nanstd(crudos[:, con_datos], axis=0)
+                media = np.abs(np.nanmean(crudos[:, con_datos], axis=0))
+            escala[con_datos] = np.maximum(
+                np.maximum(std, ESCALA_RELATIVA_MIN * media), ESCALA_ABSOLUTA_MIN
+            )
+        self._escala = escala
+        self._escribir_filas(slice(0, self._n), crudos)
+        self._n_escala = self._n
+
+    def anadir(self, registro):
+        """
+        Añade un registro completo (con "config") al índice.
+        """
+        with self._lock:
+            vector, _ = self._vector(registro["config"], crear_columnas=True)
+            d = vector.size
+            ampliado = self._reservar(self._n + 1, d)
+            self._crudos[self._n, :d] = vector
+            self._resumenes.append(resumen_compacto(registro))
+            self._n += 1
+            if ampliado or d != self._escala.size or self._n >= 2 * self._n_escala:
+                self._reescalar()
+            else:
+                self._escribir_filas(slice(self._n - 1, self._n), vector[None, :])
+
+    # ---------- consultas ----------
+
+    def _distancias_exactas(self, filas, vector, desconocidos):
+        """
+        Distancias en float64 de las filas indicadas, directamente sobre los
+        valores crudos.
+        """
+        d = vector.size
+        m = self._crudos[filas, :d] / self._escala
+        z = vector / self._escala
+        ambos = ~np.isnan(m) & ~np.isnan(z)
+        uno = np.isnan(m) != np.isnan(z)
+        cuadrados = (
+            np.where(ambos, (m - z) ** 2, 0.0).sum(axis=1)
+            + PENALIZACION_AUSENTE ** 2 * (uno.sum(axis=1) + desconocidos)
+        )
+        return np.sqrt(cuadrados)
+
+    def _cercanos(self, config, k):
+        """
+        (posiciones, distancias) de las k filas más cercanas, de la más
+        cercana a la más lejana.
+        """
+        vector, n_rasgos = self._vector(config)
+        d = vector.size
+        c = self._crudos.shape[1]
+        presentes = ~np.isnan(vector)
+        # Rasgos de la config que el índice no ha visto nunca: ausentes en todas las filas
+        desconocidos = n_rasgos - int(np.count_nonzero(presentes))
+        p = presentes.astype(float)
+        z = np.where(presentes, vector / self._escala, 0.0)
+        penal = PENALIZACION_AUSENTE ** 2
+        # comunes: sum p (m^2 - 2 m z + P z^2); no comunes: sum P (1 - p) + (1 - P) p
+        consulta = np.zeros(3 * c)
+        consulta[:d] = p
+        consulta[c:c + d] = -2.0 * z
+        consulta[2 * c:2 * c + d] = z ** 2 + penal * (1.0 - 2.0 * p)
+        aproximadas = self._combinada[:self._n] @ consulta.astype(np.float32)
+        aproximadas = aproximadas + penal * (p.sum() + desconocidos)
+        # Cota del error de redondeo (datos, consulta y suma en float32)
+        error = (3 * c + 2) * np.finfo(np.float32).eps * self._cota[:self._n] * np.abs(consulta).max()
+
+        k = min(int(k), self._n)
+        superiores = aproximadas + error
+        umbral = np.partition(superiores, k - 1)[k - 1]
+        candidatas = np.flatnonzero(aproximadas - error <= umbral)
+        distancias = self._distancias_exactas(candidatas, vector, desconocidos)
+        orden = np.argsort(distancias, kind="stable")[:k]
+        return candidatas[orden], distancias[orden]
+
+    def vecinos(self, config, k=3):
+        """
+        Los k registros más parecidos a 'config' como [(distancia, resumen)],
+        del más cercano al más lejano.
+        """
+        with self._lock:
+            if self._n == 0:
+                return []
+            filas, distancias = self._cercanos(config, k)
+            return [(float(dist), self._resumenes[i]) for i, dist in zip(filas, distancias)]
+
+    def novedad(self, config):
+        """
+        Distancia al experimento previo más cercano (inf si no hay ninguno).
+        """
+        cercanos = self.vecinos(config, k=1)
+        return cercanos[0][0] if cercanos else float("inf")
+
+    def es_repetida(self, config):
+        return self.novedad(config) < self.umbral
+
+    def cobertura(self, clave="potencial"):
+        """
+        Número de experimentos por tipo de 'clave' ("potencial" o
+        "estado_inicial"), de más a menos frecuente.
+        """
+        with self._lock:
+            tipos = Counter(
+                str((r["config"].get(clave) or {}).get("tipo", "?")).lower()
+                if isinstance(r["config"].get(clave), dict) else "?"
+                for r in self._resumenes
+            )
+        return tipos.most_common()
@@ -1,10 +1,26 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
 import numpy as np
 from numpy.fft import fft, ifft, fftfreq
 
+import escritura_atomica
+import expresiones
+
 # ==========================
 # Núcleo cuántico 1D serio (split-step Fourier)
 # ==========================
 
+# Versión de la física y la numérica del núcleo: se sube cuando un cambio
+# altera los resultados de configs ya existentes, y forma parte de la clave
+# de la caché de resultados (cache_resultados), que así no sirve resultados
+# calculados con un núcleo anterior.
+VERSION_NUCLEO = 2
+
+
 def _clamp(value, vmin, vmax):
     return max(vmin, min(vmax, value))
 
@@ -32,6 +48,13 @@ def build_k_grid(N, dx):
     return 2.0 * np.pi * fftfreq(N, d=dx)
 
 
+TIPOS_POTENCIAL_1D = ("libre", "pozo", "barrera", "armonic", "armonico", "doble_pozo", "expresion")
+TIPOS_ESTADO_1D = (
+    "gauss", "gauss_momentum", "superposicion", "expresion",
+    "ground_state", "fundamental", "autoestado",
+)
+
+
 def build_potential_1d(x, pot_cfg):
     """
     Construye un potencial 1D en función de la configuración.
@@ -42,6 +65,8 @@ def build_potential_1d(x, pot_cfg):
         - "barrera": V = V0 en [x_min, x_max], 0 fuera
         - "armonic": V = 0.5 * k * (x - x0)^2
         - "doble_pozo": V = a * x^4 - b * x^2   (doble pozo simétrico)
+        - "expresion": V dado por pot_cfg["expresion"] en x, con el resto
+          de claves numéricas como parámetros (ver expresiones.py)
     """
     V = np.zeros_like(x, dtype=float)
     if pot_cfg is None:
@@ -79,21 +104,86 @@ def build_potential_1d(x, pot_cfg):
         b = float(pot_cfg.get("b", 5.0))
         V = a * x**4 - b * x**2
 
+    elif tipo == "expresion":
+        V = _evaluar_expresion(pot_cfg, x=x)
+        if np.iscomplexobj(V):
+            if np.any(V.imag):
+                raise ValueError("El potencial debe ser real (para absorber usa \"absorcion\")")
+            V = V.real
+        V = V.astype(float)
+
     else:
-        # Tipo desconocido -> libre
-        V[:] = 0.0
+        raise ValueError(
+            f"Tipo de potencial no soportado: {tipo!r} "
+            f"(admitidos: {', '.join(TIPOS_POTENCIAL_1D)})"
+        )
 
     return V
 
 
-def build_initial_state_1d(x, init_cfg):
+def build_absorbing_layer_1d(x, abs_cfg):
+    """
+    Capa absorbente en los bordes de la rejilla (potencial absorbente
+    complejo): el potencial efectivo es V - i W con W >= 0, de modo que lo
+    que llega al borde se amortigua en lugar de reaparecer por el otro lado.
+
+    abs_cfg (o True para los valores por defecto):
+        {
+          "anchura": float,     # grosor de cada capa (por defecto L/10)
+          "intensidad": float,  # W en el borde del dominio
+          "orden": int          # W ~ ((|x| - x_in) / anchura)^orden
+        }
+    Devuelve W(x), o None si la absorción está desactivada.
+    """
+    if abs_cfg is None or abs_cfg is False:
+        return None
+    if abs_cfg is True:
+        abs_cfg = {}
+
+    L = x.size * (x[1] - x[0])
+    anchura = _clamp(float(abs_cfg.get("anchura", L / 10.0)), 0.0, L / 2.0)
+    intensidad = float(abs_cfg.get("intensidad", 5.0))
+    orden = int(abs_cfg.get("orden", 2))
+    if anchura <= 0.0 or intensidad <= 0.0:
+        return None
+
+    x_in = L / 2.0 - anchura
+    W = np.zeros_like(x, dtype=float)
+    capa = np.abs(x) > x_in
+    W[capa] = intensidad * ((np.abs(x[capa]) - x_in) / anchura) ** orden
+    return W
+
+
+def _con_absorcion(config):
+    return config.get("absorcion") not in (None, False)
+
+
+def _potencial_efectivo(x, config):
+    """
+    Potencial de la config, complejo (V - i W) si tiene "absorcion".
+    """
+    V = build_potential_1d(x, config.get("potencial"))
+    W = build_absorbing_layer_1d(x, config.get("absorcion"))
+    if W is None:
+        return V
+    return V - 1j * W
+
+
+def build_initial_state_1d(x, init_cfg, V=None):
     """
     Construye un estado inicial psi(x) y lo normaliza.
+    V es el potencial del experimento (lo usan los autoestados).
     init_cfg:
         tipo:
             - "gauss": gaussiana centrada en x0, sin momento
             - "gauss_momentum": gaussiana con fase oscilante (momento k0)
             - "superposicion": suma de dos gaussianas
+            - "expresion": psi(x) dado por init_cfg["expresion"] (puede ser
+              compleja, p. ej. "exp(-(x-x0)**2)*exp(1j*k0*x)")
+            - "ground_state": estado fundamental de init_cfg["potencial"]
+              (por defecto, el potencial V del experimento), calculado en
+              tiempo imaginario
+            - "autoestado": n-ésimo autoestado (clave "n", 0 = fundamental)
     """
     N = x.size
     psi = np.zeros(N, dtype=np.complex128)
@@ -123,20 +213,57 @@ def build_initial_state_1d(x, init_cfg):
                 -0.5 * ((x - x2) / sigma) ** 2
             )
 
+        elif tipo == "expresion":
+            psi = _evaluar_expresion(init_cfg, x=x)
+
+        elif tipo in ("ground_state", "fundamental", "autoestado"):
+            n = 0 if tipo != "autoestado" else _clamp(int(init_cfg.get("n", 0)), 0, IMAGINARIO_MAX_ESTADOS - 1)
+            if init_cfg.get("potencial") is not None or V is None:
+                V = build_potential_1d(x, init_cfg.get("potencial"))
+            L = x.size * (x[1] - x[0])
+            _, estados, _ = find_eigenstates_1d(L, x.size, np.real(V), n_estados=n + 1)
+            psi = estados[n].copy()  # los autoestados están cacheados
+
         else:
-            # Por defecto, gaussiana centrada en 0
-            x0 = 0.0
-            sigma = 1.0
-            psi = np.exp(-0.5 * ((x - x0) / sigma) ** 2)
+            raise ValueError(
+                f"Tipo de estado inicial no soportado: {tipo!r} "
+                f"(admitidos: {', '.join(TIPOS_ESTADO_1D)})"
+            )
+
+    psi = np.asarray(psi, dtype=np.complex128)
 
     # Normalizar
     dx = x[1] - x[0]
     norm = np.sqrt(np.sum(np.abs(psi) ** 2) * dx)
     if norm > 0:
         psi /= norm
+    elif init_cfg is not None and str(init_cfg.get("tipo", "")).lower() == "expresion":
+        raise ValueError("El estado inicial es nulo en toda la rejilla")
     return psi
 
 
+def _evaluar_expresion(cfg, **rejilla):
+    """
+    Evalúa un bloque {"tipo": "expresion", ...} sobre la rejilla dada
+    (x, o x e y en 2D) con el evaluador compilado y cacheado.
+    """
+    f = expresiones.evaluador(
+        cfg.get("expresion"), expresiones.parametros_de_config(cfg), tuple(rejilla)
+    )
+    return f(**rejilla)
+
+
+def _expresiones_canonicas(canon, config, variables=("x",)):
+    """
+    Valida las expresiones de potencial y estado inicial (antes de gastar
+    tiempo de simulación) y pone su texto normalizado en 'canon'.
+    """
+    for bloque in ("potencial", "estado_inicial"):
+        cfg = config.get(bloque)
+        if isinstance(cfg, dict) and str(cfg.get("tipo", "")).lower() == "expresion":
+            canon[bloque]["expresion"] = expresiones.validar_bloque(cfg, variables)
+
+
 def measure_probability_region_1d(psi, x, metrica_cfg):
     """
     Calcula la probabilidad en una región definida por x_min, x_max.
@@ -171,30 +298,598 @@ def measure_probability_region_1d(psi, x, metrica_cfg):
     return prob_region, prob_total
 
 
-def run_schrodinger_1d(config):
+def measure_observables_1d(psi, x, k, metrica_cfg):
     """
-    Ejecuta un experimento de Schrödinger 1D usando split-step Fourier.
+    Observables instantáneos de psi (sin renormalizar):
+        prob_region, norma, <x> y <p>.
+    <p> se calcula en espacio de Fourier con la rejilla k de la FFT.
+    """
+    prob_region, prob_total = measure_probability_region_1d(psi, x, metrica_cfg)
 
-    config esperado (claves principales):
-    {
-      "modelo": "schrodinger_1d",
-      "L": float,
-      "N": int,
-      "T": float,
-      "dt": float,
-      "potencial": {...},
-      "estado_inicial": {...},
-      "metrica": {...}
+    prob_density = np.abs(psi) ** 2
+    peso = float(np.sum(prob_density))
+    x_medio = float(np.sum(x * prob_density) / peso) if peso > 0 else 0.0
+
+    densidad_k = np.abs(fft(psi)) ** 2
+    peso_k = float(np.sum(densidad_k))
+    p_medio = float(np.sum(k * densidad_k) / peso_k) if peso_k > 0 else 0.0
+
+    return {
+        "prob_region": prob_region,
+        "norma": float(np.sqrt(prob_total)),
+        "x_medio": x_medio,
+        "p_medio": p_medio,
     }
+
+
+def _fft_admite_out():
     """
-    if config is None:
-        raise ValueError("config no puede ser None")
+    NumPy >= 2.0 permite escribir la FFT en un buffer existente (out=).
+    """
+    try:
+        buf = np.empty(2, dtype=np.complex128)
+        fft(np.zeros(2, dtype=np.complex128), out=buf)
+    except TypeError:
+        return False
+    return True
 
-    modelo = str(config.get("modelo", "schrodinger_1d")).lower()
-    if modelo != "schrodinger_1d":
-        raise ValueError(f"Modelo no soportado: {modelo}")
 
-    # Parámetros con límites de seguridad
+_FFT_CON_OUT = _fft_admite_out()
+
+
+# Integradores: composiciones simétricas de pasos de Strang S(w dt).
+# Yoshida (1990): orden 4 con pesos (w1, w0, w1) y orden 6 (solución A)
+# con (w3, w2, w1, w0, w1, w2, w3); cada peso cuesta un par de FFTs.
+# El orden alto sólo se nota con potenciales suaves, y ahí permite pasos
+# mayores con el mismo error (dt_max crece con el orden; ver
+# bench_quantum_core.py --convergencia). Con saltos (barrera, pozo) el
+# error lo domina la discontinuidad y pasos mayores que el de Strang dan
+# resultados erróneos, así que se acotan a DT_MAX_DISCONTINUO.
+_Y4_W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+_Y4_W0 = 1.0 - 2.0 * _Y4_W1
+_Y6_W = (-1.17767998417887, 0.235573213359357, 0.784513610477560)
+_Y6_W0 = 1.0 - 2.0 * sum(_Y6_W)
+
+INTEGRADORES = {
+    "strang": {"orden": 2, "pesos": (1.0,), "dt_max": 0.05},
+    "yoshida4": {"orden": 4, "pesos": (_Y4_W1, _Y4_W0, _Y4_W1), "dt_max": 0.2},
+    "yoshida6": {
+        "orden": 6,
+        "pesos": _Y6_W[::-1] + (_Y6_W0,) + _Y6_W,
+        "dt_max": 0.4,
+    },
+}
+DT_MAX_DISCONTINUO = 0.05
+
+# Detección de saltos: el mayor |V[i+1] - V[i]| se reduce a la mitad al
+# duplicar N si V es suave, y no cambia si tiene un salto.
+DISCONTINUIDAD_N = 2048
+DISCONTINUIDAD_RATIO = 0.75
+DISCONTINUIDAD_CACHE_SIZE = 64
+_DISCONTINUIDADES = OrderedDict()
+
+
+def _integrador(config):
+    integrador = str(config.get("integrador", "strang")).lower()
+    if integrador not in INTEGRADORES:
+        raise ValueError(f"Integrador no soportado: {integrador}")
+    return integrador
+
+
+def _potencial_discontinuo(config):
+    """
+    True si el potencial efectivo de la config (con la capa absorbente, si
+    la hay) tiene saltos en la caja [-L/2, L/2]. Se memoiza por potencial.
+    """
+    L = float(config.get("L", 20.0))
+    clave = json.dumps(
+        [L, config.get("potencial"), config.get("absorcion")], sort_keys=True, default=str
+    )
+    discontinuo = _DISCONTINUIDADES.get(clave)
+    if discontinuo is not None:
+        _DISCONTINUIDADES.move_to_end(clave)
+        return discontinuo
+
+    saltos = []
+    for N in (DISCONTINUIDAD_N, 2 * DISCONTINUIDAD_N):
+        x, _ = build_spatial_grid(L, N)
+        saltos.append(float(np.max(np.abs(np.diff(_potencial_efectivo(x, config))))))
+    discontinuo = saltos[0] > 0 and saltos[1] > DISCONTINUIDAD_RATIO * saltos[0]
+
+    _DISCONTINUIDADES[clave] = discontinuo
+    while len(_DISCONTINUIDADES) > DISCONTINUIDAD_CACHE_SIZE:
+        _DISCONTINUIDADES.popitem(last=False)
+    return discontinuo
+
+
+def _dt_max(config):
+    """
+    Mayor dt admitido para el integrador de la config: el suyo con
+    potenciales suaves, DT_MAX_DISCONTINUO con saltos.
+    """
+    dt_max = INTEGRADORES[_integrador(config)]["dt_max"]
+    if dt_max > DT_MAX_DISCONTINUO and _potencial_discontinuo(config):
+        return DT_MAX_DISCONTINUO
+    return dt_max
+
+
+class SplitStepPropagator1D:
+    """
+    Propagador split-step reutilizable para una rejilla (L, N), un paso dt
+    y un potencial V fijos.
+
+    V puede ser un array (N,) o una pila (n, N) de potenciales; en el
+    segundo caso psi debe tener la misma forma y las FFT se hacen por filas.
+
+    Precalcula las fases cinética y potencial y reserva los buffers de
+    trabajo, de modo que evolve() no crea arrays nuevos en cada paso.
+    Las dos mitades V/2 contiguas entre pasos se fusionan en una sola fase
+    con el potencial completo.
+
+    integrador elige la composición (ver INTEGRADORES): cada paso de dt es
+    una sucesión de subpasos de Strang de w_j dt, con las mitades de V
+    contiguas también fusionadas, de modo que un paso cuesta len(pesos)
+    pares de FFTs.
+
+    Un V complejo (V - i W, ver build_absorbing_layer_1d) añade a las fases
+    del potencial la amortiguación exp(-W dt) de la capa absorbente.
+
+    Con dt = -1j * dtau propaga en tiempo imaginario,
+    exp(-H dtau); ver find_eigenstates_1d.
+    """
+
+    def __init__(self, L, N, dt, V, integrador="strang"):
+        self.L = float(L)
+        self.N = int(N)
+        self.dt = complex(dt) if isinstance(dt, complex) else float(dt)
+        self.integrador = integrador
+        self.pesos = INTEGRADORES[integrador]["pesos"]
+        self.x, self.dx = build_spatial_grid(self.L, self.N)
+        self.k = build_k_grid(self.N, self.dx)
+
+        V = np.asarray(V)
+        V = V.astype(complex if np.iscomplexobj(V) else float)
+        if V.shape[-1] != self.N:
+            raise ValueError("El potencial no coincide con la rejilla")
+        self.V = V
+
+        # En unidades adimensionales: H = -1/2 d^2/dx^2 + V
+        # Término cinético en espacio de Fourier: exp(-i * k^2 * w dt / 2)
+        cineticas = {w: self._fase(0.5 * self.k ** 2, w) for w in set(self.pesos)}
+        self.kinetic_phases = [cineticas[w] for w in self.pesos]
+        self.kinetic_phase = self.kinetic_phases[0]
+
+        # Fases de V: V/2 inicial y final, la unión entre subpasos j y j+1
+        # y la unión entre dos pasos (último subpaso + primero)
+        pesos = self.pesos
+        self.potential_half_phase = self._fase(V, pesos[0] / 2.0)
+        self.potential_inner_phases = [
+            self._fase(V, (pesos[j] + pesos[j + 1]) / 2.0) for j in range(len(pesos) - 1)
+        ]
+        self.potential_full_phase = self._fase(V, (pesos[-1] + pesos[0]) / 2.0)
+
+        self._buf_k = np.empty(V.shape, dtype=np.complex128)
+
+    def _fase(self, H, c):
+        """
+        exp(-i H c dt), con H real o complejo.
+        """
+        return np.exp(-1j * H * (c * self.dt))
+
+    def evolve(self, psi, steps, inicio=0):
+        """
+        Evoluciona psi in situ durante 'steps' pasos y lo devuelve.
+
+        Con un potencial apilado, 'inicio' limita la evolución a las filas
+        psi[inicio:] (las anteriores quedan congeladas).
+        """
+        if steps <= 0:
+            return psi
+        if psi.shape != self.V.shape or psi.dtype != np.complex128:
+            raise ValueError("psi no coincide con la forma del propagador")
+
+        if self.V.ndim > 1 and inicio:
+            bloque = psi[inicio:]
+            fase_media = self.potential_half_phase[inicio:]
+            fase_completa = self.potential_full_phase[inicio:]
+            fases_internas = [f[inicio:] for f in self.potential_inner_phases]
+            buf_k = self._buf_k[inicio:]
+        else:
+            bloque = psi
+            fase_media = self.potential_half_phase
+            fase_completa = self.potential_full_phase
+            fases_internas = self.potential_inner_phases
+            buf_k = self._buf_k
+
+        ultimo = len(self.kinetic_phases) - 1
+
+        # V/2 inicial; después cada subpaso es K seguido de V, salvo el
+        # último del último paso, que termina con V/2.
+        bloque *= fase_media
+        for n in range(steps):
+            for j, kinetic_phase in enumerate(self.kinetic_phases):
+                if _FFT_CON_OUT:
+                    fft(bloque, axis=-1, out=buf_k)
+                    buf_k *= kinetic_phase
+                    ifft(buf_k, axis=-1, out=bloque)
+                else:
+                    psi_k = fft(bloque, axis=-1)
+                    psi_k *= kinetic_phase
+                    bloque[...] = ifft(psi_k, axis=-1)
+
+                if j < ultimo:
+                    bloque *= fases_internas[j]
+                elif n < steps - 1:
+                    bloque *= fase_completa
+                else:
+                    bloque *= fase_media
+
+        return psi
+
+
+PROPAGATOR_CACHE_SIZE = 32
+_PROPAGADORES = OrderedDict()
+
+
+def _hash_array(arr):
+    arr = np.ascontiguousarray(arr)
+    h = hashlib.sha1(arr.tobytes())
+    h.update(str((arr.dtype.str, arr.shape)).encode())
+    return h.hexdigest()
+
+
+def get_propagator(L, N, dt, V, integrador="strang"):
+    """
+    Devuelve un SplitStepPropagator1D reutilizable para (L, N, dt, V).
+
+    Los propagadores se guardan en una caché LRU de tamaño
+    PROPAGATOR_CACHE_SIZE indexada por (L, N, dt, hash del potencial,
+    integrador).
+    """
+    clave = (float(L), int(N), float(dt), _hash_array(V), integrador)
+    prop = _PROPAGADORES.get(clave)
+    if prop is not None:
+        _PROPAGADORES.move_to_end(clave)
+        return prop
+
+    prop = SplitStepPropagator1D(L, N, dt, V, integrador=integrador)
+    _PROPAGADORES[clave] = prop
+    while len(_PROPAGADORES) > PROPAGATOR_CACHE_SIZE:
+        _PROPAGADORES.popitem(last=False)
+    return prop
+
+
+def clear_propagator_cache():
+    _PROPAGADORES.clear()
+
+
+# ==========================
+# Motor espectral (base de autoestados)
+# ==========================
+
+EIGEN_CACHE_DIR = os.environ.get(
+    "QUANTUM_EIGEN_CACHE_DIR", os.path.join("laboratorio_codigo", "autoestados")
+)
+EIGEN_CACHE_MAX_BYTES = int(os.environ.get("QUANTUM_EIGEN_CACHE_MAX_MB", "256")) * 1024 * 1024
+EIGEN_MEMORY_CACHE_SIZE = 4
+T_MAX_ESPECTRAL = 1e4
+_BASES_ESPECTRALES = OrderedDict()
+
+
+class SpectralPropagator1D:
+    """
+    Propagador exacto en el tiempo para un potencial independiente del tiempo.
+
+    Diagonaliza una vez el Hamiltoniano discretizado en la misma rejilla
+    periódica que usa el split-step (cinética espectral vía FFT):
+        H = F^-1 diag(k^2 / 2) F + diag(V)
+    y evoluciona a cualquier T con una sola proyección:
+        psi(T) = U exp(-i E T) U^T psi(0)
+    """
+
+    def __init__(self, L, N, V, energias=None, autovectores=None):
+        self.L = float(L)
+        self.N = int(N)
+        self.x, self.dx = build_spatial_grid(self.L, self.N)
+        self.V = np.asarray(V, dtype=float)
+
+        if energias is None or autovectores is None:
+            energias, autovectores = self._diagonalizar()
+        self.energias = energias
+        self.autovectores = autovectores
+
+    def _diagonalizar(self):
+        k = build_k_grid(self.N, self.dx)
+        # Columnas de la matriz cinética: ifft(k^2/2 * fft(e_j)).
+        # k^2 es par, así que la matriz es real, simétrica y circulante.
+        cinetica = ifft(
+            (0.5 * k ** 2)[:, None] * fft(np.eye(self.N), axis=0), axis=0
+        ).real
+        H = 0.5 * (cinetica + cinetica.T)
+        H[np.diag_indices(self.N)] += self.V
+        return np.linalg.eigh(H)
+
+    def evolve_to(self, psi0, tiempos):
+        """
+        Devuelve una matriz (len(tiempos), N) con psi(t) para cada t.
+        """
+        tiempos = np.atleast_1d(np.asarray(tiempos, dtype=float))
+        coef = self.autovectores.T @ psi0
+        fases = np.exp(-1j * np.outer(tiempos, self.energias))
+        return (fases * coef) @ self.autovectores.T
+
+
+def _podar_bases(cache_dir, max_bytes=None):
+    """
+    Borra las bases en disco usadas hace más tiempo (mtime, que se
+    actualiza al leerlas) hasta que cache_dir ocupa como mucho max_bytes.
+    """
+    max_bytes = EIGEN_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entradas = []
+    for nombre in os.listdir(cache_dir):
+        if not nombre.endswith(".npz"):
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, nombre))
+        except FileNotFoundError:
+            continue
+        entradas.append((st.st_mtime, st.st_size, nombre))
+    total = sum(tam for _, tam, _ in entradas)
+    for _, tam, nombre in sorted(entradas):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, nombre))
+        except FileNotFoundError:
+            pass
+        total -= tam
+
+
+def get_spectral_propagator(L, N, V, cache_dir=None):
+    """
+    Devuelve un SpectralPropagator1D para (L, N, V).
+
+    La base de autoestados se cachea en memoria (LRU) y en disco en
+    cache_dir (por defecto EIGEN_CACHE_DIR) como .npz, de modo que la
+    diagonalización sólo se paga una vez por rejilla y potencial. El disco
+    se acota a EIGEN_CACHE_MAX_BYTES desalojando las bases menos recientes
+    (una base N = 2048 ocupa unos 33 MB).
+    """
+    clave = hashlib.sha1(
+        f"{float(L)!r}:{int(N)}:{_hash_array(V)}".encode()
+    ).hexdigest()
+
+    prop = _BASES_ESPECTRALES.get(clave)
+    if prop is not None:
+        _BASES_ESPECTRALES.move_to_end(clave)
+        return prop
+
+    cache_dir = EIGEN_CACHE_DIR if cache_dir is None else cache_dir
+    ruta = os.path.join(cache_dir, f"{clave}.npz") if cache_dir else None
+
+    prop = None
+    if ruta and os.path.exists(ruta):
+        try:
+            with np.load(ruta) as datos:
+                prop = SpectralPropagator1D(
+                    L, N, V, datos["energias"], datos["autovectores"]
+                )
+            os.utime(ruta)
+        except Exception:
+            prop = None
+
+    if prop is None:
+        prop = SpectralPropagator1D(L, N, V)
+        if ruta:
+            os.makedirs(cache_dir, exist_ok=True)
+            escritura_atomica.escribir_atomico(
+                ruta,
+                lambda f: np.savez(f, energias=prop.energias, autovectores=prop.autovectores),
+            )
+            _podar_bases(cache_dir)
+
+    _BASES_ESPECTRALES[clave] = prop
+    while len(_BASES_ESPECTRALES) > EIGEN_MEMORY_CACHE_SIZE:
+        _BASES_ESPECTRALES.popitem(last=False)
+    return prop
+
+
+def _parametros_espectrales(config):
+    """
+    Como _parametros_simulacion, pero sin el límite de pasos: el motor
+    espectral no discretiza el tiempo, así que T sólo se acota a
+    [0.1, T_MAX_ESPECTRAL]. dt se conserva (acotado) por trazabilidad.
+    """
+    L = float(config.get("L", 20.0))
+    N = _clamp(int(config.get("N", 512)), 64, 2048)
+    T = max(0.1, min(T_MAX_ESPECTRAL, float(config.get("T", 5.0))))
+    dt = max(1e-4, min(0.05, float(config.get("dt", 0.01))))
+    return L, N, T, dt
+
+
+def run_schrodinger_1d_spectral(config):
+    """
+    Ejecuta el experimento con el motor espectral. Mismo contrato que
+    run_schrodinger_1d: devuelve (resultados, x, psi).
+    """
+    resultados, x, psis = run_schrodinger_1d_spectral_sweep(config, None)
+    return resultados[0], x, psis[0]
+
+
+def run_schrodinger_1d_spectral_sweep(config, tiempos):
+    """
+    Evoluciona el mismo experimento a varios tiempos con una sola
+    proyección sobre la base de autoestados.
+
+    Si tiempos es None se usa config["T"]. Devuelve
+    (lista de resultados, x, matriz psi de forma (len(tiempos), N)).
+    """
+    _validar_modelo(config)
+    if _con_absorcion(config):
+        raise ValueError("La capa absorbente no es compatible con el motor espectral")
+    info_resolucion = None
+    if _resolucion(config) is not None:
+        config, info_resolucion = select_resolution(config)
+    L, N, T, dt = _parametros_espectrales(config)
+    if tiempos is None:
+        tiempos = [T]
+    tiempos = [max(0.0, min(T_MAX_ESPECTRAL, float(t))) for t in tiempos]
+
+    t0 = time.perf_counter()
+    x, dx = build_spatial_grid(L, N)
+    V = build_potential_1d(x, config.get("potencial"))
+    psi0 = build_initial_state_1d(x, config.get("estado_inicial"), V)
+
+    # Incluye la diagonalización si la base no estaba en caché
+    prop = get_spectral_propagator(L, N, V)
+    t1 = time.perf_counter()
+    psis = prop.evolve_to(psi0, tiempos)
+    t2 = time.perf_counter()
+
+    resultados = []
+    for j, t in enumerate(tiempos):
+        tm = time.perf_counter()
+        res = _resultados_1d(psis[j], x, dx, config, L, N, t, dt, 0, motor="espectral")
+        res["timing"] = _bloque_timing(t1 - t0, t2 - t1, time.perf_counter() - tm, 0)
+        if info_resolucion is not None:
+            res["resolucion"] = dict(info_resolucion)
+        resultados.append(res)
+    return resultados, x, psis
+
+
+# ==========================
+# Tiempo imaginario (estado fundamental y autoestados)
+# ==========================
+#
+# Con dt = -i dtau el mismo propagador split-step aplica exp(-H dtau): las
+# componentes de energía alta decaen antes, y al renormalizar en cada paso
+# psi converge al estado fundamental. La energía se estima gratis a partir
+# de la norma perdida en el paso, E ~ -ln(||psi||) / dtau, y se para en
+# cuanto deja de cambiar. Los estados excitados se obtienen proyectando en
+# cada paso fuera de los ya encontrados (Gram-Schmidt).
+
+IMAGINARIO_DTAU = 0.01
+IMAGINARIO_TOLERANCIA = 1e-12
+IMAGINARIO_MAX_PASOS = 20000
+IMAGINARIO_MAX_ESTADOS = 8
+AUTOESTADOS_CACHE_SIZE = 8
+_AUTOESTADOS = OrderedDict()
+
+
+def _energia_1d(psi, V, k, dx):
+    """
+    <psi|H|psi> para psi normalizado (cinética por Parseval).
+    """
+    cinetica = 0.5 * np.sum(k ** 2 * np.abs(fft(psi)) ** 2) * dx / psi.size
+    return float(cinetica + np.sum(V * np.abs(psi) ** 2) * dx)
+
+
+def find_eigenstates_1d(L, N, V, n_estados=1, dtau=IMAGINARIO_DTAU,
+                        tol=IMAGINARIO_TOLERANCIA, max_pasos=IMAGINARIO_MAX_PASOS):
+    """
+    Los n_estados autoestados más bajos de H = -1/2 d^2/dx^2 + V en la
+    rejilla (L, N), por propagación en tiempo imaginario con parada
+    temprana.
+
+    Devuelve (energias (n,), estados (n, N) normalizados, info) con info
+    una lista por estado de {"pasos", "convergido"}. Se cachean por
+    (L, N, V, n_estados, dtau, tol).
+    """
+    V = np.asarray(V, dtype=float)
+    clave = (float(L), int(N), _hash_array(V), int(n_estados), float(dtau), float(tol))
+    guardado = _AUTOESTADOS.get(clave)
+    if guardado is not None:
+        _AUTOESTADOS.move_to_end(clave)
+        return guardado
+
+    prop = SplitStepPropagator1D(L, N, -1j * dtau, V)
+    x, dx, k = prop.x, prop.dx, prop.k
+    # Semilla tipo Boltzmann, exp(-(V - V_min)): cubre todos los mínimos
+    # (p. ej. los dos pozos de un doble pozo) y tiene la simetría de V
+    envolvente = np.exp(-(V - V.min()))
+    x_c = float(np.sum(x * envolvente) / np.sum(envolvente))
+    rng = np.random.default_rng(0)
+
+    energias = []
+    estados = []
+    info = []
+    for n in range(int(n_estados)):
+        # Con la paridad de n alrededor del centro, más un poco de ruido
+        # para no ser ortogonal por simetría al estado buscado
+        psi = ((x - x_c) ** n * envolvente).astype(np.complex128)
+        psi += 1e-3 * rng.standard_normal(N)
+
+        E_anterior = None
+        convergido = False
+        paso = 0
+        while paso < max_pasos:
+            for phi in estados:
+                psi -= np.vdot(phi, psi) * dx * phi
+            norma = np.sqrt(np.sum(np.abs(psi) ** 2) * dx)
+            psi /= norma
+
+            prop.evolve(psi, 1)
+            paso += 1
+            norma = np.sqrt(np.sum(np.abs(psi) ** 2) * dx)
+            E = -np.log(norma) / dtau
+            if E_anterior is not None and abs(E - E_anterior) < tol:
+                convergido = True
+                break
+            E_anterior = E
+
+        for phi in estados:
+            psi -= np.vdot(phi, psi) * dx * phi
+        psi /= np.sqrt(np.sum(np.abs(psi) ** 2) * dx)
+        estados.append(psi)
+        energias.append(_energia_1d(psi, V, k, dx))
+        info.append({"pasos": paso, "convergido": convergido})
+
+    resultado = (np.array(energias), np.array(estados), info)
+    _AUTOESTADOS[clave] = resultado
+    while len(_AUTOESTADOS) > AUTOESTADOS_CACHE_SIZE:
+        _AUTOESTADOS.popitem(last=False)
+    return resultado
+
+
+def run_schrodinger_1d_imaginary(config):
+    """
+    Motor "imaginario": calcula los config["n_estados"] autoestados más
+    bajos del potencial (dt es el paso de tiempo imaginario). Devuelve
+    (resultados, x, psi) con psi el estado fundamental; resultados incluye
+    "energias" y prob_region del fundamental.
+    """
+    _validar_modelo(config)
+    if _con_absorcion(config):
+        raise ValueError("La capa absorbente no es compatible con el motor imaginario")
+    L, N, _, dtau, _ = _parametros_simulacion(config)
+    n_estados = _clamp(int(config.get("n_estados", 1)), 1, IMAGINARIO_MAX_ESTADOS)
+    tol = float(config.get("tolerancia_energia", IMAGINARIO_TOLERANCIA))
+
+    t0 = time.perf_counter()
+    x, dx = build_spatial_grid(L, N)
+    V = build_potential_1d(x, config.get("potencial"))
+    t1 = time.perf_counter()
+    energias, estados, info = find_eigenstates_1d(L, N, V, n_estados, dtau, tol)
+    t2 = time.perf_counter()
+
+    pasos = sum(e["pasos"] for e in info)
+    psi = estados[0].copy()
+    resultados = _resultados_1d(psi, x, dx, config, L, N, pasos * dtau, dtau, pasos,
+                                motor="imaginario")
+    resultados["energias"] = energias.tolist()
+    resultados["convergido"] = all(e["convergido"] for e in info)
+    resultados["pasos_por_estado"] = [e["pasos"] for e in info]
+    resultados["timing"] = _bloque_timing(t1 - t0, t2 - t1, time.perf_counter() - t2, pasos)
+    return resultados, x, psi
+
+
+MAX_STEPS = 5000
+
+
+def _limites_simulacion(config):
+    """
+    L, N, T y dt pedidos, acotados a los límites de seguridad del núcleo.
+    """
     L = float(config.get("L", 20.0))
     N = int(config.get("N", 512))
     T = float(config.get("T", 5.0))
@@ -202,46 +897,145 @@ def run_schrodinger_1d(config):
 
     # Limitar para evitar simulaciones absurdas
     N = _clamp(N, 64, 2048)
-    dt = max(1e-4, min(0.05, dt))
+    dt = max(1e-4, min(_dt_max(config), dt))
     T = max(0.1, min(20.0, T))
+    return L, N, T, dt
 
-    steps = int(round(T / dt))
-    MAX_STEPS = 5000
-    if steps > MAX_STEPS:
-        steps = MAX_STEPS
-        T = steps * dt
 
-    # Construir rejilla y potencial
-    x, dx = build_spatial_grid(L, N)
-    V = build_potential_1d(x, config.get("potencial"))
+def _parametros_simulacion(config):
+    """
+    Extrae L, N, T, dt y steps de la configuración aplicando los límites
+    de seguridad del núcleo. T es el tiempo efectivo, steps * dt: el que se
+    simula de verdad cuando T no es múltiplo de dt o se alcanza MAX_STEPS.
+    """
+    L, N, T, dt = _limites_simulacion(config)
+    steps = min(MAX_STEPS, max(1, int(round(T / dt))))
+    return L, N, steps * dt, dt, steps
 
-    # Estado inicial
-    psi = build_initial_state_1d(x, config.get("estado_inicial"))
 
-    # Preparar split-step
-    k = build_k_grid(N, dx)
-    # En unidades adimensionales: H = -1/2 d^2/dx^2 + V
-    # Término cinético en espacio de Fourier: exp(-i * k^2 * dt / 2)
-    kinetic_phase = np.exp(-0.5j * (k ** 2) * dt)
-    potential_phase = np.exp(-1j * V * dt / 2.0)
-
-    # Evolución temporal
-    for _ in range(steps):
-        # V/2
-        psi = potential_phase * psi
-        # K
-        psi_k = fft(psi)
-        psi_k *= kinetic_phase
-        psi = ifft(psi_k)
-        # V/2
-        psi = potential_phase * psi
+def _motor(config):
+    motor = str(config.get("motor", "split_step")).lower()
+    if motor not in ("split_step", "espectral", "imaginario"):
+        raise ValueError(f"Motor no soportado: {motor}")
+    return motor
+
+
+def _modelo(config):
+    if config is None:
+        raise ValueError("config no puede ser None")
+    return str(config.get("modelo", "schrodinger_1d")).lower()
+
+
+def _validar_modelo(config):
+    if config is None:
+        raise ValueError("config no puede ser None")
+
+    modelo = str(config.get("modelo", "schrodinger_1d")).lower()
+    if modelo != "schrodinger_1d":
+        raise ValueError(f"Modelo no soportado: {modelo}")
+
+
+def _valor_canonico(valor):
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if isinstance(valor, str):
+        return valor.lower()
+    if isinstance(valor, dict):
+        return {str(c): _valor_canonico(v) for c, v in sorted(valor.items())}
+    if isinstance(valor, (list, tuple)):
+        return [_valor_canonico(v) for v in valor]
+    return str(valor)
+
+
+def canonical_config(config):
+    """
+    Forma canónica de una configuración, para identificar experimentos
+    numéricamente equivalentes.
+
+    Aplica los mismos límites que el núcleo (N, dt, T) y sustituye T por el
+    número de pasos efectivo en el motor split-step, de modo que dos configs
+    que acaban ejecutando exactamente la misma evolución tienen la misma
+    forma canónica. Los números se pasan a float y las cadenas a minúsculas.
+    """
+    if _modelo(config) == "schrodinger_2d":
+        import quantum_core_2d
+        return quantum_core_2d.canonical_config_2d(config)
+
+    _validar_modelo(config)
+    motor = _motor(config)
+
+    canon = {
+        c: _valor_canonico(v)
+        for c, v in config.items()
+        if c not in ("modelo", "motor", "L", "N", "T", "dt")
+    }
+    canon["modelo"] = "schrodinger_1d"
+    canon["motor"] = motor
+    _expresiones_canonicas(canon, config)
+    canon.pop("integrador", None)
+    if motor == "split_step" and _integrador(config) != "strang":
+        canon["integrador"] = _integrador(config)
+    if "absorcion" in config:
+        if _con_absorcion(config):
+            absorcion = config["absorcion"]
+            canon["absorcion"] = _valor_canonico({} if absorcion is True else absorcion)
+        else:
+            del canon["absorcion"]
+
+    if motor == "imaginario":
+        # Sólo importan la rejilla, el paso de tiempo imaginario y el
+        # número de autoestados; T no se usa
+        L, N, _, dt, _ = _parametros_simulacion(config)
+        canon.pop("resolucion", None)
+        canon["n_estados"] = float(_clamp(int(config.get("n_estados", 1)), 1, IMAGINARIO_MAX_ESTADOS))
+        canon.update({"L": L, "N": N, "dt": dt})
+    elif _resolucion(config) is not None:
+        # N y dt los elige el núcleo: sólo importan L, T y la tolerancia
+        canon["resolucion"] = {"tolerancia": _resolucion(config)}
+        if motor == "espectral":
+            L, _, T, _ = _parametros_espectrales(config)
+        else:
+            L, _, T, _ = _limites_simulacion(config)
+        canon.update({"L": L, "T": T})
+    elif motor == "espectral":
+        L, N, T, dt = _parametros_espectrales(config)
+        canon.update({"L": L, "N": N, "T": T})
+    else:
+        L, N, T, dt, steps = _parametros_simulacion(config)
+        canon.update({"L": L, "N": N, "dt": dt, "steps": steps})
+
+    return canon
+
+
+def _bloque_timing(build_s, evolve_s, measure_s, steps):
+    """
+    Bloque "timing" de resultados: segundos por fase y pasos por segundo.
+    """
+    return {
+        "build_s": build_s,
+        "evolve_s": evolve_s,
+        "measure_s": measure_s,
+        "steps_per_s": steps / evolve_s if steps and evolve_s > 0 else None,
+    }
+
+
+def _resultados_1d(psi, x, dx, config, L, N, T, dt, steps, motor="split_step"):
+    """
+    Renormaliza psi (in situ) y construye el diccionario de resultados.
+
+    Con capa absorbente no se renormaliza: la norma perdida es la
+    probabilidad absorbida en los bordes (se devuelve en "prob_absorbida").
+    """
+    absorbente = _con_absorcion(config)
 
     # Renormalizar por seguridad
-    prob_density = np.abs(psi) ** 2
-    norm = np.sqrt(np.sum(prob_density) * dx)
-    if norm > 0:
-        psi /= norm
+    if not absorbente:
         prob_density = np.abs(psi) ** 2
+        norm = np.sqrt(np.sum(prob_density) * dx)
+        if norm > 0:
+            psi /= norm
 
     prob_region, prob_total = measure_probability_region_1d(
         psi, x, config.get("metrica")
@@ -254,9 +1048,453 @@ def run_schrodinger_1d(config):
         "T": T,
         "dt": dt,
         "steps": steps,
+        "motor": motor,
         "prob_region": prob_region,
         "prob_total": prob_total,
         "METRICA_CONTROL": prob_region,
     }
+    if motor == "split_step":
+        integrador = _integrador(config)
+        resultados["integrador"] = integrador
+        resultados["pares_fft"] = steps * len(INTEGRADORES[integrador]["pesos"])
+    if absorbente:
+        resultados["prob_absorbida"] = max(0.0, 1.0 - prob_total)
+    return resultados
+
 
+def run_schrodinger_1d(config):
+    """
+    Ejecuta un experimento de Schrödinger 1D usando split-step Fourier.
+
+    config esperado (claves principales):
+    {
+      "modelo": "schrodinger_1d",
+      "L": float,
+      "N": int,
+      "T": float,
+      "dt": float,
+      "potencial": {...},
+      "estado_inicial": {...},
+      "metrica": {...},
+      "motor": "split_step" | "espectral" | "imaginario"   (opcional)
+      "absorcion": {...}                    (opcional, sólo split_step)
+      "resolucion": "auto" | {"tolerancia": float}   (opcional)
+      "integrador": "strang" | "yoshida4" | "yoshida6"  (opcional)
+    }
+    """
+    _validar_modelo(config)
+    if _motor(config) == "espectral":
+        return run_schrodinger_1d_spectral(config)
+    if _motor(config) == "imaginario":
+        return run_schrodinger_1d_imaginary(config)
+    if _resolucion(config) is not None:
+        return _run_con_resolucion_automatica(config)
+
+    L, N, T, dt, steps = _parametros_simulacion(config)
+
+    t0 = time.perf_counter()
+    # Construir rejilla y potencial
+    x, dx = build_spatial_grid(L, N)
+    V = _potencial_efectivo(x, config)
+
+    # Estado inicial
+    psi = build_initial_state_1d(x, config.get("estado_inicial"), V)
+    prop = get_propagator(L, N, dt, V, integrador=_integrador(config))
+    t1 = time.perf_counter()
+
+    # Evolución temporal (split-step con propagador cacheado)
+    prop.evolve(psi, steps)
+    t2 = time.perf_counter()
+
+    resultados = _resultados_1d(psi, x, dx, config, L, N, T, dt, steps)
+    t3 = time.perf_counter()
+    resultados["timing"] = _bloque_timing(t1 - t0, t2 - t1, t3 - t2, steps)
     return resultados, x, psi
+
+
+def run_schrodinger_1d_batch(configs):
+    """
+    Ejecuta varios experimentos de Schrödinger 1D a la vez.
+
+    Las configuraciones que comparten (L, N, dt, integrador) tras aplicar
+    los límites se
+    agrupan: sus potenciales y estados iniciales se apilan en matrices
+    (n_configs, N) y se evolucionan juntos con FFTs por filas. Dentro de un
+    grupo las filas se ordenan por número de pasos, de modo que en cada
+    momento sólo se evoluciona el sufijo de filas que aún no ha terminado.
+
+    Devuelve una lista de tuplas (resultados, x, psi) en el mismo orden que
+    configs, equivalente a llamar a run_schrodinger_1d para cada una.
+    """
+    configs = list(configs)
+    salidas = [None] * len(configs)
+
+    grupos = {}
+    for i, config in enumerate(configs):
+        _validar_modelo(config)
+        if _motor(config) != "split_step":
+            salidas[i] = run_schrodinger_1d(config)
+            continue
+        if _resolucion(config) is not None:
+            # La elección de N y dt es por experimento: no se apila
+            salidas[i] = run_schrodinger_1d(config)
+            continue
+        L, N, T, dt, steps = _parametros_simulacion(config)
+        grupos.setdefault((L, N, dt, _integrador(config)), []).append((steps, i, T))
+
+    for (L, N, dt, integrador), miembros in grupos.items():
+        miembros.sort(key=lambda m: m[0])
+
+        t0 = time.perf_counter()
+        x, dx = build_spatial_grid(L, N)
+
+        # Si algún miembro tiene capa absorbente la pila es compleja
+        V = np.array([_potencial_efectivo(x, configs[i]) for _, i, _ in miembros])
+        psi = np.empty((len(miembros), N), dtype=np.complex128)
+        for fila, (_, i, _) in enumerate(miembros):
+            psi[fila] = build_initial_state_1d(x, configs[i].get("estado_inicial"), V[fila])
+
+        # La pila de potenciales rara vez se repite: no pasa por la caché
+        prop = SplitStepPropagator1D(L, N, dt, V, integrador=integrador)
+        # Los tiempos del grupo se reparten entre sus miembros
+        build_s = (time.perf_counter() - t0) / len(miembros)
+
+        # Evolución por tramos: las filas [activo:] son las que siguen vivas
+        paso = 0
+        evolve_s = 0.0
+        for activo, (steps, i, T) in enumerate(miembros):
+            t1 = time.perf_counter()
+            prop.evolve(psi, steps - paso, inicio=activo)
+            evolve_s += (time.perf_counter() - t1) / (len(miembros) - activo)
+            paso = steps
+
+            t2 = time.perf_counter()
+            psi_i = psi[activo].copy()
+            resultados = _resultados_1d(
+                psi_i, x, dx, configs[i], L, N, T, dt, steps
+            )
+            resultados["timing"] = _bloque_timing(
+                build_s, evolve_s, time.perf_counter() - t2, steps
+            )
+            resultados["timing"]["lote"] = len(miembros)
+            salidas[i] = (resultados, x, psi_i)
+
+    return salidas
+
+
+def iter_schrodinger_1d(config, every=1, incluir_psi=False):
+    """
+    Versión en streaming de run_schrodinger_1d.
+
+    Evoluciona el mismo experimento y, cada 'every' pasos (y siempre en
+    t = 0 y en el último paso), produce un diccionario:
+        {"step", "t", "prob_region", "norma", "x_medio", "p_medio"}
+    Con incluir_psi=True se añade "psi", una copia del estado en ese paso.
+
+    Sólo se mantiene en memoria el estado actual, nunca la trayectoria.
+
+    Con el motor espectral cada instante t = step * dt (y el último, T) se
+    obtiene proyectando psi(0) sobre la base de autoestados. El motor
+    imaginario no tiene evolución temporal, así que se rechaza.
+    """
+    every = int(every)
+    if every <= 0:
+        raise ValueError("every debe ser positivo")
+
+    _validar_modelo(config)
+    motor = _motor(config)
+    if motor == "imaginario":
+        raise ValueError("El motor imaginario no tiene evolución temporal que recorrer")
+    if _resolucion(config) is not None:
+        config, _ = select_resolution(config)
+    if motor == "espectral":
+        yield from _iter_schrodinger_1d_espectral(config, every, incluir_psi)
+        return
+    L, N, _, dt, steps = _parametros_simulacion(config)
+
+    x, _ = build_spatial_grid(L, N)
+    V = _potencial_efectivo(x, config)
+    psi = build_initial_state_1d(x, config.get("estado_inicial"), V)
+
+    prop = get_propagator(L, N, dt, V, integrador=_integrador(config))
+    metrica_cfg = config.get("metrica")
+
+    paso = 0
+    while True:
+        observables = measure_observables_1d(psi, x, prop.k, metrica_cfg)
+        observables["step"] = paso
+        observables["t"] = paso * dt
+        if incluir_psi:
+            observables["psi"] = psi.copy()
+        yield observables
+
+        if paso >= steps:
+            break
+        tramo = min(every, steps - paso)
+        prop.evolve(psi, tramo)
+        paso += tramo
+
+
+def _iter_schrodinger_1d_espectral(config, every, incluir_psi):
+    if _con_absorcion(config):
+        raise ValueError("La capa absorbente no es compatible con el motor espectral")
+    L, N, T, dt = _parametros_espectrales(config)
+    steps = max(1, int(np.ceil(T / dt - 1e-9)))
+
+    x, dx = build_spatial_grid(L, N)
+    k = build_k_grid(N, dx)
+    V = build_potential_1d(x, config.get("potencial"))
+    psi0 = build_initial_state_1d(x, config.get("estado_inicial"), V)
+    prop = get_spectral_propagator(L, N, V)
+    metrica_cfg = config.get("metrica")
+
+    paso = 0
+    while True:
+        t = min(paso * dt, T)
+        psi = prop.evolve_to(psi0, [t])[0]
+        observables = measure_observables_1d(psi, x, k, metrica_cfg)
+        observables["step"] = paso
+        observables["t"] = t
+        if incluir_psi:
+            observables["psi"] = psi
+        yield observables
+
+        if paso >= steps:
+            break
+        paso = min(paso + every, steps)
+
+
+# ==========================
+# Resolución automática (N y dt)
+# ==========================
+#
+# Con "resolucion": "auto" (o {"tolerancia": tol}) se ignoran N y dt de la
+# config:
+#   - N parte de la menor potencia de 2 cuya frecuencia de Nyquist cubre
+#     el contenido espectral del estado inicial (todo salvo una fracción
+#     tol de la probabilidad en k) más el momento que puede ganar cayendo
+#     al mínimo del potencial, y se duplica mientras |P(N) - P(2N)| > tol
+#     (P = prob_region), para resolver también los saltos del potencial.
+#   - dt se elige por duplicación de pasos: se parte del dt máximo del
+#     integrador para ese potencial (_dt_max: mayor con orden alto si el
+#     potencial es suave) y se divide por 2 hasta que el error estimado de
+#     prob_region, 2^p / (2^p - 1) |P(dt) - P(dt/2)| para un integrador de
+#     orden p (4/3 con Strang), es <= tol.
+
+RESOLUCION_TOLERANCIA = 1e-3
+RESOLUCION_N_REFERENCIA = 2048
+RESOLUCION_CACHE_SIZE = 64
+# Máximo de simulaciones de prueba por selección (incluida la primera)
+RESOLUCION_MAX_PRUEBAS = 10
+_RESOLUCIONES = OrderedDict()
+
+
+def _resolucion(config):
+    """
+    Tolerancia pedida si la config usa resolución automática, o None.
+    """
+    res = config.get("resolucion")
+    if res is None or res is False:
+        return None
+    if res is True:
+        return RESOLUCION_TOLERANCIA
+    if isinstance(res, str):
+        if res.lower() != "auto":
+            raise ValueError(f"Resolución no soportada: {res}")
+        return RESOLUCION_TOLERANCIA
+    if isinstance(res, dict):
+        modo = str(res.get("modo", "auto")).lower()
+        if modo != "auto":
+            raise ValueError(f"Resolución no soportada: {modo}")
+        return float(res.get("tolerancia", RESOLUCION_TOLERANCIA))
+    raise ValueError(f"Resolución no soportada: {res}")
+
+
+def _config_concreta(config, N, dt):
+    concreta = {c: v for c, v in config.items() if c != "resolucion"}
+    concreta["N"] = int(N)
+    if dt is not None:
+        concreta["dt"] = float(dt)
+    return concreta
+
+
+def _elegir_N(config, tol):
+    """
+    Estimación inicial de N (potencia de 2, en [64, 2048]) a partir del
+    contenido espectral del estado inicial y del potencial.
+    Devuelve (N, k_requerido).
+    """
+    L = float(config.get("L", 20.0))
+    x, dx = build_spatial_grid(L, RESOLUCION_N_REFERENCIA)
+    k = build_k_grid(RESOLUCION_N_REFERENCIA, dx)
+    V = build_potential_1d(x, config.get("potencial"))
+    psi = build_initial_state_1d(x, config.get("estado_inicial"), V)
+
+    # Menor |k| tal que la probabilidad con |k| mayor es <= tol
+    potencia = np.abs(fft(psi)) ** 2
+    orden = np.argsort(np.abs(k))[::-1]
+    cola = np.cumsum(potencia[orden]) / np.sum(potencia)
+    fuera = np.searchsorted(cola, tol, side="right")
+    k_corte = float(np.abs(k[orden[min(fuera, k.size - 1)]]))
+
+    # Energía que puede pasar a cinética al caer al mínimo del potencial
+    V_medio = float(np.sum(np.abs(psi) ** 2 * V) * dx)
+    k_requerido = float(np.sqrt(k_corte ** 2 + 2.0 * max(0.0, V_medio - float(V.min()))))
+
+    N = 2 ** int(np.ceil(np.log2(max(1.0, L * k_requerido / np.pi))))
+    return _clamp(N, 64, 2048), k_requerido
+
+
+def _seleccionar_resolucion(config):
+    """
+    Elige N y dt para 'config' (ver arriba). Devuelve
+    (config concreta, info, salida del experimento elegido o None).
+
+    Se hacen como mucho RESOLUCION_MAX_PRUEBAS simulaciones. Si no se
+    alcanza la tolerancia (pruebas agotadas, N máximo o dt mínimo), se usa
+    la rejilla más fina probada y info lo dice: "cumple" es False y
+    "motivo" explica por qué. La selección se memoiza por config canónica;
+    las respuestas memoizadas llevan "memoizada": True.
+    """
+    tol = _resolucion(config)
+    clave = json.dumps(canonical_config(config), sort_keys=True)
+    guardada = _RESOLUCIONES.get(clave)
+    if guardada is not None:
+        _RESOLUCIONES.move_to_end(clave)
+        N, dt, info = guardada
+        return _config_concreta(config, N, dt), dict(info, memoizada=True), None
+
+    t0 = time.perf_counter()
+    espectral = _motor(config) == "espectral"
+    N, k_requerido = _elegir_N(config, tol)
+    info = {"modo": "auto", "tolerancia": tol, "N_estimado": N, "k_requerido": k_requerido}
+
+    dt = None
+    steps = None
+    if not espectral:
+        # Pasos como potencias de 2 por encima del mínimo con dt <= dt_max
+        orden = INTEGRADORES[_integrador(config)]["orden"]
+        richardson = 2.0 ** orden / (2.0 ** orden - 1.0)
+        _, _, T, _ = _limites_simulacion(config)
+        steps = int(np.ceil(T / _dt_max(config) - 1e-9))
+        dt = T / steps
+
+    def prueba(N, dt):
+        return run_schrodinger_1d(_config_concreta(config, N, dt))
+
+    # Verificación espacial: se duplica N mientras P(N) y P(2N) difieran
+    # más que tol (los potenciales con saltos convergen despacio en N)
+    gruesa = prueba(N, dt)
+    pruebas = 1
+    error_N = None
+    motivos = []
+    while error_N is None or error_N > tol:
+        if 2 * N > 2048:
+            motivos.append(f"N máximo (2048) alcanzado con error_N={error_N}")
+            break
+        if pruebas >= RESOLUCION_MAX_PRUEBAS:
+            motivos.append(f"pruebas agotadas ({pruebas}) sin converger en N")
+            break
+        fina = prueba(2 * N, dt)
+        pruebas += 1
+        error_N = abs(gruesa[0]["prob_region"] - fina[0]["prob_region"])
+        if error_N > tol:
+            N *= 2
+            gruesa = fina
+
+    # Paso temporal por duplicación de pasos
+    error_dt = None
+    if not espectral:
+        while error_dt is None or error_dt > tol:
+            if 2 * steps > MAX_STEPS or T / (2 * steps) < 1e-4:
+                motivos.append(f"dt mínimo alcanzado con error_dt={error_dt}")
+                break
+            if pruebas >= RESOLUCION_MAX_PRUEBAS:
+                motivos.append(f"pruebas agotadas ({pruebas}) sin converger en dt")
+                break
+            fina = prueba(N, T / (2 * steps))
+            pruebas += 1
+            error_dt = richardson * abs(gruesa[0]["prob_region"] - fina[0]["prob_region"])
+            if error_dt > tol:
+                steps *= 2
+                gruesa = fina
+        dt = T / steps
+
+    salida = gruesa
+    info.update({
+        "N": N,
+        "dt": dt,
+        "error_N": error_N,
+        "error_dt": error_dt,
+        "cumple": not motivos,
+        "motivo": "; ".join(motivos) or None,
+        "pruebas": pruebas,
+    })
+
+    info["segundos"] = time.perf_counter() - t0
+    _RESOLUCIONES[clave] = (N, dt, info)
+    while len(_RESOLUCIONES) > RESOLUCION_CACHE_SIZE:
+        _RESOLUCIONES.popitem(last=False)
+    return _config_concreta(config, N, dt), dict(info), salida
+
+
+def select_resolution(config):
+    """
+    Devuelve (config con N y dt concretos, info de la selección) para una
+    config con "resolucion": "auto". La selección se memoiza por config.
+    """
+    concreta, info, _ = _seleccionar_resolucion(config)
+    return concreta, info
+
+
+def _run_con_resolucion_automatica(config):
+    concreta, info, salida = _seleccionar_resolucion(config)
+    if salida is None:
+        salida = run_schrodinger_1d(concreta)
+    resultados, x, psi = salida
+    resultados["resolucion"] = info
+    return resultados, x, psi
+
+
+# ==========================
+# Despacho por modelo
+# ==========================
+
+def run_experiment(config):
+    """
+    Ejecuta la config con el modelo que indique "modelo".
+    El modelo 2D vive en quantum_core_2d y sólo se importa si se usa.
+
+    Devuelve (resultados, x, psi); en 2D x es la tupla (x, y).
+    """
+    modelo = _modelo(config)
+    if modelo == "schrodinger_2d":
+        import quantum_core_2d
+        return quantum_core_2d.run_schrodinger_2d(config)
+    return run_schrodinger_1d(config)
+
+
+def rejilla_de_resultados(resultados):
+    """
+    Reconstruye la rejilla espacial de unos resultados ya calculados
+    (p. ej. servidos desde caché), en el mismo formato que run_experiment.
+    """
+    if resultados.get("modelo") == "schrodinger_2d":
+        import quantum_core_2d
+        x, y, _, _ = quantum_core_2d.build_spatial_grid_2d(
+            resultados["L"], resultados["N"], resultados.get("Ly"), resultados.get("Ny")
+        )
+        return x, y
+    x, _ = build_spatial_grid(resultados["L"], resultados["N"])
+    return x
+
+
+if __name__ == "__main__":
+    # python -m quantum_core: trabajador JSONL (ver trabajador_fisica).
+    # Este módulo se registra como quantum_core para que el trabajador (vía
+    # cache_resultados) no lo importe otra vez, con sus cachés duplicadas.
+    import sys
+
+    sys.modules.setdefault("quantum_core", sys.modules[__name__])
+    import trabajador_fisica
+    sys.exit(trabajador_fisica.main())
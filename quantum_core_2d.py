@@ -0,0 +1,363 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+import quantum_core
+
+try:
+    import scipy.fft as _scipy_fft
+except ImportError:  # sin scipy (ver requirements.txt) las FFT usan NumPy (un hilo)
+    _scipy_fft = None
+    logging.warning("scipy no está instalado: las FFT 2D usarán NumPy con un solo hilo.")
+
+# ==========================
+# Núcleo cuántico 2D (split-step Fourier)
+# ==========================
+#
+# Misma estructura que el núcleo 1D: V/2 - K - V/2 con las mitades de V
+# contiguas fusionadas, fases precalculadas y buffers reservados una vez.
+# Las FFT 2D usan varios hilos con scipy.fft (workers) si está disponible.
+
+FFT_HILOS = int(os.environ.get("QUANTUM_FFT_HILOS", str(os.cpu_count() or 1)))
+MAX_STEPS_2D = 5000
+MAX_N_2D = 512
+
+
+def build_spatial_grid_2d(L, N, Ly=None, Ny=None):
+    """
+    Rejilla 2D en [-L/2, L/2) x [-Ly/2, Ly/2).
+    Devuelve x (N,), y (Ny,), dx, dy.
+    """
+    x, dx = quantum_core.build_spatial_grid(L, N)
+    y, dy = quantum_core.build_spatial_grid(L if Ly is None else Ly, N if Ny is None else Ny)
+    return x, y, dx, dy
+
+
+TIPOS_POTENCIAL_2D = (
+    "libre", "pozo", "barrera", "doble_rendija", "armonic", "armonico", "expresion",
+)
+TIPOS_ESTADO_2D = ("gauss", "gauss_momentum", "expresion")
+
+
+def build_potential_2d(x, y, pot_cfg):
+    """
+    Construye un potencial 2D (forma (len(x), len(y))).
+    Tipos soportados:
+        - "libre": V = 0
+        - "pozo": V = 0 en el rectángulo [x_min, x_max] x [y_min, y_max], V_out fuera
+        - "barrera": pared V0 en x_min <= x <= x_max (para todo y)
+        - "doble_rendija": pared de grosor 'grosor' centrada en x0 con dos
+          rendijas de anchura 'ancho' centradas en y = ±separacion/2
+        - "armonic": V = 0.5 * (kx (x - x0)^2 + ky (y - y0)^2)
+        - "expresion": V dado por pot_cfg["expresion"] en x, y
+    """
+    X, Y = np.meshgrid(x, y, indexing="ij")
+    V = np.zeros_like(X)
+    if pot_cfg is None:
+        return V
+
+    tipo = str(pot_cfg.get("tipo", "libre")).lower()
+
+    if tipo == "libre":
+        pass
+
+    elif tipo == "pozo":
+        x_min = float(pot_cfg.get("x_min", -1.0))
+        x_max = float(pot_cfg.get("x_max", 1.0))
+        y_min = float(pot_cfg.get("y_min", x_min))
+        y_max = float(pot_cfg.get("y_max", x_max))
+        V[:] = float(pot_cfg.get("V_out", 10.0))
+        dentro = (X >= x_min) & (X <= x_max) & (Y >= y_min) & (Y <= y_max)
+        V[dentro] = 0.0
+
+    elif tipo == "barrera":
+        x_min = float(pot_cfg.get("x_min", -0.5))
+        x_max = float(pot_cfg.get("x_max", 0.5))
+        V[(X >= x_min) & (X <= x_max)] = float(pot_cfg.get("V0", 5.0))
+
+    elif tipo == "doble_rendija":
+        x0 = float(pot_cfg.get("x0", 0.0))
+        grosor = float(pot_cfg.get("grosor", 0.3))
+        separacion = float(pot_cfg.get("separacion", 2.0))
+        ancho = float(pot_cfg.get("ancho", 0.5))
+        pared = np.abs(X - x0) <= grosor / 2.0
+        rendijas = (np.abs(Y - separacion / 2.0) <= ancho / 2.0) | (
+            np.abs(Y + separacion / 2.0) <= ancho / 2.0
+        )
+        V[pared & ~rendijas] = float(pot_cfg.get("V0", 50.0))
+
+    elif tipo == "armonic" or tipo == "armonico":
+        k = float(pot_cfg.get("k", 1.0))
+        kx = float(pot_cfg.get("kx", k))
+        ky = float(pot_cfg.get("ky", k))
+        x0 = float(pot_cfg.get("x0", 0.0))
+        y0 = float(pot_cfg.get("y0", 0.0))
+        V = 0.5 * (kx * (X - x0) ** 2 + ky * (Y - y0) ** 2)
+
+    elif tipo == "expresion":
+        V = quantum_core._evaluar_expresion(pot_cfg, x=X, y=Y)
+        if np.iscomplexobj(V):
+            if np.any(V.imag):
+                raise ValueError("El potencial debe ser real")
+            V = V.real
+        V = V.astype(float)
+
+    else:
+        raise ValueError(
+            f"Tipo de potencial 2D no soportado: {tipo!r} "
+            f"(admitidos: {', '.join(TIPOS_POTENCIAL_2D)})"
+        )
+
+    return V
+
+
+def build_initial_state_2d(x, y, init_cfg):
+    """
+    Paquete gaussiano 2D normalizado.
+        - "gauss": centrado en (x0, y0), sin momento
+        - "gauss_momentum": con momento (kx, ky) (k0 es sinónimo de kx)
+        - "expresion": psi(x, y) dado por init_cfg["expresion"]
+    """
+    init_cfg = init_cfg or {}
+    tipo = str(init_cfg.get("tipo", "gauss")).lower()
+    if tipo not in TIPOS_ESTADO_2D:
+        raise ValueError(
+            f"Tipo de estado inicial 2D no soportado: {tipo!r} "
+            f"(admitidos: {', '.join(TIPOS_ESTADO_2D)})"
+        )
+    x0 = float(init_cfg.get("x0", 0.0))
+    y0 = float(init_cfg.get("y0", 0.0))
+    sigma = float(init_cfg.get("sigma", 1.0))
+
+    X, Y = np.meshgrid(x, y, indexing="ij")
+    if tipo == "expresion":
+        psi = quantum_core._evaluar_expresion(init_cfg, x=X, y=Y).astype(np.complex128)
+    else:
+        psi = np.exp(-0.5 * (((X - x0) / sigma) ** 2 + ((Y - y0) / sigma) ** 2)).astype(
+            np.complex128
+        )
+    if tipo == "gauss_momentum":
+        kx = float(init_cfg.get("kx", init_cfg.get("k0", 2.0)))
+        ky = float(init_cfg.get("ky", 0.0))
+        psi *= np.exp(1j * (kx * X + ky * Y))
+
+    dx = x[1] - x[0]
+    dy = y[1] - y[0]
+    norm = np.sqrt(np.sum(np.abs(psi) ** 2) * dx * dy)
+    if norm > 0:
+        psi /= norm
+    elif tipo == "expresion":
+        raise ValueError("El estado inicial es nulo en toda la rejilla")
+    return psi
+
+
+def measure_probability_region_2d(psi, x, y, metrica_cfg):
+    """
+    Probabilidad en el rectángulo [x_min, x_max] x [y_min, y_max].
+    Los límites que falten abarcan todo el dominio en ese eje.
+    """
+    dA = (x[1] - x[0]) * (y[1] - y[0])
+    prob_density = np.abs(psi) ** 2
+    prob_total = float(np.sum(prob_density) * dA)
+
+    if metrica_cfg is None:
+        return prob_total, prob_total
+
+    tipo = str(metrica_cfg.get("tipo", "prob_region")).lower()
+    if tipo != "prob_region":
+        return prob_total, prob_total
+
+    mx = (x >= float(metrica_cfg.get("x_min", x.min()))) & (
+        x <= float(metrica_cfg.get("x_max", x.max()))
+    )
+    my = (y >= float(metrica_cfg.get("y_min", y.min()))) & (
+        y <= float(metrica_cfg.get("y_max", y.max()))
+    )
+    prob_region = float(np.sum(prob_density[np.ix_(mx, my)]) * dA)
+    return prob_region, prob_total
+
+
+class SplitStepPropagator2D:
+    """
+    Propagador split-step 2D con fases precalculadas y buffers propios.
+
+    evolve() copia psi al buffer del propagador, hace ahí todos los pasos
+    y copia el resultado de vuelta. Con scipy.fft las FFT 2D se hacen en
+    ese buffer con overwrite_x (pocketfft escribe en la entrada cuando es
+    complex128 contigua) y 'hilos' hilos, acotados a los núcleos
+    disponibles. Sin scipy se usa numpy.fft con out= y un segundo buffer
+    para el espacio de momentos.
+    """
+
+    def __init__(self, x, y, dt, V, hilos=FFT_HILOS):
+        self.dt = float(dt)
+        self.hilos = _hilos(hilos)
+        dx = x[1] - x[0]
+        dy = y[1] - y[0]
+        kx = quantum_core.build_k_grid(x.size, dx)
+        ky = quantum_core.build_k_grid(y.size, dy)
+        k2 = kx[:, None] ** 2 + ky[None, :] ** 2
+
+        self.kinetic_phase = np.exp(-0.5j * k2 * self.dt)
+        self.potential_half_phase = np.exp(-1j * V * self.dt / 2.0)
+        self.potential_full_phase = np.exp(-1j * V * self.dt)
+        self._buf = np.empty(V.shape, np.complex128)
+        self._buf_k = None if _scipy_fft is not None else np.empty(V.shape, np.complex128)
+
+    def _paso_cinetico(self, buf):
+        if _scipy_fft is not None:
+            psi_k = _scipy_fft.fft2(buf, workers=self.hilos, overwrite_x=True)
+            if psi_k is not buf:
+                buf[...] = psi_k
+            buf *= self.kinetic_phase
+            res = _scipy_fft.ifft2(buf, workers=self.hilos, overwrite_x=True)
+            if res is not buf:
+                buf[...] = res
+        elif quantum_core._FFT_CON_OUT:
+            # fftn/ifftn: ifft2 con out= da resultados erróneos en algunas
+            # versiones de NumPy 2.x
+            np.fft.fftn(buf, out=self._buf_k)
+            self._buf_k *= self.kinetic_phase
+            np.fft.ifftn(self._buf_k, out=buf)
+        else:
+            buf[...] = np.fft.ifft2(np.fft.fft2(buf) * self.kinetic_phase)
+
+    def evolve(self, psi, steps):
+        if steps <= 0:
+            return psi
+        if psi.shape != self._buf.shape:
+            raise ValueError("psi no coincide con la forma del propagador")
+        buf = self._buf
+        np.multiply(psi, self.potential_half_phase, out=buf)
+        for n in range(steps):
+            self._paso_cinetico(buf)
+            if n < steps - 1:
+                buf *= self.potential_full_phase
+            else:
+                buf *= self.potential_half_phase
+        psi[...] = buf
+        return psi
+
+
+def _hilos(hilos):
+    """
+    Hilos de FFT pedidos, acotados a [1, núcleos de la máquina].
+    """
+    return quantum_core._clamp(int(hilos), 1, os.cpu_count() or 1)
+
+
+def _parametros_simulacion_2d(config):
+    L = float(config.get("L", 20.0))
+    N = quantum_core._clamp(int(config.get("N", 256)), 32, MAX_N_2D)
+    Ly = float(config.get("Ly", L))
+    Ny = quantum_core._clamp(int(config.get("Ny", N)), 32, MAX_N_2D)
+    T = max(0.1, min(20.0, float(config.get("T", 5.0))))
+    dt = max(1e-4, min(0.05, float(config.get("dt", 0.01))))
+
+    # T efectivo: el que se simula de verdad con pasos enteros de dt
+    steps = min(MAX_STEPS_2D, max(1, int(round(T / dt))))
+    return L, N, Ly, Ny, steps * dt, dt, steps
+
+
+# Opciones que sólo implementa el núcleo 1D, con el valor que equivale a lo
+# que hace el 2D (split-step de Strang); None = ninguno.
+OPCIONES_SOLO_1D = {
+    "motor": "split_step",
+    "integrador": "strang",
+    "absorcion": None,
+    "resolucion": None,
+}
+
+
+def _validar_opciones_2d(config):
+    """
+    Rechaza las opciones 1D que el núcleo 2D no implementa, en lugar de
+    ignorarlas en silencio.
+    """
+    for opcion, admitido in OPCIONES_SOLO_1D.items():
+        valor = config.get(opcion)
+        if valor is None:
+            continue
+        if admitido is None or str(valor).lower() != admitido:
+            raise ValueError(
+                f"Opción no soportada en schrodinger_2d: {opcion}={valor!r}"
+            )
+
+
+def canonical_config_2d(config):
+    """
+    Forma canónica de una config 2D (ver quantum_core.canonical_config).
+    "hilos" no cambia la física, así que no forma parte de ella.
+    """
+    _validar_opciones_2d(config)
+    L, N, Ly, Ny, _, dt, steps = _parametros_simulacion_2d(config)
+    canon = {
+        c: quantum_core._valor_canonico(v)
+        for c, v in config.items()
+        if c not in ("modelo", "L", "N", "Ly", "Ny", "T", "dt", "hilos")
+    }
+    quantum_core._expresiones_canonicas(canon, config, ("x", "y"))
+    canon.update({
+        "modelo": "schrodinger_2d",
+        "L": L, "N": N, "Ly": Ly, "Ny": Ny, "dt": dt, "steps": steps,
+    })
+    return canon
+
+
+def run_schrodinger_2d(config):
+    """
+    Ejecuta un experimento de Schrödinger 2D con split-step Fourier.
+
+    config: como en 1D, con "modelo": "schrodinger_2d" y, opcionalmente,
+    "Ly", "Ny" (por defecto iguales a L, N) y "hilos" para las FFT.
+    La métrica prob_region admite x_min, x_max, y_min, y_max.
+
+    Devuelve (resultados, (x, y), psi) con psi de forma (N, Ny).
+    """
+    if config is None:
+        raise ValueError("config no puede ser None")
+    modelo = str(config.get("modelo", "schrodinger_2d")).lower()
+    if modelo != "schrodinger_2d":
+        raise ValueError(f"Modelo no soportado: {modelo}")
+    _validar_opciones_2d(config)
+
+    L, N, Ly, Ny, T, dt, steps = _parametros_simulacion_2d(config)
+    hilos = _hilos(config.get("hilos", FFT_HILOS))
+
+    t0 = time.perf_counter()
+    x, y, dx, dy = build_spatial_grid_2d(L, N, Ly, Ny)
+    V = build_potential_2d(x, y, config.get("potencial"))
+    psi = build_initial_state_2d(x, y, config.get("estado_inicial"))
+    prop = SplitStepPropagator2D(x, y, dt, V, hilos=hilos)
+    t1 = time.perf_counter()
+
+    prop.evolve(psi, steps)
+    t2 = time.perf_counter()
+
+    norm = np.sqrt(np.sum(np.abs(psi) ** 2) * dx * dy)
+    if norm > 0:
+        psi /= norm
+    prob_region, prob_total = measure_probability_region_2d(
+        psi, x, y, config.get("metrica")
+    )
+    t3 = time.perf_counter()
+
+    resultados = {
+        "modelo": "schrodinger_2d",
+        "L": L,
+        "N": N,
+        "Ly": Ly,
+        "Ny": Ny,
+        "T": T,
+        "dt": dt,
+        "steps": steps,
+        "motor": "split_step",
+        "prob_region": prob_region,
+        "prob_total": prob_total,
+        "METRICA_CONTROL": prob_region,
+        "timing": quantum_core._bloque_timing(t1 - t0, t2 - t1, t3 - t2, steps),
+    }
+    resultados["timing"]["hilos_fft"] = hilos if _scipy_fft is not None else 1
+    return resultados, (x, y), psi
@@ -0,0 +1,284 @@
+import glob
+import gzip
+import json
+import logging
+import lzma
+import os
+import re
+import shutil
+import threading
+import time
+
+try:
+    from compression import zstd as _zstd  # Python >= 3.14
+except ImportError:
+    _zstd = None
+
+# ==========================
+# Registro JSONL con búfer, rotación y compresión
+# ==========================
+#
+# Un EscritorJSONL mantiene abierto el fichero activo (p. ej.
+# registros_experimentos.jsonl) y acumula líneas en memoria hasta vaciarlas
+# de una vez. Cuando el segmento activo supera max_bytes o max_registros se
+# rota: se renombra a <ruta>.NNNNNN y se comprime a <ruta>.NNNNNN.gz
+# (o .xz / .zst). leer_registros(ruta) recorre los segmentos rotados en
+# orden y después el activo, como si fuera un único fichero.
+#
+# Política de fsync:
+#   - "nunca": sólo flush al sistema operativo.
+#   - "rotacion": fsync al rotar y al cerrar (por defecto).
+#   - "vaciado": fsync en cada vaciado del búfer.
+
+COMPRESORES = {
+    "gzip": (".gz", gzip.open),
+    "xz": (".xz", lzma.open),
+    "ninguna": ("", None),
+}
+if _zstd is not None:
+    COMPRESORES["zstd"] = (".zst", _zstd.open)
+
+POLITICAS_FSYNC = ("nunca", "rotacion", "vaciado")
+
+MAX_BYTES = 64 * 1024 * 1024
+LINEAS_POR_VACIADO = 16
+SEGUNDOS_POR_VACIADO = 30.0
+# Segmentos rotados que se conservan por defecto: con MAX_BYTES son unos
+# 2 GB sin comprimir. 0 o None los conserva todos (uso de disco sin límite)
+MAX_SEGMENTOS = 32
+
+_SEGMENTO = re.compile(r"\.(\d{6})(\.gz|\.xz|\.zst)?")
+
+
+def segmentos(ruta):
+    """
+    Segmentos rotados de 'ruta' como [(numero, ruta_segmento)] en orden.
+    Si una rotación se interrumpió y quedan la versión sin comprimir y la
+    comprimida del mismo segmento, se usa la sin comprimir (siempre completa).
+    """
+    encontrados = {}
+    for candidato in glob.glob(glob.escape(ruta) + ".*"):
+        m = _SEGMENTO.fullmatch(candidato[len(ruta):])
+        if not m:
+            continue
+        numero = int(m.group(1))
+        if numero not in encontrados or m.group(2) is None:
+            encontrados[numero] = candidato
+    return sorted(encontrados.items())
+
+
+def _abrir_lectura(ruta_segmento):
+    for extension, abrir in COMPRESORES.values():
+        if extension and ruta_segmento.endswith(extension):
+            return abrir(ruta_segmento, "rt", encoding="utf-8")
+    if ruta_segmento.endswith(".zst"):
+        raise ValueError(f"Segmento zstd sin soporte en este Python: {ruta_segmento}")
+    return open(ruta_segmento, "r", encoding="utf-8")
+
+
+def leer_registros(ruta):
+    """
+    Genera los registros (objetos JSON) de todos los segmentos de 'ruta',
+    del más antiguo al activo. Las líneas que no son JSON válido (p. ej. la
+    última, si el proceso murió escribiéndola) se saltan.
+    """
+    rutas = [r for _, r in segmentos(ruta)]
+    if os.path.exists(ruta):
+        rutas.append(ruta)
+    invalidas = 0
+    for ruta_segmento in rutas:
+        with _abrir_lectura(ruta_segmento) as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    yield json.loads(linea)
+                except ValueError:
+                    invalidas += 1
+    if invalidas:
+        logging.warning(f"{invalidas} líneas no válidas ignoradas al leer {ruta}.")
+
+
+def _comprimir(ruta_segmento, compresion):
+    """
+    Comprime un segmento rotado: escribe a un temporal, lo renombra y sólo
+    entonces borra el original, de modo que ninguna interrupción pierde datos.
+    """
+    extension, abrir = COMPRESORES[compresion]
+    if abrir is None:
+        return ruta_segmento
+    destino = ruta_segmento + extension
+    tmp = destino + ".tmp"
+    with open(ruta_segmento, "rb") as origen, abrir(tmp, "wb") as comprimido:
+        shutil.copyfileobj(origen, comprimido, 1024 * 1024)
+    os.replace(tmp, destino)
+    os.remove(ruta_segmento)
+    return destino
+
+
+class EscritorJSONL:
+    """
+    Escritor de larga duración para un fichero JSONL con rotación.
+
+    escribir() sólo añade la línea al búfer; se vuelca al fichero (una
+    escritura por vaciado) cuando hay 'lineas_por_vaciado' líneas o han
+    pasado 'segundos_por_vaciado' desde el último vaciado, y siempre al
+    rotar y al cerrar. Un hilo en segundo plano vacía el búfer cada
+    'segundos_por_vaciado' aunque no llegue ningún registro más, para que
+    un escritor inactivo no retenga líneas indefinidamente. Se conservan
+    los max_segmentos segmentos rotados más recientes (0 o None: todos,
+    sin límite de disco).
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, ruta, max_bytes=MAX_BYTES, max_registros=None,
+                 lineas_por_vaciado=LINEAS_POR_VACIADO,
+                 segundos_por_vaciado=SEGUNDOS_POR_VACIADO,
+                 fsync="rotacion", compresion="gzip", max_segmentos=MAX_SEGMENTOS):
+        if fsync not in POLITICAS_FSYNC:
+            raise ValueError(f"Política de fsync no soportada: {fsync}")
+        if compresion not in COMPRESORES:
+            raise ValueError(f"Compresión no soportada: {compresion}")
+        self.ruta = ruta
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.max_registros = int(max_registros) if max_registros else None
+        self.lineas_por_vaciado = max(1, int(lineas_por_vaciado))
+        self.segundos_por_vaciado = float(segundos_por_vaciado)
+        self.fsync = fsync
+        self.compresion = compresion
+        self.max_segmentos = int(max_segmentos) if max_segmentos else None
+
+        self._lock = threading.Lock()
+        self._bufer = []
+        self._ultimo_vaciado = time.monotonic()
+        self._f = None
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._recuperar_segmentos()
+        self._abrir()
+
+        self._parar = threading.Event()
+        self._hilo = None
+        if self.segundos_por_vaciado > 0:
+            self._hilo = threading.Thread(
+                target=self._vaciado_periodico,
+                name=f"vaciado-{os.path.basename(ruta)}",
+                daemon=True,
+            )
+            self._hilo.start()
+
+    # ---------- estado del segmento activo ----------
+
+    def _abrir(self):
+        self._f = open(self.ruta, "ab")
+        self._bytes = self._f.seek(0, os.SEEK_END)
+        self._registros = 0
+        if self.max_registros and self._bytes:
+            with open(self.ruta, "rb") as f:
+                self._registros = sum(1 for _ in f)
+
+    def _recuperar_segmentos(self):
+        """
+        Termina de comprimir los segmentos que una rotación interrumpida
+        dejó sin comprimir.
+        """
+        if self.compresion == "ninguna":
+            return
+        for _, ruta_segmento in segmentos(self.ruta):
+            if _SEGMENTO.fullmatch(ruta_segmento[len(self.ruta):]).group(2) is None:
+                _comprimir(ruta_segmento, self.compresion)
+
+    # ---------- escritura ----------
+
+    def escribir(self, registro):
+        linea = (json.dumps(registro, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._f is None:
+                raise ValueError("El escritor está cerrado")
+            self._bufer.append(linea)
+            pendiente = sum(len(l) for l in self._bufer)
+            if (self.max_bytes and self._bytes + pendiente >= self.max_bytes) or (
+                self.max_registros and self._registros + len(self._bufer) >= self.max_registros
+            ):
+                self._rotar()
+            elif (len(self._bufer) >= self.lineas_por_vaciado
+                  or time.monotonic() - self._ultimo_vaciado >= self.segundos_por_vaciado):
+                self._vaciar()
+
+    def _vaciar(self, forzar_fsync=False):
+        if self._bufer:
+            datos = b"".join(self._bufer)
+            self._f.write(datos)
+            self._bytes += len(datos)
+            self._registros += len(self._bufer)
+            self._bufer = []
+        self._f.flush()
+        if self.fsync == "vaciado" or (forzar_fsync and self.fsync != "nunca"):
+            os.fsync(self._f.fileno())
+        self._ultimo_vaciado = time.monotonic()
+
+    def vaciar(self):
+        with self._lock:
+            if self._f is not None:
+                self._vaciar()
+
+    def _vaciado_periodico(self):
+        """
+        Hilo de fondo: vacía el búfer cuando lleva 'segundos_por_vaciado'
+        sin vaciarse, aunque no haya escrituras nuevas.
+        """
+        while not self._parar.wait(self.segundos_por_vaciado / 2):
+            with self._lock:
+                if (self._f is not None and self._bufer
+                        and time.monotonic() - self._ultimo_vaciado >= self.segundos_por_vaciado):
+                    try:
+                        self._vaciar()
+                    except OSError as e:
+                        logging.error(f"No se pudo vaciar {self.ruta}: {e}")
+
+    def _rotar(self):
+        self._vaciar(forzar_fsync=True)
+        self._f.close()
+        if self._bytes:
+            existentes = segmentos(self.ruta)
+            numero = existentes[-1][0] + 1 if existentes else 1
+            ruta_segmento = f"{self.ruta}.{numero:06d}"
+            os.replace(self.ruta, ruta_segmento)
+            _comprimir(ruta_segmento, self.compresion)
+            self._podar()
+        self._abrir()
+
+    def rotar(self):
+        with self._lock:
+            if self._f is not None:
+                self._rotar()
+
+    def _podar(self):
+        if not self.max_segmentos:
+            return
+        existentes = segmentos(self.ruta)
+        for _, ruta_segmento in existentes[:-self.max_segmentos]:
+            os.remove(ruta_segmento)
+            logging.info(
+                f"Segmento {ruta_segmento} eliminado (se conservan los "
+                f"{self.max_segmentos} más recientes)."
+            )
+
+    def cerrar(self):
+        self._parar.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+        with self._lock:
+            if self._f is None:
+                return
+            self._vaciar(forzar_fsync=True)
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
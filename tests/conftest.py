@@ -0,0 +1,46 @@
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+# Los módulos del laboratorio viven en la raíz del repositorio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _config_base(**cambios):
+    config = {
+        "modelo": "schrodinger_1d",
+        "L": 20.0,
+        "N": 256,
+        "T": 1.0,
+        "dt": 0.01,
+        "potencial": {"tipo": "barrera", "x_min": -0.5, "x_max": 0.5, "V0": 5.0},
+        "estado_inicial": {"tipo": "gauss_momentum", "x0": -4.0, "sigma": 0.7, "k0": 2.0},
+        "metrica": {"tipo": "prob_region", "x_min": 0.0, "x_max": 5.0},
+    }
+    config.update(cambios)
+    return config
+
+
+@pytest.fixture
+def config_base():
+    """
+    Config 1D de referencia (barrera + paquete con momento); los argumentos
+    sustituyen claves de primer nivel: config_base(T=2.0).
+    """
+    return _config_base
+
+
+@pytest.fixture(autouse=True)
+def cache_autoestados(tmp_path, monkeypatch):
+    """
+    Las bases de autoestados del motor espectral se guardan en un
+    directorio temporal de cada test, no en laboratorio_codigo/.
+    """
+    import quantum_core
+
+    directorio = tmp_path / "autoestados"
+    monkeypatch.setattr(quantum_core, "EIGEN_CACHE_DIR", str(directorio))
+    monkeypatch.setattr(quantum_core, "_BASES_ESPECTRALES", OrderedDict())
+    return directorio
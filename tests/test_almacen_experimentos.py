@@ -0,0 +1,102 @@
+import json
+import sqlite3
+
+import pytest
+
+import almacen_experimentos
+import registro_jsonl
+
+
+def registro(ciclo, potencial="barrera", estado="gauss_momentum", descubrimiento=False):
+    return {
+        "ciclo": ciclo,
+        "config": {"potencial": {"tipo": potencial}, "estado_inicial": {"tipo": estado}},
+        "resultados": {"prob_region": ciclo / 10.0},
+        "evaluacion": {"metrica_relevancia": ciclo, "es_descubrimiento": descubrimiento},
+    }
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = almacen_experimentos.AlmacenExperimentos(str(tmp_path / "experimentos.sqlite"))
+    yield almacen
+    almacen.cerrar()
+
+
+def test_insertar_y_recuperar(almacen):
+    assert almacen.contar() == 0 and almacen.ultimo_ciclo() == 0
+    for ciclo in range(1, 6):
+        almacen.guardar(registro(ciclo))
+
+    assert almacen.contar() == 5
+    assert almacen.ultimo_ciclo() == 5
+    assert almacen.por_ciclo(3) == [registro(3)]
+    assert almacen.por_ciclo(9) == []
+    assert [r["ciclo"] for r in almacen.ultimos(3)] == [3, 4, 5]
+
+
+def test_insertar_sin_confirmar_se_deshace(almacen):
+    almacen.guardar(registro(1))
+    almacen.insertar(registro(2))
+    almacen.conn.rollback()
+    assert [r["ciclo"] for r in almacen.ultimos(10)] == [1]
+
+
+def test_consultar_por_parametros(almacen):
+    almacen.guardar(registro(1, "barrera"))
+    almacen.guardar(registro(2, "Pozo", descubrimiento=True))
+    almacen.guardar(registro(3, "pozo", estado="gauss"))
+    almacen.guardar(registro(4, "barrera", descubrimiento=True))
+
+    # Del más reciente al más antiguo; el tipo no distingue mayúsculas
+    assert [r["ciclo"] for r in almacen.consultar(potencial="POZO")] == [3, 2]
+    assert [r["ciclo"] for r in almacen.consultar(solo_descubrimientos=True)] == [4, 2]
+    assert [r["ciclo"] for r in almacen.consultar(potencial="pozo", estado_inicial="gauss")] == [3]
+    assert [r["ciclo"] for r in almacen.consultar(limite=2)] == [4, 3]
+    assert almacen.consultar(potencial="armonic") == []
+
+    nuevos = almacen.nuevos(2)
+    assert [r["ciclo"] for _, r in nuevos] == [3, 4]
+    assert [r["ciclo"] for _, r in almacen.nuevos(nuevos[-1][0])] == []
+
+
+def test_reabrir_base_wal(tmp_path):
+    ruta = str(tmp_path / "experimentos.sqlite")
+    almacen = almacen_experimentos.AlmacenExperimentos(ruta)
+    almacen.guardar(registro(1))
+
+    # Un segundo lector (otro proceso) ve lo confirmado mientras sigue abierta
+    otra = almacen_experimentos.AlmacenExperimentos(ruta)
+    assert otra.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert otra.ultimo_ciclo() == 1
+    otra.guardar(registro(2))
+    otra.cerrar()
+    almacen.cerrar()
+
+    reabierta = almacen_experimentos.AlmacenExperimentos(ruta)
+    try:
+        assert [r["ciclo"] for r in reabierta.ultimos(10)] == [1, 2]
+    finally:
+        reabierta.cerrar()
+    # WAL es persistente: queda en la cabecera de la base
+    with sqlite3.connect(ruta) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_importa_jsonl_solo_si_esta_vacio(tmp_path):
+    jsonl = str(tmp_path / "registros.jsonl")
+    with registro_jsonl.EscritorJSONL(jsonl, max_registros=2, segundos_por_vaciado=0) as e:
+        for ciclo in range(1, 6):
+            e.escribir(registro(ciclo))
+    ruta = str(tmp_path / "experimentos.sqlite")
+
+    almacen = almacen_experimentos.AlmacenExperimentos(ruta, importar_jsonl=jsonl)
+    assert [r["ciclo"] for r in almacen.ultimos(10)] == [1, 2, 3, 4, 5]
+    almacen.cerrar()
+    # Al reabrir no se importa otra vez
+    almacen = almacen_experimentos.AlmacenExperimentos(ruta, importar_jsonl=jsonl)
+    assert almacen.contar() == 5
+    assert json.loads(
+        almacen.conn.execute("SELECT datos FROM registros WHERE ciclo = 5").fetchone()[0]
+    ) == registro(5)
+    almacen.cerrar()
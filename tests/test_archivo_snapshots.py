@@ -0,0 +1,39 @@
+import numpy as np
+
+import archivo_snapshots
+
+
+def test_psi_1d_y_2d_conservan_su_forma(tmp_path):
+    archivo = archivo_snapshots.ArchivoSnapshots(str(tmp_path), precision="complex128")
+    psi_1d = np.arange(8) + 1j
+    psi_2d = (np.arange(12) + 2j).reshape(3, 4)
+    archivo.anadir(1, psi_1d, t=0.5, L=10.0)
+    archivo.anadir(2, psi_2d, t=1.0, L=20.0)
+
+    np.testing.assert_array_equal(archivo.leer(1), psi_1d)
+    np.testing.assert_array_equal(archivo.leer(2), psi_2d)
+    assert archivo.snapshots(2)[0][:2] == (1.0, 20.0)
+    assert (tmp_path / "snapshots.idx").stat().st_size == 2 * archivo_snapshots.INDICE_DTYPE.itemsize
+
+
+def test_ciclos_desordenados_y_reapertura(tmp_path):
+    archivo = archivo_snapshots.ArchivoSnapshots(str(tmp_path))
+    for ciclo in (3, 1, 2):
+        archivo.anadir(ciclo, np.full(4, ciclo, dtype=np.complex64))
+    archivo.anadir_serie(1, [np.zeros(4), np.ones(4)], [0.1, 0.2])
+
+    reabierto = archivo_snapshots.ArchivoSnapshots(str(tmp_path))
+    assert reabierto.ultimo_ciclo() == 3
+    assert list(reabierto.ciclos()) == [1, 2, 3]
+    assert [t for t, _, _ in reabierto.snapshots(1)] == [0.0, 0.1, 0.2]
+    np.testing.assert_array_equal(reabierto.leer(1), np.ones(4))
+
+
+def test_compactacion_conserva_los_ciclos_mas_altos(tmp_path):
+    psi = np.zeros(1024, dtype=np.complex64)
+    archivo = archivo_snapshots.ArchivoSnapshots(str(tmp_path), max_bytes=4 * psi.nbytes)
+    for ciclo in range(1, 11):
+        archivo.anadir(ciclo, psi)
+    assert archivo.ultimo_ciclo() == 10
+    assert len(archivo.ciclos()) <= 4
+    assert 1 not in archivo.ciclos()
@@ -0,0 +1,41 @@
+import pytest
+
+import barrido
+
+pytest.importorskip("pandas")
+
+
+def _spec(config_base, tiempos):
+    return {
+        "base": config_base(N=128),
+        "modo": "rejilla",
+        "parametros": {"potencial.V0": [3.0], "T": tiempos},
+    }
+
+
+def test_expandir_asigna_claves_anidadas(config_base):
+    puntos = list(barrido.expandir_barrido(_spec(config_base, [0.1, 0.2])))
+    assert [p for p, _, _ in puntos] == [0, 1]
+    _, valores, config = puntos[1]
+    assert valores == {"potencial.V0": 3.0, "T": 0.2}
+    assert config["potencial"]["V0"] == 3.0
+    assert config["T"] == 0.2
+
+
+def test_ampliar_y_reanudar_barrido(config_base, tmp_path):
+    salida = str(tmp_path / "barrido.csv")
+
+    assert barrido.ejecutar_barrido(_spec(config_base, [0.1, 0.2]), salida, procesos=1) == 2
+    # Relanzar el mismo barrido no recalcula nada
+    assert barrido.ejecutar_barrido(_spec(config_base, [0.1, 0.2]), salida, procesos=1) == 0
+    # Ampliarlo sólo ejecuta el punto nuevo
+    assert barrido.ejecutar_barrido(_spec(config_base, [0.1, 0.2, 0.3]), salida, procesos=1) == 1
+
+    df = barrido.SalidaColumnar(salida).leer().sort_values("punto")
+    assert list(df["punto"]) == [0, 1, 2]
+    # Los parámetros barridos no quedan pisados por los resultados homónimos
+    assert list(df["param.T"]) == [0.1, 0.2, 0.3]
+    assert list(df["param.potencial.V0"]) == [3.0, 3.0, 3.0]
+    assert list(df["T"]) == pytest.approx([0.1, 0.2, 0.3])
+    assert list(df["N"]) == [128, 128, 128]
+    assert df["error"].isna().all()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+import bench_quantum_core
+
+
+def informe(**segundos):
+    return {"casos": [{"nombre": nombre, "segundos": s} for nombre, s in segundos.items()]}
+
+
+def test_comparar_con_referencia():
+    referencia = informe(a=1.0, b=1.0, c=0.0)
+    actual = informe(a=1.1, b=1.5, c=2.0, nuevo=9.0)
+
+    # c no tiene tiempo de referencia y 'nuevo' no está en ella: no cuentan
+    assert bench_quantum_core.comparar_con_referencia(actual, referencia) == [
+        ("b", 1.0, 1.5, 1.5)
+    ]
+    assert bench_quantum_core.comparar_con_referencia(actual, referencia, tolerancia=0.05) == [
+        ("a", 1.0, 1.1, pytest.approx(1.1)), ("b", 1.0, 1.5, 1.5)
+    ]
+    assert bench_quantum_core.comparar_con_referencia(actual, referencia, tolerancia=1.0) == []
+
+
+@pytest.mark.parametrize("t_referencia, codigo", [(0.5, 1), (2.0, 0)])
+def test_main_compara_con_fichero_de_referencia(tmp_path, monkeypatch, capsys,
+                                                t_referencia, codigo):
+    monkeypatch.setattr(
+        bench_quantum_core, "ejecutar_benchmarks", lambda *args: informe(evolucion=1.0)
+    )
+    ruta = tmp_path / "referencia.json"
+    ruta.write_text(json.dumps(informe(evolucion=t_referencia)), encoding="utf-8")
+
+    assert bench_quantum_core.main(["--comparar", str(ruta)]) == codigo
+    salida = capsys.readouterr().out
+    if codigo:
+        assert "REGRESIÓN evolucion: 0.5000s -> 1.0000s (x2.00)" in salida
+    else:
+        assert "Sin regresiones" in salida
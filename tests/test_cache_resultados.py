@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+import cache_resultados
+
+
+def config_con(V0):
+    return {
+        "modelo": "schrodinger_1d",
+        "L": 20.0,
+        "N": 128,
+        "T": 0.1,
+        "dt": 0.01,
+        "potencial": {"tipo": "barrera", "x_min": -0.5, "x_max": 0.5, "V0": V0},
+        "estado_inicial": {"tipo": "gauss", "x0": 0.0, "sigma": 1.0},
+        "metrica": {"tipo": "prob_region", "x_min": 0.0, "x_max": 5.0},
+    }
+
+
+def bytes_en_disco(directorio):
+    return sum(e.stat().st_size for e in os.scandir(directorio) if e.is_file())
+
+
+def test_guardar_y_obtener(tmp_path):
+    cache = cache_resultados.CacheResultados(str(tmp_path))
+    psi = np.arange(4, dtype=np.complex128)
+    cache.guardar(config_con(1.0), {"prob_region": 0.5}, psi)
+
+    resultados, leido = cache.obtener(config_con(1.0))
+    assert resultados == {"prob_region": 0.5}
+    np.testing.assert_array_equal(leido, psi)
+    assert cache.obtener(config_con(2.0)) is None
+
+
+def test_limite_global_entre_procesos(tmp_path):
+    # Dos instancias sobre el mismo directorio hacen de dos procesos
+    psi = np.random.default_rng(0).standard_normal(2048).astype(np.complex128)
+    una = cache_resultados.CacheResultados(str(tmp_path), guardar_psi=True)
+    una.guardar(config_con(0.0), {"i": 0}, psi)
+    tam_entrada = bytes_en_disco(tmp_path)
+    max_bytes = int(4.5 * tam_entrada)
+    una.max_bytes = max_bytes
+    otra = cache_resultados.CacheResultados(str(tmp_path), max_bytes=max_bytes)
+
+    for i in range(1, 12):
+        (una if i % 2 else otra).guardar(config_con(float(i)), {"i": i}, psi)
+
+    assert bytes_en_disco(tmp_path) <= max_bytes
+    # La más reciente sobrevive, las más antiguas no
+    assert una.obtener(config_con(11.0)) is not None
+    assert otra.obtener(config_con(0.0)) is None
+
+
+def test_los_aciertos_de_otro_proceso_cuentan_para_el_lru(tmp_path):
+    psi = np.random.default_rng(0).standard_normal(2048).astype(np.complex128)
+    una = cache_resultados.CacheResultados(str(tmp_path))
+    for i in range(3):
+        una.guardar(config_con(float(i)), {"i": i}, psi)
+    una.max_bytes = int(3.5 * bytes_en_disco(tmp_path) / 3)
+
+    # Orden en disco 0, 1, 2; otro proceso usa la 0 justo antes del desalojo
+    for i in range(3):
+        clave = cache_resultados.clave_config(config_con(float(i)))
+        for extension in (".json", ".npz"):
+            os.utime(os.path.join(tmp_path, clave + extension), (i, i))
+    otra = cache_resultados.CacheResultados(str(tmp_path))
+    assert otra.obtener(config_con(0.0)) is not None
+
+    una.guardar(config_con(3.0), {"i": 3}, psi)
+    assert una.obtener(config_con(0.0)) is not None
+    assert una.obtener(config_con(1.0)) is None
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import almacen_experimentos
+import cola_trabajo
+
+
+def abrir_cola(ruta, **opciones):
+    # Cada cola con su propia conexión hace de un proceso distinto
+    return cola_trabajo.ColaTrabajo(almacen_experimentos.AlmacenExperimentos(ruta), **opciones)
+
+
+def test_cada_trabajo_se_reclama_una_sola_vez(tmp_path):
+    ruta = str(tmp_path / "lab.sqlite")
+    ciclos = abrir_cola(ruta).encolar([{"i": i} for i in range(40)])
+    reclamados = {}
+    errores = []
+
+    def trabajador(nombre):
+        try:
+            cola = abrir_cola(ruta)
+            while True:
+                trabajos = cola.reclamar("fisica", nombre, n=3)
+                if not trabajos:
+                    return
+                reclamados.setdefault(nombre, []).extend(t.ciclo for t in trabajos)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=trabajador, args=(f"fisica-{i}",)) for i in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores
+    todos = [c for lista in reclamados.values() for c in lista]
+    assert sorted(todos) == ciclos
+
+
+def test_lease_caducado_se_vuelve_a_reclamar(tmp_path):
+    ruta = str(tmp_path / "lab.sqlite")
+    una = abrir_cola(ruta, lease_segundos=0.05)
+    otra = abrir_cola(ruta, lease_segundos=0.05)
+    (ciclo,) = una.encolar([{"i": 0}])
+
+    assert [t.ciclo for t in una.reclamar("fisica", "a")] == [ciclo]
+    assert otra.reclamar("fisica", "b") == []
+
+    time.sleep(0.1)
+    (trabajo,) = otra.reclamar("fisica", "b")
+    assert trabajo.ciclo == ciclo and trabajo.intentos == 2
+    # El primer propietario ya no puede completar ni renovar
+    assert not una.completar_fisica(ciclo, "a", {"prob_region": 0.1})
+    assert not una.renovar(ciclo, "a", "fisica")
+    assert otra.completar_fisica(ciclo, "b", {"prob_region": 0.2})
+
+    (trabajo,) = una.reclamar("evaluacion", "a")
+    assert trabajo.resultados == {"prob_region": 0.2}
+
+
+def test_renovar_mantiene_el_lease(tmp_path):
+    ruta = str(tmp_path / "lab.sqlite")
+    una = abrir_cola(ruta, lease_segundos=0.2)
+    otra = abrir_cola(ruta, lease_segundos=0.2)
+    (ciclo,) = una.encolar([{"i": 0}])
+    una.reclamar("fisica", "a")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert una.renovar(ciclo, "a", "fisica")
+        assert otra.reclamar("fisica", "b") == []
+
+
+def test_intentos_agotados_marcan_el_trabajo_como_fallido(tmp_path):
+    cola = abrir_cola(str(tmp_path / "lab.sqlite"), lease_segundos=0.01, max_intentos=2)
+    cola.encolar([{"i": 0}])
+    for _ in range(2):
+        assert cola.reclamar("fisica", "a")
+        time.sleep(0.02)
+    assert cola.reclamar("fisica", "a") == []
+    assert cola.resumen() == {"fallido": 1}
+
+
+def test_registro_exactamente_una_vez(tmp_path):
+    ruta = str(tmp_path / "lab.sqlite")
+    una = abrir_cola(ruta, lease_segundos=0.05)
+    otra = abrir_cola(ruta, lease_segundos=0.05)
+    (ciclo,) = una.encolar([{"i": 0}])
+    una.reclamar("fisica", "a")
+    una.completar_fisica(ciclo, "a", {})
+    una.reclamar("evaluacion", "a")
+    time.sleep(0.1)
+    otra.reclamar("evaluacion", "b")
+
+    registro = {"ciclo": ciclo, "config": {"i": 0}, "resultados": {}, "evaluacion": {}}
+    assert not una.registrar(ciclo, "a", registro)
+    assert otra.registrar(ciclo, "b", registro)
+    assert not otra.registrar(ciclo, "b", registro)
+    assert una.almacen.contar() == 1
+    assert una.pendientes() == 0
+
+
+def test_los_ciclos_siguen_al_historico(tmp_path):
+    ruta = str(tmp_path / "lab.sqlite")
+    almacen = almacen_experimentos.AlmacenExperimentos(ruta)
+    almacen.guardar({"ciclo": 41, "config": {}})
+    cola = cola_trabajo.ColaTrabajo(almacen)
+    assert cola.encolar([{}, {}]) == [42, 43]
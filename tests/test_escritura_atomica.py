@@ -0,0 +1,29 @@
+import os
+import stat
+
+import pytest
+
+import escritura_atomica
+
+
+def test_escribe_y_devuelve_el_tamano(tmp_path):
+    ruta = tmp_path / "datos.json"
+    assert escritura_atomica.escribir_atomico(str(ruta), lambda f: f.write(b"{}\n")) == 3
+    assert ruta.read_bytes() == b"{}\n"
+    # Legible por otros procesos, no con los 0600 de mkstemp
+    assert stat.S_IMODE(os.stat(ruta).st_mode) == 0o644
+    assert os.listdir(tmp_path) == ["datos.json"]
+
+
+def test_un_fallo_deja_el_fichero_como_estaba(tmp_path):
+    ruta = tmp_path / "datos.json"
+    ruta.write_bytes(b"anterior")
+
+    def fallar(f):
+        f.write(b"a medias")
+        raise RuntimeError("disco lleno")
+
+    with pytest.raises(RuntimeError):
+        escritura_atomica.escribir_atomico(str(ruta), fallar)
+    assert ruta.read_bytes() == b"anterior"
+    assert os.listdir(tmp_path) == ["datos.json"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import expresiones
+import quantum_core
+
+
+@pytest.mark.parametrize("texto", [
+    "__import__('os').system('true')",
+    "x.__class__",
+    "open('/etc/passwd')",
+    "[x for x in ()]",
+    "(lambda: 1)()",
+    "x[0]",
+    "exp(x=1)",
+    "exp",
+    "_secreto * x",
+    "'texto'",
+    "True + x",
+    "x if x else 1",
+    "x < 1",
+    "x // 2",
+    "x; 1",
+    "x" + " + x" * 300,
+])
+def test_rechaza_expresiones_no_seguras(texto):
+    with pytest.raises(ValueError):
+        expresiones.compilar(texto)
+
+
+def test_evalua_sobre_la_rejilla():
+    x = np.linspace(-1.0, 1.0, 5)
+    f = expresiones.evaluador("V0*exp(-(x-x0)**2) + caja(x, -0.5, 0.5)", {"V0": 2.0, "x0": 0.0})
+    np.testing.assert_allclose(f(x=x), 2.0 * np.exp(-x ** 2) + ((x >= -0.5) & (x <= 0.5)))
+
+
+def test_constante_se_extiende_a_la_rejilla():
+    assert expresiones.evaluador("3", {})(x=np.zeros(4)).shape == (4,)
+
+
+def test_faltan_parametros():
+    with pytest.raises(ValueError, match="Faltan parámetros"):
+        expresiones.evaluador("V0 * x", {})
+
+
+def test_valores_no_finitos():
+    with pytest.raises(ValueError, match="no finitos"):
+        expresiones.evaluador("1/x", {})(x=np.zeros(3))
+
+
+def test_potencial_expresion_en_el_nucleo():
+    config = {
+        "L": 20.0, "N": 128, "T": 0.1, "dt": 0.01,
+        "potencial": {"tipo": "expresion", "expresion": "0.5*k*x**2", "k": 1.0},
+        "estado_inicial": {"tipo": "gauss", "x0": 0.0, "sigma": 1.0},
+        "metrica": {"tipo": "prob_region", "x_min": -1.0, "x_max": 1.0},
+    }
+    armonico = dict(config, potencial={"tipo": "armonic", "k": 1.0, "x0": 0.0})
+    r_expr, _, _ = quantum_core.run_schrodinger_1d(config)
+    r_arm, _, _ = quantum_core.run_schrodinger_1d(armonico)
+    assert r_expr["prob_region"] == pytest.approx(r_arm["prob_region"], abs=1e-12)
+
+    with pytest.raises(ValueError):
+        quantum_core.canonical_config(
+            dict(config, potencial={"tipo": "expresion", "expresion": "__import__('os')"})
+        )
+
+
+@pytest.mark.parametrize("clave, tipo, admitido", [
+    ("potencial", "rampa", "doble_pozo"),
+    ("estado_inicial", "lorentziana", "gauss_momentum"),
+])
+def test_tipo_desconocido_lista_los_admitidos(config_base, clave, tipo, admitido):
+    config = config_base(T=0.1)
+    config[clave] = {"tipo": tipo}
+    with pytest.raises(ValueError, match=f"{tipo}.*admitidos:.*{admitido}"):
+        quantum_core.run_schrodinger_1d(config)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import agentes
+import main
+import metricas
+
+
+class Parar(Exception):
+    pass
+
+
+@pytest.fixture
+def laboratorio(tmp_path, monkeypatch):
+    """
+    main con el backend stub en un directorio temporal, sin estado de
+    otras pruebas. Devuelve las llamadas al LLM por agente.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(main, "CICLO_DELAY_SECONDS", 0)
+    for nombre, valor in (("_almacen", None), ("_archivo_snapshots", None),
+                          ("_indice_novedad", None), ("_indice_novedad_id", 0),
+                          ("_escritores", {}), ("_agentes", {})):
+        monkeypatch.setattr(main, nombre, valor)
+    monkeypatch.setattr(metricas, "REGISTRO", metricas.RegistroMetricas())
+
+    llamadas = {}
+    responder = agentes.AgenteStub.generate_reply
+
+    def contar(self, messages=None, **kwargs):
+        llamadas[self.name] = llamadas.get(self.name, 0) + 1
+        return responder(self, messages=messages, **kwargs)
+
+    monkeypatch.setattr(agentes.AgenteStub, "generate_reply", contar)
+    yield llamadas
+    main.cerrar_escritores()
+    if main._almacen is not None:
+        main._almacen.cerrar()
+
+
+def ejecutar_rondas(monkeypatch, rondas):
+    pausas = []
+
+    def dormir(segundos):
+        pausas.append(segundos)
+        if len(pausas) >= rondas:
+            raise Parar
+
+    monkeypatch.setattr(main.time, "sleep", dormir)
+    with pytest.raises(Parar):
+        main.simular_ciclo_de_investigacion()
+    main.cerrar_escritores()
+
+
+def registros_jsonl():
+    with open(main.REGISTROS_FILE, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f]
+
+
+def test_modo_serie_con_stub(laboratorio, monkeypatch):
+    monkeypatch.setattr(main, "TAMANO_LOTE", 1)
+    ejecutar_rondas(monkeypatch, 3)
+
+    registros = main.obtener_almacen().ultimos(10)
+    assert [r["ciclo"] for r in registros] == [1, 2, 3]
+    for registro in registros:
+        assert registro["resultados"]["prob_total"] == pytest.approx(1.0, abs=1e-6)
+        assert registro["evaluacion"]["ciclo"] == registro["ciclo"]
+        assert registro["evaluacion"]["descripcion_experimento"].endswith("backend stub")
+    assert [r["ciclo"] for r in registros_jsonl()] == [1, 2, 3]
+    assert laboratorio == {"Cientifico_Cuantico": 3, "Archivista": 3}
+    assert os.path.exists(main.METRICAS_PROM_FILE)
+    assert list(main.obtener_archivo_snapshots().ciclos()) == [1, 2, 3]
+
+
+def test_modo_lote_con_stub(laboratorio, monkeypatch):
+    monkeypatch.setattr(main, "TAMANO_LOTE", 4)
+    ejecutar_rondas(monkeypatch, 2)
+
+    registros = main.obtener_almacen().ultimos(20)
+    ciclos = [r["ciclo"] for r in registros]
+    assert len(ciclos) == 8
+    assert ciclos == list(range(1, 9))
+    for registro in registros:
+        assert registro["evaluacion"]["ciclo"] == registro["ciclo"]
+        assert registro["evaluacion"]["descripcion_experimento"].endswith("backend stub")
+    assert [r["ciclo"] for r in registros_jsonl()] == ciclos
+    # Una llamada por agente y ronda, con los agentes reutilizados
+    assert laboratorio == {"Cientifico_Cuantico": 2, "Archivista": 2}
+    assert len(main._agentes) == 2
+
+
+def test_continua_la_numeracion_tras_reiniciar(laboratorio, monkeypatch):
+    monkeypatch.setattr(main, "TAMANO_LOTE", 1)
+    ejecutar_rondas(monkeypatch, 2)
+    main._almacen.cerrar()
+    monkeypatch.setattr(main, "_almacen", None)
+    monkeypatch.setattr(main, "_indice_novedad", None)
+    monkeypatch.setattr(main, "_indice_novedad_id", 0)
+
+    ejecutar_rondas(monkeypatch, 1)
+    assert [r["ciclo"] for r in main.obtener_almacen().ultimos(10)] == [1, 2, 3]
+
+
+def test_modo_pipeline_con_stub(laboratorio, monkeypatch):
+    ciclos_objetivo = 5
+    monkeypatch.setattr(main, "LLM_LLAMADAS_POR_MINUTO", 600)  # un turno cada 0.1 s
+
+    turnos = []
+    esperar_turno = main.LimitadorLLM.esperar_turno
+
+    async def anotar_turno(self):
+        await esperar_turno(self)
+        turnos.append(time.monotonic())
+
+    monkeypatch.setattr(main.LimitadorLLM, "esperar_turno", anotar_turno)
+
+    registrados = []
+    registrar = main.registrar_ciclo
+
+    def anotar_registro(ciclo, *args, **kwargs):
+        registrados.append(ciclo)
+        registrar(ciclo, *args, **kwargs)
+
+    monkeypatch.setattr(main, "registrar_ciclo", anotar_registro)
+
+    async def ejecutar():
+        bucle = asyncio.create_task(
+            main.simular_ciclo_de_investigacion_async(en_vuelo=3, procesos=1)
+        )
+        while len(registrados) < ciclos_objetivo:
+            assert not bucle.done(), bucle.exception()
+            await asyncio.sleep(0.01)
+        bucle.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await bucle
+
+    asyncio.run(asyncio.wait_for(ejecutar(), timeout=60))
+    main.cerrar_escritores()
+
+    # Con varios ciclos en vuelo, los registros se escriben en orden
+    assert registrados == list(range(1, len(registrados) + 1))
+    ciclos = [r["ciclo"] for r in main.obtener_almacen().ultimos(50)]
+    assert ciclos == registrados
+    assert [r["ciclo"] for r in registros_jsonl()] == registrados
+    # Científico y Archivista: al menos dos turnos por ciclo registrado y,
+    # aunque haya ciclos en paralelo, el i-ésimo no antes de i * 0.1 s
+    assert len(turnos) >= 2 * ciclos_objetivo
+    turnos.sort()
+    for i, t in enumerate(turnos):
+        assert t - turnos[0] >= 0.1 * i - 1e-3
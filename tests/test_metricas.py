@@ -0,0 +1,47 @@
+import json
+import os
+import threading
+
+import metricas
+
+
+def test_exportar_prometheus_y_json(tmp_path):
+    registro = metricas.RegistroMetricas(prefijo="prueba")
+    registro.observar("fisica", 0.003)
+    registro.observar("fisica", 7.0)
+    registro.incrementar("ciclos_fallidos")
+
+    ruta_prom, ruta_json = tmp_path / "m.prom", tmp_path / "m.json"
+    registro.exportar(str(ruta_prom), str(ruta_json))
+
+    texto = ruta_prom.read_text(encoding="utf-8")
+    assert 'prueba_etapa_segundos_bucket{etapa="fisica",le="0.005"} 1' in texto
+    assert 'prueba_etapa_segundos_count{etapa="fisica"} 2' in texto
+    assert "prueba_ciclos_fallidos_total 1" in texto
+    datos = json.loads(ruta_json.read_text(encoding="utf-8"))
+    assert datos["etapas"]["fisica"]["n"] == 2
+    assert datos["contadores"] == {"ciclos_fallidos": 1}
+
+
+def test_exportaciones_concurrentes_al_mismo_fichero(tmp_path):
+    ruta = str(tmp_path / "m.json")
+    errores = []
+
+    def exportar(i):
+        registro = metricas.RegistroMetricas()
+        registro.incrementar("ciclos", i)
+        try:
+            for _ in range(50):
+                registro.exportar(ruta_json=ruta)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=exportar, args=(i,)) for i in range(1, 5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores
+    assert json.loads(open(ruta, encoding="utf-8").read())["contadores"]["ciclos"] in (1, 2, 3, 4)
+    assert os.listdir(tmp_path) == ["m.json"]
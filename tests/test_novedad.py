@@ -0,0 +1,81 @@
+import statistics
+import time
+
+import numpy as np
+import pytest
+
+import agentes
+import novedad
+
+
+def indice_con(*configs):
+    return novedad.IndiceNovedad.desde_registros(
+        {"ciclo": i, "config": c} for i, c in enumerate(configs, 1)
+    )
+
+
+def test_rasgos_incluyen_la_duracion_split_step(config_base):
+    assert novedad.rasgos(config_base(T=2.0))["T"] == 2.0
+    assert "steps" not in novedad.rasgos(config_base())
+
+
+def test_misma_config_es_repetida(config_base):
+    indice = indice_con(config_base())
+    assert indice.novedad(config_base()) == 0.0
+    assert indice.es_repetida(config_base())
+
+
+def test_configs_que_solo_cambian_T_son_novedosas(config_base):
+    indice = indice_con(config_base(T=1.0))
+    for T in (2.0, 10.0, 20.0):
+        assert indice.novedad(config_base(T=T)) > indice.umbral
+        assert not indice.es_repetida(config_base(T=T))
+
+
+def test_cambiar_de_potencial_queda_lejos(config_base):
+    indice = indice_con(config_base())
+    otra = config_base(potencial={"tipo": "armonic", "k": 1.0, "x0": 0.0})
+    assert indice.novedad(otra) > indice.umbral
+
+
+def test_vecinos_ordenados_por_distancia(config_base):
+    indice = indice_con(config_base(T=1.0), config_base(T=5.0), config_base(T=1.1))
+    vecinos = indice.vecinos(config_base(T=1.0), k=3)
+    distancias = [d for d, _ in vecinos]
+    assert distancias == sorted(distancias)
+    assert vecinos[0][1]["ciclo"] == 1
+
+
+@pytest.fixture(scope="module")
+def indice_grande():
+    propuestas = agentes.AgenteStub("Cientifico_Cuantico", semilla=1)
+    indice = novedad.IndiceNovedad.desde_registros(
+        {"ciclo": i, "config": propuestas._config_aleatoria()} for i in range(20000)
+    )
+    consultas = [propuestas._config_aleatoria() for _ in range(50)]
+    return indice, consultas
+
+
+def test_vecinos_exactos_frente_a_fuerza_bruta(indice_grande):
+    indice, consultas = indice_grande
+    for config in consultas:
+        vector, n_rasgos = indice._vector(config)
+        desconocidos = n_rasgos - int(np.count_nonzero(~np.isnan(vector)))
+        todas = indice._distancias_exactas(np.arange(len(indice)), vector, desconocidos)
+        obtenidas = [d for d, _ in indice.vecinos(config, k=3)]
+        np.testing.assert_allclose(obtenidas, np.sort(todas)[:3], rtol=0, atol=1e-12)
+
+
+def test_consulta_por_debajo_del_milisegundo_con_20k_registros(indice_grande):
+    indice, consultas = indice_grande
+    for config in consultas[:5]:
+        indice.novedad(config)
+    medianas = []
+    for _ in range(5):
+        tiempos = []
+        for config in consultas:
+            t0 = time.perf_counter()
+            indice.novedad(config)
+            tiempos.append(time.perf_counter() - t0)
+        medianas.append(statistics.median(tiempos))
+    assert min(medianas) < 1e-3
@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+import pytest
+
+import quantum_core
+
+
+def test_lote_igual_que_ejecuciones_sueltas(config_base):
+    configs = [
+        config_base(),
+        config_base(T=0.5),
+        config_base(T=2.0, potencial={"tipo": "armonic", "k": 1.0, "x0": 0.0}),
+        config_base(estado_inicial={"tipo": "superposicion", "x1": -2.0, "x2": 2.0, "sigma": 0.7}),
+        config_base(N=128),
+        config_base(absorcion={"anchura": 2.0, "intensidad": 5.0}),
+        config_base(integrador="yoshida4", dt=0.05),
+        config_base(motor="espectral"),
+    ]
+    lote = quantum_core.run_schrodinger_1d_batch(configs)
+    assert len(lote) == len(configs)
+    # Las cinco configs con la misma rejilla, dt e integrador van apiladas
+    assert [s[0]["timing"].get("lote") for s in lote] == [5, 5, 5, 5, 1, 5, 1, None]
+
+    for config, (r_lote, x_lote, psi_lote) in zip(configs, lote):
+        r, x, psi = quantum_core.run_schrodinger_1d(config)
+        assert r_lote["steps"] == r["steps"]
+        assert r_lote["T"] == r["T"]
+        assert r_lote["prob_region"] == pytest.approx(r["prob_region"], abs=1e-12)
+        assert r_lote["prob_total"] == pytest.approx(r["prob_total"], abs=1e-12)
+        np.testing.assert_array_equal(x_lote, x)
+        np.testing.assert_allclose(psi_lote, psi, atol=1e-12)
+
+
+def test_lote_propaga_configs_invalidas(config_base):
+    with pytest.raises(ValueError):
+        quantum_core.run_schrodinger_1d_batch([config_base(), config_base(modelo="otro")])
+
+
+@pytest.mark.parametrize("motor", ["split_step", "espectral"])
+def test_streaming_acaba_en_el_estado_de_la_ejecucion_completa(config_base, motor):
+    config = config_base(N=128, motor=motor)
+    resultados, _, psi = quantum_core.run_schrodinger_1d(config)
+
+    fotogramas = list(quantum_core.iter_schrodinger_1d(config, every=7, incluir_psi=True))
+    # t = 0, cada 7 pasos y el último: 0, 7, ..., 98, 100
+    assert [f["step"] for f in fotogramas] == list(range(0, 100, 7)) + [100]
+    assert fotogramas[-1]["t"] == pytest.approx(resultados["T"])
+    np.testing.assert_allclose(fotogramas[-1]["psi"], psi, atol=1e-10)
+    assert fotogramas[-1]["prob_region"] == pytest.approx(resultados["prob_region"], abs=1e-10)
+
+
+def test_espectral_coincide_con_split_step(config_base):
+    config = config_base(N=128, dt=0.005)
+    res_ss, _, psi_ss = quantum_core.run_schrodinger_1d(config)
+    res_esp, _, psi_esp = quantum_core.run_schrodinger_1d(dict(config, motor="espectral"))
+
+    # Diferencia dominada por el error O(dt^2) del split-step
+    np.testing.assert_allclose(psi_esp, psi_ss, atol=5e-4)
+    assert res_esp["prob_region"] == pytest.approx(res_ss["prob_region"], abs=1e-5)
+
+
+def test_cache_de_autoestados_en_disco(cache_autoestados, monkeypatch):
+    diagonalizaciones = []
+    original = quantum_core.SpectralPropagator1D._diagonalizar
+
+    def contar(self):
+        diagonalizaciones.append(self.N)
+        return original(self)
+
+    monkeypatch.setattr(quantum_core.SpectralPropagator1D, "_diagonalizar", contar)
+    x, _ = quantum_core.build_spatial_grid(20.0, 64)
+    potenciales = [0.5 * k * x ** 2 for k in (1.0, 2.0, 3.0)]
+
+    quantum_core.get_spectral_propagator(20.0, 64, potenciales[0])
+    quantum_core.get_spectral_propagator(20.0, 64, potenciales[1])
+    rutas = sorted(cache_autoestados.glob("*.npz"), key=lambda r: r.stat().st_mtime_ns)
+    assert len(rutas) == 2 and len(diagonalizaciones) == 2
+    for segundos, ruta in enumerate(rutas):
+        os.utime(ruta, (1000 + segundos, 1000 + segundos))
+
+    # Acierto: sin la base en memoria se lee del disco, sin diagonalizar
+    quantum_core._BASES_ESPECTRALES.clear()
+    prop = quantum_core.get_spectral_propagator(20.0, 64, potenciales[0])
+    np.testing.assert_array_equal(prop.V, potenciales[0])
+    assert len(diagonalizaciones) == 2
+
+    # Poda: con sitio para dos bases, la tercera desaloja la usada hace
+    # más tiempo (la segunda; la primera se acaba de leer)
+    monkeypatch.setattr(quantum_core, "EIGEN_CACHE_MAX_BYTES", 2 * rutas[0].stat().st_size)
+    quantum_core.get_spectral_propagator(20.0, 64, potenciales[2])
+    restantes = set(cache_autoestados.glob("*.npz"))
+    assert len(restantes) == 2
+    assert rutas[0] in restantes and rutas[1] not in restantes
+
+
+def test_resolucion_automatica_refina_la_barrera(config_base):
+    # La barrera es discontinua: el N estimado por el espectro del estado
+    # inicial no basta y el dt parte de DT_MAX_DISCONTINUO
+    concreta, info = quantum_core.select_resolution(config_base(resolucion="auto"))
+    assert info["cumple"] and info["motivo"] is None
+    assert info["N"] > info["N_estimado"]
+    assert info["dt"] <= quantum_core.DT_MAX_DISCONTINUO
+    assert (concreta["N"], concreta["dt"]) == (info["N"], info["dt"])
+
+    # El N y el dt elegidos cumplen la tolerancia frente a 2N y dt/2
+    def prob(N, dt):
+        return quantum_core.run_schrodinger_1d(dict(concreta, N=N, dt=dt))[0]["prob_region"]
+
+    tol = info["tolerancia"]
+    N, dt = info["N"], info["dt"]
+    elegida = prob(N, dt)
+    assert abs(elegida - prob(2 * N, dt)) <= tol
+    assert 4.0 / 3.0 * abs(elegida - prob(N, dt / 2)) <= tol
+
+
+def test_resolucion_automatica_no_refina_un_caso_suave(config_base):
+    # Estado coherente en el oscilador armónico: medio periodo después el
+    # paquete está en x = 3, lejos del borde de la región medida
+    config = config_base(
+        T=3.14,
+        resolucion="auto",
+        potencial={"tipo": "armonic", "k": 1.0},
+        estado_inicial={"tipo": "gauss", "x0": -3.0, "sigma": 1.0},
+        metrica={"tipo": "prob_region", "x_min": 0.0, "x_max": 10.0},
+    )
+    concreta, info = quantum_core.select_resolution(config)
+    assert info["cumple"]
+    assert info["N"] == info["N_estimado"]
+    # Un paso de verificación en N y otro en dt, sin duplicar ninguno
+    assert info["pruebas"] == 3
+    assert info["dt"] == pytest.approx(3.14 / np.ceil(3.14 / quantum_core._dt_max(config)))
+    assert quantum_core.select_resolution(config)[1]["memoizada"]
+
+
+@pytest.mark.parametrize("integrador, orden", [("strang", 2), ("yoshida4", 4), ("yoshida6", 6)])
+def test_orden_de_convergencia_de_los_integradores(integrador, orden):
+    # Referencia exacta en el tiempo en la misma rejilla: el motor espectral
+    L, N, T = 20.0, 128, 1.0
+    x, _ = quantum_core.build_spatial_grid(L, N)
+    V = 0.5 * x ** 2
+    psi0 = quantum_core.build_initial_state_1d(
+        x, {"tipo": "gauss_momentum", "x0": -2.0, "sigma": 1.0, "k0": 1.0}
+    )
+    referencia = quantum_core.get_spectral_propagator(L, N, V).evolve_to(psi0, [T])[0]
+
+    errores = []
+    for pasos in (8, 16):
+        prop = quantum_core.SplitStepPropagator1D(L, N, T / pasos, V, integrador=integrador)
+        psi = prop.evolve(psi0.copy(), pasos)
+        errores.append(np.max(np.abs(psi - referencia)))
+    # Al dividir dt entre 2 el error baja 2^orden (4, 16, 64)
+    assert errores[0] / errores[1] == pytest.approx(2.0 ** orden, rel=0.1)
+
+
+def test_tiempo_imaginario_oscilador_armonico():
+    config = {
+        "motor": "imaginario", "L": 20.0, "N": 256, "n_estados": 3,
+        "potencial": {"tipo": "armonic", "k": 1.0},
+    }
+    resultados, _, _ = quantum_core.run_schrodinger_1d(config)
+    assert resultados["convergido"]
+    assert resultados["energias"] == pytest.approx([0.5, 1.5, 2.5], abs=1e-6)
+
+
+def test_tiempo_imaginario_doble_pozo_frente_a_eigh():
+    # El par más bajo está casi degenerado (desdoblamiento por efecto túnel)
+    L, N = 10.0, 256
+    x, _ = quantum_core.build_spatial_grid(L, N)
+    V = quantum_core.build_potential_1d(x, {"tipo": "doble_pozo", "a": 1.0, "b": 5.0})
+    energias, estados, info = quantum_core.find_eigenstates_1d(L, N, V, n_estados=4)
+
+    referencia = quantum_core.SpectralPropagator1D(L, N, V)
+    assert all(e["convergido"] for e in info)
+    np.testing.assert_allclose(energias, referencia.energias[:4], atol=1e-6)
+    # Mismos estados salvo la fase global
+    dx = x[1] - x[0]
+    solapes = np.abs(estados.conj() @ referencia.autovectores[:, :4]) * np.sqrt(dx)
+    np.testing.assert_allclose(np.diag(solapes), 1.0, atol=1e-4)
+
+
+def _paquete_libre(**cambios):
+    config = {
+        "L": 40.0, "N": 512, "T": 8.0, "dt": 0.01,
+        "potencial": {"tipo": "libre"},
+        "estado_inicial": {"tipo": "gauss_momentum", "x0": 0.0, "sigma": 1.0, "k0": 5.0},
+        "metrica": {"tipo": "prob_region", "x_min": -20.0, "x_max": 20.0},
+    }
+    config.update(cambios)
+    return config
+
+
+def test_capa_absorbente_absorbe_el_paquete_que_sale():
+    # En T = 8 el paquete (v = 5) ha recorrido 40: todo ha llegado al borde
+    resultados, _, _ = quantum_core.run_schrodinger_1d(
+        _paquete_libre(absorcion={"anchura": 4.0, "intensidad": 5.0})
+    )
+    assert resultados["prob_absorbida"] == pytest.approx(1.0, abs=1e-2)
+    assert resultados["prob_total"] == pytest.approx(1.0 - resultados["prob_absorbida"])
+
+
+@pytest.mark.parametrize("absorcion", [None, False])
+def test_sin_capa_absorbente_se_conserva_la_norma(absorcion):
+    config = _paquete_libre(absorcion=absorcion)
+    # iter_schrodinger_1d no renormaliza: la norma es la del propagador
+    normas = [f["norma"] for f in quantum_core.iter_schrodinger_1d(config, every=100)]
+    np.testing.assert_allclose(normas, 1.0, atol=1e-12)
+    resultados, _, _ = quantum_core.run_schrodinger_1d(config)
+    assert "prob_absorbida" not in resultados
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import quantum_core
+import quantum_core_2d
+
+
+def _config_2d(config_base, **cambios):
+    config = config_base(N=128, T=1.0)
+    config.update(modelo="schrodinger_2d", Ly=10.0, Ny=64)
+    config["estado_inicial"] = dict(config["estado_inicial"], tipo="gauss_momentum", y0=0.0)
+    config.update(cambios)
+    return config
+
+
+def test_conserva_la_norma(config_base):
+    config = _config_2d(config_base, potencial={"tipo": "doble_rendija"})
+    x, y, dx, dy = quantum_core_2d.build_spatial_grid_2d(20.0, 128, 10.0, 64)
+    V = quantum_core_2d.build_potential_2d(x, y, config["potencial"])
+    psi = quantum_core_2d.build_initial_state_2d(x, y, config["estado_inicial"])
+    prop = quantum_core_2d.SplitStepPropagator2D(x, y, config["dt"], V, hilos=1)
+
+    prop.evolve(psi, 100)
+    assert np.sum(np.abs(psi) ** 2) * dx * dy == pytest.approx(1.0, abs=1e-12)
+
+
+def test_potencial_separable_coincide_con_1d(config_base):
+    # La barrera sólo depende de x y la gaussiana inicial es un producto
+    # f(x) g(y): la densidad marginal en x es la del caso 1D
+    config = _config_2d(config_base)
+    res_2d, (x, y), psi_2d = quantum_core_2d.run_schrodinger_2d(config)
+    res_1d, x_1d, psi_1d = quantum_core.run_schrodinger_1d(config_base(N=128, T=1.0))
+
+    np.testing.assert_allclose(x, x_1d)
+    dy = y[1] - y[0]
+    marginal = np.sum(np.abs(psi_2d) ** 2, axis=1) * dy
+    np.testing.assert_allclose(marginal, np.abs(psi_1d) ** 2, atol=1e-10)
+    assert res_2d["prob_region"] == pytest.approx(res_1d["prob_region"], abs=1e-10)
+
+
+def test_n_acotado_a_512(config_base):
+    config = _config_2d(config_base, N=4096, Ny=4096, T=0.1)
+    canon = quantum_core_2d.canonical_config_2d(config)
+    assert (canon["N"], canon["Ny"]) == (512, 512)
+
+
+@pytest.mark.parametrize(
+    "clave, tipo", [("potencial", "rampa"), ("estado_inicial", "superposicion")]
+)
+def test_tipo_desconocido_falla(config_base, clave, tipo):
+    config = _config_2d(config_base, T=0.1)
+    config[clave] = {"tipo": tipo}
+    with pytest.raises(ValueError, match="admitidos"):
+        quantum_core_2d.run_schrodinger_2d(config)
@@ -0,0 +1,71 @@
+import gzip
+import logging
+
+import pytest
+
+import registro_jsonl
+
+
+def escritor(ruta, **opciones):
+    opciones.setdefault("segundos_por_vaciado", 0)
+    return registro_jsonl.EscritorJSONL(str(ruta), **opciones)
+
+
+def test_rotacion_y_lectura_de_todos_los_segmentos(tmp_path):
+    ruta = tmp_path / "registros.jsonl"
+    with escritor(ruta, max_registros=10, lineas_por_vaciado=3) as e:
+        for i in range(35):
+            e.escribir({"ciclo": i})
+
+    segmentos = registro_jsonl.segmentos(str(ruta))
+    assert [n for n, _ in segmentos] == [1, 2, 3]
+    assert all(r.endswith(".gz") for _, r in segmentos)
+    with gzip.open(segmentos[0][1], "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 10
+    assert [r["ciclo"] for r in registro_jsonl.leer_registros(str(ruta))] == list(range(35))
+
+
+def test_por_defecto_se_poda_a_max_segmentos(tmp_path):
+    ruta = tmp_path / "registros.jsonl"
+    with escritor(ruta, max_registros=1) as e:
+        for i in range(40):
+            e.escribir({"ciclo": i})
+    segmentos = registro_jsonl.segmentos(str(ruta))
+    assert len(segmentos) == registro_jsonl.MAX_SEGMENTOS
+    assert segmentos[-1][0] == 40
+
+
+def test_cero_conserva_todos_los_segmentos(tmp_path):
+    ruta = tmp_path / "registros.jsonl"
+    with escritor(ruta, max_registros=1, max_segmentos=0) as e:
+        for i in range(40):
+            e.escribir({"ciclo": i})
+    assert len(registro_jsonl.segmentos(str(ruta))) == 40
+    assert len(list(registro_jsonl.leer_registros(str(ruta)))) == 40
+
+
+def test_poda_a_n_segmentos(tmp_path, caplog):
+    ruta = tmp_path / "registros.jsonl"
+    with caplog.at_level(logging.INFO):
+        with escritor(ruta, max_registros=5, max_segmentos=2, compresion="ninguna") as e:
+            for i in range(30):
+                e.escribir({"ciclo": i})
+    assert [n for n, _ in registro_jsonl.segmentos(str(ruta))] == [5, 6]
+    assert [r["ciclo"] for r in registro_jsonl.leer_registros(str(ruta))] == list(range(20, 30))
+    assert sum("eliminado" in m for m in caplog.messages) == 4
+
+
+def test_linea_truncada_se_ignora(tmp_path):
+    ruta = tmp_path / "registros.jsonl"
+    with escritor(ruta) as e:
+        e.escribir({"ciclo": 1})
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"ciclo": 2')
+    assert list(registro_jsonl.leer_registros(str(ruta))) == [{"ciclo": 1}]
+
+
+def test_escribir_tras_cerrar_falla(tmp_path):
+    e = escritor(tmp_path / "registros.jsonl")
+    e.cerrar()
+    with pytest.raises(ValueError):
+        e.escribir({"ciclo": 1})
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import quantum_core
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def trabajador(entrada, *argumentos, modulo="trabajador_fisica", cache_autoestados=None):
+    entorno = dict(os.environ)
+    if cache_autoestados is not None:
+        entorno["QUANTUM_EIGEN_CACHE_DIR"] = str(cache_autoestados)
+    proceso = subprocess.run(
+        [sys.executable, "-m", modulo, *argumentos],
+        input=entrada, capture_output=True, text=True, cwd=RAIZ, env=entorno, timeout=120,
+    )
+    salidas = [json.loads(linea) for linea in proceso.stdout.splitlines()]
+    return proceso.returncode, salidas, proceso.stderr
+
+
+@pytest.mark.parametrize("modulo, argumentos", [
+    ("trabajador_fisica", ()),
+    ("trabajador_fisica", ("--lote", "2")),
+    ("quantum_core", ("--lote", "2")),
+])
+def test_ida_y_vuelta(config_base, cache_autoestados, modulo, argumentos):
+    configs = [config_base(N=128), config_base(N=128, T=0.5)]
+    entrada = json.dumps(configs[0]) + "\n\n" + json.dumps({"id": "b", "config": configs[1]}) + "\n"
+
+    codigo, salidas, stderr = trabajador(
+        entrada, *argumentos, modulo=modulo, cache_autoestados=cache_autoestados
+    )
+    assert codigo == 0, stderr
+    assert "2 configs, 0 errores" in stderr
+    # Las líneas vacías cuentan para el número de línea pero no producen salida
+    assert [s["linea"] for s in salidas] == [1, 3]
+    assert "id" not in salidas[0] and salidas[1]["id"] == "b"
+    for salida, config in zip(salidas, configs):
+        esperado, _, _ = quantum_core.run_schrodinger_1d(config)
+        assert salida["resultados"]["prob_region"] == pytest.approx(esperado["prob_region"])
+
+
+def test_linea_mal_formada(config_base, cache_autoestados):
+    entrada = '{"L": 20.0,\n[1, 2]\n' + json.dumps(config_base(N=128)) + "\n"
+
+    codigo, salidas, stderr = trabajador(entrada, cache_autoestados=cache_autoestados)
+    assert codigo == 1
+    assert "3 configs, 2 errores" in stderr
+    assert salidas[0]["error"].startswith("JSON no válido")
+    assert salidas[1]["error"] == "Cada línea debe ser un objeto JSON con la config"
+    # Las líneas válidas se procesan igualmente
+    assert "resultados" in salidas[2] and "error" not in salidas[2]
+
+
+def test_config_invalida_termina_con_error(config_base, cache_autoestados):
+    config = config_base(N=128, potencial={"tipo": "rampa"})
+
+    codigo, salidas, _ = trabajador(json.dumps(config) + "\n", cache_autoestados=cache_autoestados)
+    assert codigo == 1
+    assert salidas == [{"linea": 1, "error": salidas[0]["error"]}]
+    assert salidas[0]["error"].startswith("ValueError: Tipo de potencial no soportado")
@@ -0,0 +1,133 @@
+import argparse
+import json
+import sys
+import time
+
+import cache_resultados
+
+# ==========================
+# Trabajador de física (sólo NumPy)
+# ==========================
+#
+# Lee configuraciones en JSONL (una por línea, o {"id": ..., "config": {...}})
+# de stdin o de ficheros y escribe por cada una, en el mismo orden, una línea
+# JSON con "resultados" o "error". Sólo importa el núcleo (NumPy y biblioteca
+# estándar): nada de autogen/OpenAI ni pandas, así que arranca rápido y sirve
+# para pools de procesos. scipy sólo se carga si llega una config 2D.
+#
+#   python -m trabajador_fisica configs.jsonl > resultados.jsonl
+#   cat configs.jsonl | python -m quantum_core --lote 16
+
+
+def _leer_entradas(ficheros):
+    """
+    Genera (numero_de_linea, texto) de los ficheros indicados ("-" = stdin),
+    saltando las líneas vacías.
+    """
+    n = 0
+    for ruta in ficheros or ["-"]:
+        f = sys.stdin if ruta == "-" else open(ruta, "r", encoding="utf-8")
+        try:
+            for linea in f:
+                n += 1
+                if linea.strip():
+                    yield n, linea
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def _analizar(n, linea):
+    """
+    Devuelve (salida_base, config); config es None si la línea no es válida
+    y entonces salida_base ya contiene el error.
+    """
+    salida = {"linea": n}
+    try:
+        entrada = json.loads(linea)
+    except json.JSONDecodeError as e:
+        salida["error"] = f"JSON no válido: {e.msg}"
+        return salida, None
+    if isinstance(entrada, dict) and isinstance(entrada.get("config"), dict):
+        if "id" in entrada:
+            salida["id"] = entrada["id"]
+        entrada = entrada["config"]
+    if not isinstance(entrada, dict):
+        salida["error"] = "Cada línea debe ser un objeto JSON con la config"
+        return salida, None
+    return salida, entrada
+
+
+def _procesar(pendientes, cache, salida):
+    """
+    Ejecuta un grupo de entradas ya analizadas (en lote cuando se puede)
+    y escribe sus líneas de salida en orden.
+    """
+    validas = [(base, config) for base, config in pendientes if config is not None]
+    ejecutadas = iter(
+        cache_resultados.ejecutar_lote_con_cache([c for _, c in validas], cache)
+        if validas else []
+    )
+    for base, config in pendientes:
+        if config is not None:
+            resultado = next(ejecutadas)
+            if isinstance(resultado, Exception):
+                base["error"] = f"{type(resultado).__name__}: {resultado}"
+            else:
+                base["resultados"] = resultado[0]
+        salida.write(json.dumps(base, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+def ejecutar(ficheros=None, salida=None, lote=1, cache=None):
+    """
+    Procesa todas las entradas y devuelve (procesadas, errores).
+
+    Con lote > 1 se agrupan hasta 'lote' líneas para simularlas juntas con
+    run_schrodinger_1d_batch; con lote = 1 cada resultado se escribe en
+    cuanto está (adecuado para tuberías interactivas).
+    """
+    salida = salida or sys.stdout
+    lote = max(1, int(lote))
+    procesadas = errores = 0
+    pendientes = []
+
+    def vaciar():
+        nonlocal errores
+        _procesar(pendientes, cache, salida)
+        errores += sum("error" in base for base, _ in pendientes)
+        pendientes.clear()
+
+    for n, linea in _leer_entradas(ficheros):
+        pendientes.append(_analizar(n, linea))
+        procesadas += 1
+        if len(pendientes) >= lote:
+            vaciar()
+    if pendientes:
+        vaciar()
+    return procesadas, errores
+
+
+def main(argv=None):
+    t0 = time.perf_counter()
+    parser = argparse.ArgumentParser(
+        description="Trabajador de física: configs JSONL -> resultados JSONL"
+    )
+    parser.add_argument("ficheros", nargs="*", help="Ficheros JSONL (por defecto, stdin)")
+    parser.add_argument("--lote", type=int, default=1,
+                        help="Líneas que se simulan juntas (1 = respuesta inmediata)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="Directorio de la caché de resultados (por defecto, sin caché)")
+    args = parser.parse_args(argv)
+
+    cache = cache_resultados.CacheResultados(args.cache) if args.cache else None
+    procesadas, errores = ejecutar(args.ficheros, lote=args.lote, cache=cache)
+    print(
+        f"{procesadas} configs, {errores} errores en {time.perf_counter() - t0:.2f}s",
+        file=sys.stderr,
+    )
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())